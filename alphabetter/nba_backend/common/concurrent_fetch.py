@@ -0,0 +1,109 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from alphabetter.nba_backend.common.http_cache import HttpCache, timed_get
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int | None = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ConcurrentFetcher:
+    """
+    Bounded-concurrency JSON fetcher. All workers share one pooled `requests.Session`
+    (connections are reused) and one token bucket, so total request rate stays capped
+    no matter how many workers are running. With an `HttpCache`, requests that pass a `ttl`
+    are served from / revalidated against the on-disk cache, and only real network requests
+    take a rate-limit token.
+    """
+
+    def __init__(self, max_workers: int = 8, rate_per_second: float = 10.0, headers: dict | None = None,
+                 timeout: float = 15, retries: int = 3, cache: HttpCache | None = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(rate_per_second)
+        self.cache = cache
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json(self, url: str, ttl=None) -> dict:
+        """GET `url` as JSON. `ttl` (seconds or callable(now) -> expiry) opts into the cache."""
+        if self.cache is not None and ttl is not None:
+            return self.cache.get_json(self.session, url, ttl, self.timeout, self.rate_limiter.acquire)
+        self.rate_limiter.acquire()
+        return timed_get(self.session, url, timeout=self.timeout).json()
+
+    def map(self, fn, items: dict, progress=None) -> dict:
+        """
+        Run `fn(item)` for every value of `items` on the worker pool.
+        Returns {key: result}; a failed call maps to the exception it raised.
+        `progress(done, total)` runs on the calling thread as calls complete; if it raises
+        (e.g. a cancelled job), calls not started yet are dropped and the error propagates.
+        """
+        def _call(item):
+            try:
+                return fn(item)
+            except Exception as e:
+                return e
+
+        keys = list(items)
+        results = {}
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            # Each call runs in a copy of the caller's context, so a run's metrics scope follows it.
+            futures = {pool.submit(contextvars.copy_context().run, _call, items[key]): key for key in keys}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if progress:
+                    progress(done, len(keys))
+        finally:
+            pool.shutdown(cancel_futures=True)
+        return {key: results[key] for key in keys}
+
+    def map_json(self, urls: dict, ttl=None) -> dict:
+        """Fetch {key: url} concurrently. Returns {key: json or exception}."""
+        return self.map(lambda url: self.get_json(url, ttl), urls)
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.evict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
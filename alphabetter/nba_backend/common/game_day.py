@@ -0,0 +1,15 @@
+from datetime import date, datetime, timedelta, timezone
+
+# ESPN finalizes box scores overnight; a game day ends at this hour (UTC), i.e. ~5-6am US
+# Eastern, after the last west coast game has ended.
+GAME_DAY_ROLLOVER_HOUR_UTC = 10
+
+
+def utc_now() -> datetime:
+    """Current UTC time as a naive datetime, the form DateTime columns (board_ts, ...) store."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def game_day(ts: datetime) -> date:
+    """The NBA game day a UTC timestamp belongs to (days roll over at 10:00 UTC, after the last game)."""
+    return (ts - timedelta(hours=GAME_DAY_ROLLOVER_HOUR_UTC)).date()
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import requests
+
+from alphabetter.nba_backend.common.game_day import GAME_DAY_ROLLOVER_HOUR_UTC
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.common.metrics import metrics, upstream_for
+
+log = get_logger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".http_cache"
+DEFAULT_MAX_MB = 512
+
+class OfflineCacheMiss(LookupError):
+    """Offline mode was asked for a URL that was never cached."""
+
+
+def until_next_game_day(now: float) -> float:
+    """
+    TTL policy: expire at the next game-day rollover after `now` (epoch seconds). A gamelog
+    fetched today is good until ESPN has finalized tonight's box scores.
+    """
+    current = datetime.fromtimestamp(now, tz=timezone.utc)
+    rollover = current.replace(hour=GAME_DAY_ROLLOVER_HOUR_UTC, minute=0, second=0, microsecond=0)
+    if rollover <= current:
+        rollover += timedelta(days=1)
+    return rollover.timestamp()
+
+
+def _expires_at(ttl, now: float) -> float:
+    """`ttl` is seconds, or a callable(now) -> absolute expiry."""
+    return ttl(now) if callable(ttl) else now + ttl
+
+
+def timed_get(session: requests.Session, url: str, upstream: str | None = None, **kwargs) -> requests.Response:
+    """
+    `session.get` with per-upstream metrics: latency, and a "fetched" / "error" count.
+    Raises for error statuses (a 304 is not an error).
+    """
+    upstream = upstream or upstream_for(url)
+    try:
+        with metrics.timer("http_request_seconds", upstream=upstream):
+            resp = session.get(url, **kwargs)
+        if resp.status_code != 304:
+            resp.raise_for_status()
+    except requests.RequestException:
+        metrics.inc("http_requests_total", upstream=upstream, result="error")
+        raise
+    if resp.status_code != 304:
+        metrics.inc("http_requests_total", upstream=upstream, result="fetched")
+    return resp
+
+
+class HttpCache:
+    """
+    Content-addressed on-disk cache for GET responses.
+
+    - bodies/<sha256 of body>: response bytes, shared by every URL that returned them
+    - meta/<sha256 of url>.json: url, body hash, ETag / Last-Modified, fetched/expiry times
+
+    Fresh entries are served without a request. Stale entries are revalidated with
+    If-None-Match / If-Modified-Since (a 304 just extends the expiry). `offline=True` never
+    touches the network and serves whatever is cached, fresh or not. Writes go through a
+    temp file + rename, so worker threads can share one cache.
+    """
+
+    def __init__(self, directory: Path | str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+                 offline: bool = False):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._bodies = self.directory / "bodies"
+        self._meta = self.directory / "meta"
+        self._bodies.mkdir(parents=True, exist_ok=True)
+        self._meta.mkdir(parents=True, exist_ok=True)
+
+    def _meta_path(self, url: str) -> Path:
+        return self._meta / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{time.monotonic_ns()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _load(self, url: str) -> tuple[dict, bytes] | None:
+        meta_path = self._meta_path(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            body = (self._bodies / meta["body"]).read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(meta_path)  # mtime doubles as last access time for LRU eviction
+        return meta, body
+
+    def _store(self, url: str, body: bytes, headers, ttl, now: float) -> dict:
+        body_hash = hashlib.sha256(body).hexdigest()
+        body_path = self._bodies / body_hash
+        if not body_path.exists():
+            self._write_atomic(body_path, body)
+        meta = {
+            "url": url,
+            "body": body_hash,
+            "size": len(body),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": now,
+            "expires_at": _expires_at(ttl, now),
+        }
+        self._write_atomic(self._meta_path(url), json.dumps(meta).encode())
+        return meta
+
+    def is_fresh(self, url: str) -> bool:
+        """Whether `get(url)` would be answered from the cache without a request."""
+        cached = self._load(url)
+        return cached is not None and (self.offline or time.time() < cached[0]["expires_at"])
+
+    def get(self, session: requests.Session, url: str, ttl, timeout: float = 15, before_request=None,
+            revalidate: bool | None = None) -> bytes:
+        """
+        Response body for `url`, from the cache when fresh, revalidated when stale.
+        `revalidate=True` asks the server even when fresh (still a conditional request);
+        `revalidate=False` serves any cached copy, however old. Offline mode always serves the cache.
+        `before_request` (e.g. a rate limiter's acquire) runs only when the network is used.
+        """
+        now = time.time()
+        upstream = upstream_for(url)
+        cached = self._load(url)
+        if revalidate is None:
+            serve_cached = self.offline or (cached is not None and now < cached[0]["expires_at"])
+        else:
+            serve_cached = self.offline or not revalidate
+        if cached and serve_cached:
+            metrics.inc("http_requests_total", upstream=upstream, result="cache_hit")
+            metrics.inc("cache_lookups_total", cache="http", result="hit")
+            return cached[1]
+        metrics.inc("cache_lookups_total", cache="http", result="miss")
+        if self.offline:
+            metrics.inc("http_requests_total", upstream=upstream, result="error")
+            raise OfflineCacheMiss(f"Not in offline cache: {url}")
+
+        headers = {}
+        if cached:
+            meta = cached[0]
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+            elif not meta.get("etag"):
+                headers["If-Modified-Since"] = format_datetime(
+                    datetime.fromtimestamp(meta["fetched_at"], tz=timezone.utc), usegmt=True
+                )
+
+        if before_request:
+            before_request()
+        resp = timed_get(session, url, upstream, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and cached:
+            metrics.inc("http_requests_total", upstream=upstream, result="revalidated")
+            meta, body = cached
+            meta.update(expires_at=_expires_at(ttl, now), fetched_at=now)
+            self._write_atomic(self._meta_path(url), json.dumps(meta).encode())
+            return body
+        self._store(url, resp.content, resp.headers, ttl, now)
+        return resp.content
+
+    def get_json(self, session: requests.Session, url: str, ttl, timeout: float = 15, before_request=None,
+                 revalidate: bool | None = None):
+        return json.loads(self.get(session, url, ttl, timeout, before_request, revalidate))
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self._bodies.iterdir() if not path.name.endswith(".tmp"))
+
+    def evict(self) -> int:
+        """
+        Drop least recently used entries until bodies fit in `max_bytes`, then delete bodies no
+        entry references. Returns the number of entries removed.
+        """
+        entries = []
+        for meta_path in self._meta.glob("*.json"):
+            try:
+                meta = json.loads(meta_path.read_text())
+                entries.append((meta_path.stat().st_mtime, meta_path, meta["body"]))
+            except (OSError, ValueError, KeyError):
+                meta_path.unlink(missing_ok=True)
+        entries.sort()
+
+        sizes = {}
+        for path in self._bodies.iterdir():
+            if not path.name.endswith(".tmp"):
+                sizes[path.name] = path.stat().st_size
+        refs = {}
+        for _, _, body in entries:
+            refs[body] = refs.get(body, 0) + 1
+        total = sum(size for body, size in sizes.items() if body in refs)
+
+        removed = 0
+        for _, meta_path, body in entries:
+            if total <= self.max_bytes:
+                break
+            meta_path.unlink(missing_ok=True)
+            removed += 1
+            refs[body] -= 1
+            if refs[body] == 0:
+                total -= sizes.get(body, 0)
+
+        for body in sizes:
+            if refs.get(body, 0) == 0:
+                (self._bodies / body).unlink(missing_ok=True)
+        if removed:
+            log.info(f"HTTP cache: evicted {removed} entries, {total / 1024 / 1024:.1f} MB kept")
+        return removed
+
+
+def default_http_cache() -> HttpCache:
+    """
+    Cache configured from the environment:
+    HTTP_CACHE_DIR (default nba_backend/.http_cache), HTTP_CACHE_MAX_MB (default 512),
+    HTTP_CACHE_OFFLINE=1 to replay from the cache without any network access.
+    """
+    return HttpCache(
+        directory=os.getenv("HTTP_CACHE_DIR", DEFAULT_CACHE_DIR),
+        max_bytes=int(float(os.getenv("HTTP_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+        offline=os.getenv("HTTP_CACHE_OFFLINE", "") not in ("", "0", "false"),
+    )
@@ -0,0 +1,41 @@
+"""
+Pipeline logging. Messages print like the old `print` calls (no prefix), but per-item
+chatter is DEBUG, so the default INFO level keeps stdout writes out of hot loops (they
+are slow on Windows consoles). Set LOG_LEVEL=DEBUG to see everything, WARNING for quiet runs.
+"""
+import logging
+import os
+import sys
+
+LOGGER_NAME = "alphabetter"
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at emit time (like print), not the one at import."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def _configure() -> logging.Logger:
+    logger = logging.getLogger(LOGGER_NAME)
+    if not logger.handlers:
+        handler = _StdoutHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    return logger
+
+
+_configure()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Child of the "alphabetter" logger, e.g. get_logger(__name__)."""
+    return logging.getLogger(LOGGER_NAME).getChild(name.rsplit(".", 1)[-1])
@@ -0,0 +1,190 @@
+"""
+Process-wide metrics: counters and timers keyed by name + labels.
+
+- `metrics.inc("db_rows_written_total", 120, table="player_game_log")`
+- `with metrics.timer("pipeline_stage_seconds", stage="calculate"): ...`
+
+Everything is cumulative for the life of the process. `/metrics` renders it in the Prometheus
+text format (or JSON). A pipeline run records into its own registry as well
+(`metrics.run_scope()`), so API traffic during the run stays out of its summary
+(`run_summary`). Updates take one lock, so worker threads can share the registry.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Hosts of the upstream APIs, for the `upstream` label of HTTP metrics.
+UPSTREAMS = {
+    "espn.com": "espn",
+    "prizepicks.com": "prizepicks",
+    "stats.nba.com": "nba_api",
+}
+
+
+def upstream_for(url: str) -> str:
+    host = urlsplit(url).hostname or ""
+    for suffix, upstream in UPSTREAMS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return upstream
+    return host or "unknown"
+
+
+# Registry of the run recording in this context, if any (see MetricsRegistry.run_scope).
+_run_registry: contextvars.ContextVar["MetricsRegistry | None"] = contextvars.ContextVar("run_registry", default=None)
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+def _label_text(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class MetricsRegistry:
+    """Counters (name, labels) -> value and timers (name, labels) -> [count, total seconds, max seconds]."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple, float] = {}
+        self._timers: dict[tuple, list] = {}
+        self.last_run: dict | None = None  # summary of the latest pipeline run in this process
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        run = _run_registry.get()
+        if run is not None and run is not self:
+            run.inc(name, value, **labels)
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            timer = self._timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+        run = _run_registry.get()
+        if run is not None and run is not self:
+            run.observe(name, seconds, **labels)
+
+    @contextmanager
+    def run_scope(self):
+        """
+        Yield a fresh registry that also receives everything recorded in this context, e.g.
+        one pipeline run on its thread. Work on other threads is included only when it runs
+        in a copy of this context (`contextvars.copy_context().run`, as ConcurrentFetcher does).
+        """
+        run = MetricsRegistry()
+        token = _run_registry.set(run)
+        try:
+            yield run
+        finally:
+            _run_registry.reset(token)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time the block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """Point-in-time copy: {"counters": {key: value}, "timers": {key: (count, total, max)}}."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timers": {key: tuple(timer) for key, timer in self._timers.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+            self.last_run = None
+
+    def to_json(self) -> dict:
+        """Flat JSON form: {"counters": {'name{label="x"}': value}, "timers": {...: {count, total, max}}}."""
+        snapshot = self.snapshot()
+        return {
+            "counters": {name + _label_text(labels): value for (name, labels), value in snapshot["counters"].items()},
+            "timers": {
+                name + _label_text(labels): {"count": count, "total": total, "max": maximum}
+                for (name, labels), (count, total, maximum) in snapshot["timers"].items()
+            },
+            "last_run": self.last_run,
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition: counters as counters, timers as summaries (_count / _sum) plus a _max gauge."""
+        snapshot = self.snapshot()
+        lines = []
+        for name in sorted({name for name, _ in snapshot["counters"]}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(snapshot["counters"].items()):
+                if metric == name:
+                    lines.append(f"{name}{_label_text(labels)} {value:g}")
+        for name in sorted({name for name, _ in snapshot["timers"]}):
+            lines.append(f"# TYPE {name} summary")
+            for (metric, labels), (count, total, maximum) in sorted(snapshot["timers"].items()):
+                if metric == name:
+                    lines.append(f"{name}_count{_label_text(labels)} {count}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {total:.6f}")
+                    lines.append(f"{name}_max{_label_text(labels)} {maximum:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def _delta(before: dict, after: dict) -> tuple[dict, dict]:
+    counters = {
+        key: value - before["counters"].get(key, 0)
+        for key, value in after["counters"].items()
+        if value != before["counters"].get(key, 0)
+    }
+    timers = {}
+    for key, (count, total, maximum) in after["timers"].items():
+        old_count, old_total, _ = before["timers"].get(key, (0, 0.0, 0.0))
+        if count != old_count:
+            # The max is cumulative; it is only exact for a run when the key is new.
+            timers[key] = (count - old_count, total - old_total, maximum)
+    return counters, timers
+
+
+def run_summary(after: dict, before: dict | None = None) -> dict:
+    """
+    What a `snapshot()` recorded (since `before`, when given), grouped for humans: stage
+    timings, HTTP calls per upstream, DB rows written per table and cache hit ratios.
+    """
+    counters, timers = _delta(before or {"counters": {}, "timers": {}}, after)
+    summary = {"stages": {}, "http": {}, "db_rows_written": {}, "caches": {}}
+
+    for (name, labels), (count, total, maximum) in timers.items():
+        labels = dict(labels)
+        if name == "pipeline_stage_seconds":
+            summary["stages"][labels["stage"]] = round(total, 3)
+        elif name == "http_request_seconds":
+            http = summary["http"].setdefault(labels["upstream"], {})
+            http.update(network_requests=count, latency_avg=round(total / count, 4), latency_max=round(maximum, 4))
+
+    for (name, labels), value in counters.items():
+        labels = dict(labels)
+        if name == "http_requests_total":
+            summary["http"].setdefault(labels["upstream"], {})[labels["result"]] = int(value)
+        elif name == "db_rows_written_total":
+            summary["db_rows_written"][labels["table"]] = summary["db_rows_written"].get(labels["table"], 0) + int(value)
+        elif name == "cache_lookups_total":
+            summary["caches"].setdefault(labels["cache"], {})[labels["result"]] = int(value)
+
+    for cache in summary["caches"].values():
+        lookups = cache.get("hit", 0) + cache.get("miss", 0)
+        cache["hit_ratio"] = round(cache.get("hit", 0) / lookups, 4) if lookups else None
+    return summary
@@ -0,0 +1,117 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+
+# Generational suffixes dropped before matching: PrizePicks, ESPN and the NBA API disagree on them.
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+MAX_EDIT_DISTANCE = 2      # fuzzy resolution: "Alperen Sengun" vs "Alperen Şengün" is 0, typos are 1-2
+# Edits touching the first name cap the distance lower: "Jaylin Williams" is 2 from "Jalen Williams",
+# a different player, while "Stephon Castel" is 2 from "Stephon Castle" with the first name intact.
+MAX_FIRST_NAME_EDIT_DISTANCE = 1
+SUGGESTION_DISTANCE = 4    # looser bound used only for "did you mean" suggestions
+
+
+def normalize_name(name: str) -> str:
+    """
+    Comparable form of a player name: diacritics stripped, lowercased, punctuation removed,
+    suffixes dropped. "Jaren Jackson Jr." and "jaren jackson" both become "jaren jackson";
+    "Nikola Jokić" becomes "nikola jokic"; "Shai Gilgeous-Alexander" becomes "shai gilgeous alexander".
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    ascii_name = "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+    ascii_name = ascii_name.replace("'", "").replace(".", "")
+    tokens = re.sub(r"[^a-z0-9]+", " ", ascii_name).split()
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int | None:
+    """
+    Levenshtein distance between `a` and `b` if it is <= `max_distance`, else None.
+    Only the diagonal band of width 2 * max_distance + 1 is filled, and the scan stops as soon
+    as a whole row exceeds the bound, so far-apart names cost almost nothing.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if a == b:
+        return 0
+    too_far = max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        lo, hi = max(1, i - max_distance), min(len(b), i + max_distance)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= max_distance else too_far
+        for j in range(lo, hi + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost, too_far)
+        if min(current[lo - 1:hi + 1]) > max_distance:
+            return None
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= max_distance else None
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    name: str            # canonical spelling from the index
+    player_id: object    # whatever id the index was built with (NBA/ESPN id)
+    distance: int        # 0 for an exact normalized match
+
+
+class NameIndex:
+    """
+    In-memory name -> id resolver. Exact lookups hit a dict of normalized names; misses fall
+    back to a bounded edit-distance scan over names of similar length. A normalized name
+    shared by two players is ambiguous and never resolves.
+    """
+
+    def __init__(self, names: dict[str, object]):
+        self._by_normalized: dict[str, list[tuple[str, object]]] = {}
+        for name, player_id in names.items():
+            self._by_normalized.setdefault(normalize_name(name), []).append((name, player_id))
+        self._by_length: dict[int, list[str]] = {}
+        for normalized in self._by_normalized:
+            self._by_length.setdefault(len(normalized), []).append(normalized)
+
+    def __len__(self):
+        return len(self._by_normalized)
+
+    def _candidates(self, normalized: str, max_distance: int):
+        """(distance, normalized name) for every indexed name within `max_distance`, closest first."""
+        found = []
+        for length in range(len(normalized) - max_distance, len(normalized) + max_distance + 1):
+            for candidate in self._by_length.get(length, ()):
+                distance = bounded_edit_distance(normalized, candidate, max_distance)
+                if distance is not None:
+                    found.append((distance, candidate))
+        return sorted(found)
+
+    def resolve(self, name: str, max_distance: int = MAX_EDIT_DISTANCE) -> NameMatch | None:
+        """
+        Best match for `name`, or None if nothing is close enough or the closest match is a tie.
+        A candidate with a different first name must be within MAX_FIRST_NAME_EDIT_DISTANCE.
+        """
+        normalized = normalize_name(name)
+        entries = self._by_normalized.get(normalized)
+        if entries is not None:
+            return NameMatch(*entries[0], 0) if len(entries) == 1 else None
+
+        first_name = normalized.split(" ", 1)[0]
+        candidates = [
+            (distance, candidate) for distance, candidate in self._candidates(normalized, max_distance)
+            if distance <= MAX_FIRST_NAME_EDIT_DISTANCE or candidate.split(" ", 1)[0] == first_name
+        ]
+        if not candidates:
+            return None
+        best_distance, best = candidates[0]
+        tied = len(candidates) > 1 and candidates[1][0] == best_distance
+        if tied or len(self._by_normalized[best]) > 1:
+            return None
+        return NameMatch(*self._by_normalized[best][0], best_distance)
+
+    def suggest(self, name: str, limit: int = 5, max_distance: int = SUGGESTION_DISTANCE) -> list[str]:
+        """Closest indexed spellings for a name that didn't resolve."""
+        suggestions = []
+        for _, candidate in self._candidates(normalize_name(name), max_distance):
+            suggestions.extend(original for original, _ in self._by_normalized[candidate])
+        return suggestions[:limit]
@@ -0,0 +1,60 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from alphabetter.nba_backend.common.metrics import metrics
+
+
+class ResponseCache:
+    """
+    Thread-safe in-process LRU of rendered responses: key -> (body, etag).
+    Keys include the dataset version, so a refresh makes old entries unreachable and
+    they age out of the LRU on their own.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> tuple[bytes, str] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.inc("cache_lookups_total", cache="response", result="miss" if entry is None else "hit")
+        return entry
+
+    def put(self, key, body: bytes) -> tuple[bytes, str]:
+        entry = (body, make_etag(body))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag from the response body, so identical data keeps its ETag across versions."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True if an If-None-Match header value covers `etag` (handles lists, W/ prefixes and *)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
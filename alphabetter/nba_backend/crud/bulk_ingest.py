@@ -0,0 +1,110 @@
+import csv
+import io
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from alphabetter.nba_backend.models import HitRateCache, PlayerGameLog, PlayerStats, TeamInfo
+
+# Natural keys used for ON CONFLICT: re-ingesting the same game is a no-op.
+PLAYER_GAME_LOG_KEY = ("player_id", "game_date")
+TEAM_INFO_KEY = ("team_id", "game_id")
+
+
+def rows_to_columns(rows: list[dict]) -> dict[str, list]:
+    """Convert a list of row dicts into {column: [values]}."""
+    if not rows:
+        return {}
+    return {col: [row[col] for row in rows] for col in rows[0]}
+
+
+def _columns_to_rows(columns: dict[str, list]) -> list[dict]:
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[name] for name in names))]
+
+
+def dialect_insert(db: Session, table):
+    """INSERT construct for the session's backend, so ON CONFLICT clauses are available."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def _copy_csv(columns: dict[str, list]) -> io.StringIO:
+    """Columnar data as a CSV buffer for COPY; None is written as \\N."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for values in zip(*columns.values()):
+        writer.writerow(["\\N" if value is None else value for value in values])
+    buf.seek(0)
+    return buf
+
+
+def _copy_ingest(db: Session, table, columns: dict[str, list], conflict_columns) -> int:
+    """
+    PostgreSQL path: COPY into a temp staging table, then INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+    Runs on the session's own connection, so it is part of the caller's transaction.
+    """
+    col_list = ", ".join(columns)
+    staging = f"_ingest_{table.name}"
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE {staging} AS SELECT {col_list} FROM {table.name} WITH NO DATA")
+        cursor.copy_expert(
+            f"COPY {staging} ({col_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            _copy_csv(columns),
+        )
+        cursor.execute(
+            f"INSERT INTO {table.name} ({col_list}) SELECT {col_list} FROM {staging} "
+            f"ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING"
+        )
+        inserted = cursor.rowcount
+        cursor.execute(f"DROP TABLE {staging}")
+    finally:
+        cursor.close()
+    return inserted
+
+
+def bulk_ingest(db: Session, model, columns: dict[str, list], conflict_columns) -> int:
+    """
+    Insert columnar data into `model`'s table, skipping rows whose `conflict_columns` already exist.
+    Uses COPY on PostgreSQL and an executemany INSERT ... ON CONFLICT DO NOTHING elsewhere (SQLite).
+    Does not commit. Returns the number of rows inserted.
+    """
+    if not columns or not next(iter(columns.values())):
+        return 0
+
+    table = model.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        return _copy_ingest(db, table, columns, conflict_columns)
+
+    stmt = dialect_insert(db, table).on_conflict_do_nothing(index_elements=list(conflict_columns))
+    return db.execute(stmt, _columns_to_rows(columns)).rowcount
+
+
+def ingest_player_game_logs(db: Session, columns: dict[str, list]) -> int:
+    """
+    Idempotent bulk insert of PlayerGameLog rows keyed by (player_id, game_date).
+    Cached hit rates of every player that received games are dropped.
+    """
+    inserted = bulk_ingest(db, PlayerGameLog, columns, PLAYER_GAME_LOG_KEY)
+    if inserted:
+        db.query(HitRateCache).filter(
+            HitRateCache.player_id.in_(set(columns["player_id"]))
+        ).delete(synchronize_session=False)
+    return inserted
+
+
+def ingest_team_game_logs(db: Session, columns: dict[str, list]) -> int:
+    """Idempotent bulk insert of TeamInfo rows keyed by (team_id, game_id)."""
+    return bulk_ingest(db, TeamInfo, columns, TEAM_INFO_KEY)
+
+
+def upsert_player_stats(db: Session, rows: list[dict]):
+    """Insert or refresh PlayerStats summary rows (keyed by player_id) in one statement."""
+    if not rows:
+        return
+    stmt = dialect_insert(db, PlayerStats.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["player_id"],
+        set_={col: stmt.excluded[col] for col in rows[0] if col != "player_id"},
+    )
+    db.execute(stmt, rows)
@@ -0,0 +1,21 @@
+from sqlalchemy.orm import Session
+from alphabetter.nba_backend.models import DatasetVersion
+from alphabetter.nba_backend.crud.bulk_ingest import dialect_insert
+
+DATASET_VERSION_ID = 1
+
+
+def get_dataset_version(db: Session) -> int:
+    """Current dataset version (0 before the first refresh)."""
+    row = db.get(DatasetVersion, DATASET_VERSION_ID)
+    return row.version if row else 0
+
+
+def bump_dataset_version(db: Session) -> int:
+    """Increment the dataset version in one statement. Does not commit. Returns the new version."""
+    stmt = dialect_insert(db, DatasetVersion.__table__).values(id=DATASET_VERSION_ID, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={"version": DatasetVersion.__table__.c.version + 1},
+    ).returning(DatasetVersion.__table__.c.version)
+    return db.execute(stmt).scalar_one()
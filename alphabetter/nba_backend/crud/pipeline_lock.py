@@ -0,0 +1,81 @@
+"""
+Database-wide lock around a refresh run. JobManager only keeps one job per process; this
+keeps two runs from any processes (API workers, the CLI, cron) from wiping and refilling the
+same tables under each other.
+
+PostgreSQL: pg_try_advisory_xact_lock on a session of its own whose transaction stays open
+for the run. The lock goes when that transaction ends, or when its connection drops.
+Elsewhere (SQLite): the pipeline_lock row, claimed with a conditional UPDATE. A claim older
+than PIPELINE_LOCK_STALE_AFTER belongs to a run that died without releasing it and is taken over.
+"""
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from alphabetter.nba_backend.common.game_day import utc_now
+from alphabetter.nba_backend.models import PipelineLock
+from alphabetter.nba_backend.services.jobs import JobConflict
+
+PIPELINE_LOCK_ID = 1
+PIPELINE_ADVISORY_KEY = 4_216_001  # any constant; every process must use the same one
+PIPELINE_LOCK_STALE_AFTER = timedelta(hours=2)
+
+
+class PipelineLocked(JobConflict):
+    """Another refresh run holds the database-wide lock."""
+
+    def __init__(self):
+        super().__init__(None, "Another refresh run holds the database lock")
+
+
+def _advisory_lock(db: Session):
+    if not db.execute(select(func.pg_try_advisory_xact_lock(PIPELINE_ADVISORY_KEY))).scalar():
+        db.rollback()
+        raise PipelineLocked()
+    return db.rollback  # ends the transaction, which releases the lock
+
+
+def _row_lock(db: Session):
+    if db.get(PipelineLock, PIPELINE_LOCK_ID) is None:
+        db.add(PipelineLock(id=PIPELINE_LOCK_ID))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # another run created the row first
+
+    table = PipelineLock.__table__
+    holder = uuid.uuid4().hex
+    now = utc_now()
+    claimed = db.execute(
+        update(table)
+        .where(table.c.id == PIPELINE_LOCK_ID,
+               or_(table.c.holder.is_(None), table.c.acquired_at < now - PIPELINE_LOCK_STALE_AFTER))
+        .values(holder=holder, acquired_at=now)
+    ).rowcount
+    db.commit()
+    if not claimed:
+        raise PipelineLocked()
+
+    def release():
+        db.rollback()
+        db.execute(update(table).where(table.c.id == PIPELINE_LOCK_ID, table.c.holder == holder)
+                   .values(holder=None, acquired_at=None))
+        db.commit()
+    return release
+
+
+@contextmanager
+def pipeline_lock(db: Session):
+    """
+    Hold the lock for the `with` body. `db` must be a session used for nothing else while the
+    lock is held. Raises PipelineLocked (a JobConflict) when another run holds it.
+    """
+    release = _advisory_lock(db) if db.get_bind().dialect.name == "postgresql" else _row_lock(db)
+    try:
+        yield
+    finally:
+        release()
@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from alphabetter.nba_backend.models import PlayerGameLog
 from alphabetter.nba_backend.player_utils import get_player_id
 
@@ -44,3 +45,15 @@ def fetch_player_gamelogs(player_name: str, db: Session):
     ]
 
     return game_logs
+
+
+def fetch_latest_game_dates(db: Session, player_ids) -> dict:
+    """Latest stored game_date per player: {player_id: date}. Players with no logs are absent."""
+    if not player_ids:
+        return {}
+    return dict(
+        db.query(PlayerGameLog.player_id, func.max(PlayerGameLog.game_date))
+        .filter(PlayerGameLog.player_id.in_(list(player_ids)))
+        .group_by(PlayerGameLog.player_id)
+        .all()
+    )
@@ -0,0 +1,199 @@
+import base64
+import json
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+from alphabetter.nba_backend.models import HitRateCache, PlayerGameLog, PlayerStatsCalculated, PrizePicksProp
+from alphabetter.nba_backend.stat_collector.hit_rate_cache import get_hit_rates
+
+# Every column the prop/stat endpoints can project, filter or sort on.
+COLUMNS = {
+    "id": PrizePicksProp.id,
+    "prop_id": PrizePicksProp.id,
+    "player_name": PrizePicksProp.player_name,
+    "player_id": PrizePicksProp.player_id,
+    "stat": PrizePicksProp.stat,
+    "target": PrizePicksProp.target,
+    "over_under": PrizePicksProp.over_under,
+    "odds_type": PrizePicksProp.odds_type,
+    "team": PrizePicksProp.team,
+    "opponent": PrizePicksProp.opponent,
+    "l5_hit_rate": HitRateCache.l5_hit_rate,
+    "l10_hit_rate": HitRateCache.l10_hit_rate,
+    "l20_hit_rate": HitRateCache.l20_hit_rate,
+    "last_percent_total": HitRateCache.last_percent_total,
+    "last_percent_rate": HitRateCache.last_percent_rate,
+    "dist_probability": HitRateCache.dist_probability,
+    "opp_factor": PlayerStatsCalculated.opp_factor,
+    "opp_adj_expected": PlayerStatsCalculated.opp_adj_expected,
+    "opp_adj_l10_hit_rate": PlayerStatsCalculated.opp_adj_l10_hit_rate,
+    "role_games": PlayerStatsCalculated.role_games,
+    "projected_minutes": PlayerStatsCalculated.projected_minutes,
+    "per_minute_l10_hit_rate": PlayerStatsCalculated.per_minute_l10_hit_rate,
+    "role_last_percent_total": PlayerStatsCalculated.role_last_percent_total,
+    "role_last_percent_rate": PlayerStatsCalculated.role_last_percent_rate,
+}
+STAT_COLUMNS = {"l5_hit_rate", "l10_hit_rate", "l20_hit_rate", "last_percent_total", "last_percent_rate",
+                "dist_probability"}
+# Opponent adjustments depend on the prop's opponent and role windows on the player's role
+# tracker, so they are read from the prop's player_stats_calculated row (written by the
+# refresh pipeline) rather than the hit-rate cache.
+ADJUSTED_COLUMNS = {"opp_factor", "opp_adj_expected", "opp_adj_l10_hit_rate", "role_games", "projected_minutes",
+                    "per_minute_l10_hit_rate", "role_last_percent_total", "role_last_percent_rate"}
+
+PROP_FIELDS = ("id", "player_name", "player_id", "stat", "target", "over_under", "odds_type")
+CALCULATED_FIELDS = ("player_id", "player_name", "prop_id", "l5_hit_rate", "l10_hit_rate", "l20_hit_rate",
+                     "last_percent_total", "last_percent_rate")
+COMBINED_FIELDS = PROP_FIELDS + ("l5_hit_rate", "l10_hit_rate", "l20_hit_rate", "last_percent_total", "last_percent_rate")
+
+SORT_KEYS = ("id", "player_name", "stat", "target", "l5_hit_rate", "l10_hit_rate", "l20_hit_rate", "last_percent_rate",
+             "dist_probability", "opp_adj_l10_hit_rate", "per_minute_l10_hit_rate", "role_last_percent_rate")
+MAX_PAGE_SIZE = 1000
+
+
+class PropQueryError(ValueError):
+    """Raised for unknown fields or a malformed cursor."""
+
+
+def encode_cursor(sort_value, prop_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, prop_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        sort_value, prop_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return sort_value, int(prop_id)
+    except (ValueError, TypeError) as e:
+        raise PropQueryError(f"Invalid cursor: {cursor}") from e
+
+
+def parse_fields(fields: str | None, default: tuple) -> tuple:
+    """Comma separated projection, e.g. "id,player_name,l10_hit_rate". None means `default`."""
+    if not fields:
+        return default
+    requested = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = [f for f in requested if f not in COLUMNS]
+    if unknown:
+        raise PropQueryError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(COLUMNS)}")
+    return requested
+
+
+def _sort_expression(sort: str):
+    column = COLUMNS[sort]
+    # Rates can be NULL (player without logs); sort those as -1 so keyset comparisons stay total.
+    if sort in STAT_COLUMNS or sort in ADJUSTED_COLUMNS:
+        return func.coalesce(column, -1.0)
+    return column
+
+
+def _latest_game_dates():
+    """Latest game_date per player with a prop on the board."""
+    return (
+        select(PlayerGameLog.player_id, func.max(PlayerGameLog.game_date).label("last_game_date"))
+        .where(PlayerGameLog.player_id.in_(select(PrizePicksProp.player_id)))
+        .group_by(PlayerGameLog.player_id)
+        .subquery()
+    )
+
+
+def _with_stats(stmt, latest):
+    """LEFT JOIN props to their cached hit rates (same key get_hit_rates uses)."""
+    return stmt.outerjoin(latest, latest.c.player_id == PrizePicksProp.player_id).outerjoin(
+        HitRateCache,
+        and_(
+            HitRateCache.player_id == PrizePicksProp.player_id,
+            HitRateCache.stat == PrizePicksProp.stat,
+            HitRateCache.target == PrizePicksProp.target,
+            HitRateCache.over_under == PrizePicksProp.over_under,
+            HitRateCache.last_game_date == latest.c.last_game_date,
+        ),
+    )
+
+
+def warm_hit_rate_cache(db: Session):
+    """Compute cache entries for props that don't have one yet (one anti-join query when warm)."""
+    latest = _latest_game_dates()
+    stmt = _with_stats(
+        select(
+            PrizePicksProp.id, PrizePicksProp.player_id, PrizePicksProp.player_name,
+            PrizePicksProp.stat, PrizePicksProp.target, PrizePicksProp.over_under,
+        ).select_from(PrizePicksProp),
+        latest,
+    ).where(HitRateCache.id.is_(None), latest.c.last_game_date.is_not(None))
+    missing = db.execute(stmt).all()
+    if missing:
+        get_hit_rates(db, missing)
+
+
+def query_props(
+    db: Session,
+    fields: tuple,
+    player: str | None = None,
+    stat: str | None = None,
+    odds_type: str | None = None,
+    min_l10: float | None = None,
+    min_last_percent: float | None = None,
+    sort: str = "id",
+    order: str = "asc",
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """
+    Props (optionally joined with cached hit rates) in one query, filtered, sorted and
+    projected to `fields`. Keyset pagination on (sort value, id): pass the returned
+    `next_cursor` back as `cursor` for the next page. Returns (rows, next_cursor).
+    """
+    needs_stats = (
+        any(f in STAT_COLUMNS for f in fields)
+        or sort in STAT_COLUMNS
+        or min_l10 is not None
+        or min_last_percent is not None
+    )
+    if needs_stats:
+        warm_hit_rate_cache(db)
+
+    sort_expr = _sort_expression(sort)
+    stmt = select(
+        *(COLUMNS[f].label(f) for f in fields),
+        sort_expr.label("_sort"),
+        PrizePicksProp.id.label("_id"),
+    ).select_from(PrizePicksProp)
+    if needs_stats:
+        stmt = _with_stats(stmt, _latest_game_dates())
+    if any(f in ADJUSTED_COLUMNS for f in fields) or sort in ADJUSTED_COLUMNS:
+        stmt = stmt.outerjoin(PlayerStatsCalculated, PlayerStatsCalculated.prop_id == PrizePicksProp.id)
+
+    if player:
+        stmt = stmt.where(PrizePicksProp.player_name.ilike(f"%{player}%"))
+    if stat:
+        stmt = stmt.where(PrizePicksProp.stat == stat)
+    if odds_type:
+        stmt = stmt.where(PrizePicksProp.odds_type == odds_type)
+    if min_l10 is not None:
+        stmt = stmt.where(HitRateCache.l10_hit_rate >= min_l10)
+    if min_last_percent is not None:
+        stmt = stmt.where(HitRateCache.last_percent_rate >= min_last_percent)
+
+    descending = order == "desc"
+    if cursor:
+        after_value, after_id = decode_cursor(cursor)
+        if descending:
+            stmt = stmt.where(or_(sort_expr < after_value, and_(sort_expr == after_value, PrizePicksProp.id < after_id)))
+        else:
+            stmt = stmt.where(or_(sort_expr > after_value, and_(sort_expr == after_value, PrizePicksProp.id > after_id)))
+
+    if descending:
+        stmt = stmt.order_by(sort_expr.desc(), PrizePicksProp.id.desc())
+    else:
+        stmt = stmt.order_by(sort_expr.asc(), PrizePicksProp.id.asc())
+    page_size = max(1, min(limit, MAX_PAGE_SIZE)) if limit is not None else None
+    if page_size is not None:
+        stmt = stmt.limit(page_size + 1)  # one extra row tells us if there's a next page
+
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    if page_size is not None and len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(last["_sort"], last["_id"])
+
+    return [{f: row._mapping[f] for f in fields} for row in rows], next_cursor
@@ -0,0 +1,174 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import and_, bindparam, delete, func, insert, literal, select, text, update
+from sqlalchemy.orm import Session
+
+from alphabetter.nba_backend.common.game_day import GAME_DAY_ROLLOVER_HOUR_UTC, game_day, utc_now
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.common.metrics import metrics
+from alphabetter.nba_backend.models import OddsType, PlayerStatsCalculated, PrizePicksProp, PropSnapshot
+
+log = get_logger(__name__)
+
+# Keep every capture for this many game days; older days are folded into one row per line.
+INTRADAY_RETENTION_DAYS = 7
+
+SNAPSHOT_KEY = ("board_ts", "player_id", "stat", "odds_type", "over_under", "target")
+SNAPSHOT_STAT_COLUMNS = ("l5_hit_rate", "l10_hit_rate", "l20_hit_rate", "last_percent_total", "last_percent_rate")
+HISTORY_FIELDS = ("board_ts", "granularity", "odds_type", "over_under", "target") + SNAPSHOT_STAT_COLUMNS
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time(GAME_DAY_ROLLOVER_HOUR_UTC))
+    return start, start + timedelta(days=1)
+
+
+def _month_start(ts: datetime) -> datetime:
+    return datetime(ts.year, ts.month, 1)
+
+
+def _next_month(ts: datetime) -> datetime:
+    return datetime(ts.year + ts.month // 12, ts.month % 12 + 1, 1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f"prop_snapshots_{month:%Y_%m}"
+
+
+def ensure_snapshot_partition(db: Session, board_ts: datetime):
+    """PostgreSQL: create the month partition `board_ts` falls in. Other backends don't partition."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    month = _month_start(board_ts)
+    db.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {_partition_name(month)} PARTITION OF prop_snapshots "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+    ))
+
+
+def snapshot_board(db: Session, board_ts: datetime) -> int:
+    """
+    Append the current board (prize_picks_props + player_stats_calculated) as one snapshot
+    with a single INSERT ... SELECT. Returns the number of rows written.
+    """
+    ensure_snapshot_partition(db, board_ts)
+    key = (PrizePicksProp.player_id, PrizePicksProp.stat, PrizePicksProp.odds_type,
+           PrizePicksProp.over_under, PrizePicksProp.target)
+    board = (
+        select(
+            literal(board_ts, PropSnapshot.board_ts.type).label("board_ts"),
+            *key,
+            func.max(PrizePicksProp.player_name),
+            *(func.max(getattr(PlayerStatsCalculated, col)) for col in SNAPSHOT_STAT_COLUMNS),
+        )
+        .outerjoin(PlayerStatsCalculated, PlayerStatsCalculated.prop_id == PrizePicksProp.id)
+        .where(PrizePicksProp.player_id.is_not(None))
+        .group_by(*key)  # a line posted twice is one row
+    )
+    columns = list(SNAPSHOT_KEY) + ["player_name", *SNAPSHOT_STAT_COLUMNS]
+    written = db.execute(insert(PropSnapshot).from_select(columns, board)).rowcount
+    db.commit()
+    metrics.inc("db_rows_written_total", written, table="prop_snapshots", op="insert")
+    log.info(f"📸 Snapshot {board_ts:%Y-%m-%d %H:%M:%S}: {written} lines")
+    return written
+
+
+def latest_snapshot_ts(db: Session) -> datetime | None:
+    return db.query(func.max(PropSnapshot.board_ts)).scalar()
+
+
+def latest_snapshot(db: Session) -> list[dict]:
+    """Every line of the most recent snapshot (one primary-key range on board_ts)."""
+    board_ts = latest_snapshot_ts(db)
+    if board_ts is None:
+        return []
+    rows = db.query(PropSnapshot).filter(PropSnapshot.board_ts == board_ts).order_by(
+        PropSnapshot.player_id, PropSnapshot.stat, PropSnapshot.odds_type, PropSnapshot.over_under, PropSnapshot.target
+    )
+    fields = SNAPSHOT_KEY + ("player_name", "granularity") + SNAPSHOT_STAT_COLUMNS
+    return [{field: getattr(row, field) for field in fields} for row in rows]
+
+
+def line_history(db: Session, player_id: int, stat: str, odds_type: str | None = None,
+                 since: datetime | None = None) -> list[dict]:
+    """Every snapshot of one player's `stat` lines, oldest first (served by ix_prop_snapshots_line_history)."""
+    query = db.query(*(getattr(PropSnapshot, field) for field in HISTORY_FIELDS)).filter(
+        PropSnapshot.player_id == player_id, PropSnapshot.stat == stat,
+    )
+    if since is not None:
+        query = query.filter(PropSnapshot.board_ts >= since)
+    if odds_type is not None:
+        query = query.filter(PropSnapshot.odds_type == odds_type)
+    query = query.order_by(PropSnapshot.board_ts, PropSnapshot.odds_type, PropSnapshot.target)
+    return [dict(zip(HISTORY_FIELDS, row)) for row in query]
+
+
+def _line_identity(row) -> tuple:
+    """Same identity as the pipeline's `_prop_key`: a moved standard line is still the same line."""
+    if row.odds_type == OddsType.STANDARD.value:
+        return row.player_id, row.stat, row.odds_type, row.over_under
+    return row.player_id, row.stat, row.odds_type, row.over_under, row.target
+
+
+def _compact_day(db: Session, day: date) -> int:
+    """Keep each line's last capture of `day` (its closing number) as a daily row; drop the rest."""
+    start, end = _day_bounds(day)
+    in_day = and_(PropSnapshot.board_ts >= start, PropSnapshot.board_ts < end)
+    rows = db.query(*(getattr(PropSnapshot, col) for col in SNAPSHOT_KEY)).filter(in_day).all()
+
+    closing = {}
+    for row in rows:
+        identity = _line_identity(row)
+        if identity not in closing or row.board_ts > closing[identity].board_ts:
+            closing[identity] = row
+    keep = set(closing.values())
+    dropped = [{f"k_{col}": getattr(row, col) for col in SNAPSHOT_KEY} for row in rows if row not in keep]
+
+    if dropped:
+        table = PropSnapshot.__table__
+        db.connection().execute(
+            delete(table).where(and_(*(table.c[col] == bindparam(f"k_{col}") for col in SNAPSHOT_KEY))),
+            dropped,
+        )
+    db.execute(update(PropSnapshot).where(in_day).values(granularity="daily"))
+    return len(dropped)
+
+
+def _drop_expired(db: Session, cutoff: datetime) -> int:
+    """Delete snapshots older than `cutoff`; on PostgreSQL whole expired months are dropped as partitions."""
+    if db.get_bind().dialect.name == "postgresql":
+        oldest = db.query(func.min(PropSnapshot.board_ts)).scalar()
+        month = _month_start(oldest) if oldest else None
+        while month is not None and _next_month(month) <= cutoff:
+            db.execute(text(f"DROP TABLE IF EXISTS {_partition_name(month)}"))
+            month = _next_month(month)
+    return db.execute(delete(PropSnapshot).where(PropSnapshot.board_ts < cutoff)).rowcount
+
+
+def compact_snapshots(db: Session, now: datetime | None = None,
+                      intraday_days: int = INTRADAY_RETENTION_DAYS, retention_days: int | None = None) -> dict:
+    """
+    Fold intraday snapshots older than `intraday_days` game days into one daily row per line,
+    and with `retention_days`, delete snapshots older than that. One transaction per game day.
+    """
+    now = now or utc_now()
+    cutoff, _ = _day_bounds(game_day(now) - timedelta(days=intraday_days))
+
+    pending = db.query(PropSnapshot.board_ts).filter(
+        PropSnapshot.granularity == "intraday", PropSnapshot.board_ts < cutoff,
+    ).distinct().all()
+    days = sorted({game_day(board_ts) for (board_ts,) in pending})
+
+    dropped = 0
+    for day in days:
+        dropped += _compact_day(db, day)
+        db.commit()
+
+    expired = 0
+    if retention_days is not None:
+        expired = _drop_expired(db, now - timedelta(days=retention_days))
+        db.commit()
+
+    if days or expired:
+        log.info(f"🗜️ Compacted {len(days)} game days ({dropped} intraday rows folded), {expired} expired rows deleted")
+    return {"days": len(days), "folded": dropped, "expired": expired}
@@ -1,36 +1,59 @@
+import argparse
+import json
+import os
 import time
+from contextlib import contextmanager
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, update
 from alphabetter.nba_backend.database import DATABASE_URL, Base
-from alphabetter.nba_backend.models import PrizePicksProp, PlayerGameLog, PlayerStatsCalculated, PlayerStats
-from alphabetter.nba_backend.fetch_and_store_prop_data import (
-    load_bets_json,
-    create_props,
-    generate_prop_files,
+from alphabetter.nba_backend.models import (
+    PrizePicksProp, PlayerGameLog, PlayerStatsCalculated, PlayerStats, OddsType, HitRateCache, PlayerRoleState,
 )
-from alphabetter.nba_backend.fetch_and_store_player_stats import store_player_stats  # store fn still used; fetch_player_stats (NBA API) is not
-from alphabetter.nba_backend.fetch_player_stats_espn import build_espn_player_map, fetch_player_stats_espn
-from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import (
-    store_calculated_stats,
-    calculate_hit_rates,
-    calculate_and_store_stats_bulk
+from alphabetter.nba_backend.get_props.prizepicks_stream import (
+    archive_file,
+    archive_pages,
+    fetch_board_pages,
+    iter_props,
 )
+from alphabetter.nba_backend.fetch_and_store_player_stats import player_stats_row, game_log_row  # fetch_player_stats (NBA API) is not used
+from alphabetter.nba_backend.crud.bulk_ingest import ingest_player_game_logs, rows_to_columns, upsert_player_stats
+from alphabetter.nba_backend.crud.player_gamelogs import fetch_latest_game_dates
+from alphabetter.nba_backend.crud.dataset_version import bump_dataset_version
+from alphabetter.nba_backend.crud.pipeline_lock import pipeline_lock
+from alphabetter.nba_backend.crud.snapshots import compact_snapshots, snapshot_board
+from alphabetter.nba_backend.common.game_day import utc_now
+from alphabetter.nba_backend.common.name_index import NameIndex
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.common.metrics import metrics, run_summary
+from alphabetter.nba_backend.fetch_player_stats_espn import (
+    build_espn_player_map,
+    fetch_all_player_stats_espn,
+    make_espn_fetcher,
+)
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import store_stats_bulk
+from alphabetter.nba_backend.stat_collector.hit_rate_cache import get_hit_rates
+from alphabetter.nba_backend.stat_collector.game_log_index import load_game_log_store
+from alphabetter.nba_backend.stat_collector.matchup_adjust import add_matchup_adjustments
+from alphabetter.nba_backend.stat_collector.role_tracker import add_role_windows
 from alphabetter.nba_backend.database import get_db
 
+log = get_logger(__name__)
 
 # async_process_props.py
 
 def delete_all_rows(session: Session):
-    """Delete all rows from all tables."""
-    print("🚨 Deleting all rows from all tables...")
+    """
+    Delete all rows from all tables (prop_snapshots history is kept). Does not commit: a full
+    refresh commits the wipe together with the new logs and props.
+    """
+    log.info("🚨 Deleting all rows from all tables...")
     start_time = time.time()
-    session.query(PlayerStatsCalculated).delete()
-    session.query(PlayerGameLog).delete()
-    session.query(PrizePicksProp).delete()
-    session.query(PlayerStats).delete()
-    session.commit()
+    for model in (PlayerStatsCalculated, HitRateCache, PlayerRoleState, PlayerGameLog, PrizePicksProp, PlayerStats):
+        deleted = session.query(model).delete()
+        metrics.inc("db_rows_written_total", deleted, table=model.__tablename__, op="delete")
+    bump_dataset_version(session)  # cached API responses must not outlive the rows
     elapsed_time = time.time() - start_time
-    print(f"✅ All rows deleted in {elapsed_time:.2f} seconds.")
+    log.info(f"✅ All rows deleted in {elapsed_time:.2f} seconds.")
 
 # def fetch_and_calculate_and_store():
 #     total_start_time = time.time()  # Start timing the entire process
@@ -109,72 +132,385 @@ def delete_all_rows(session: Session):
 #     print(f"✅ Total players fetched: {len(fetched_players)}")
 #     print(f"=========================\n")
 
-def fetch_and_calculate_and_store():
-
-    total_start_time = time.time()
-
-    delete_all_rows(session=next(get_db()))
-    generate_prop_files()
-
-    bet_data = load_bets_json()
-    props = create_props(bet_data)
-
-    print("Building ESPN player ID map...")
-    espn_player_map = build_espn_player_map()
-
-    db: Session = next(get_db())
-    fetched_players = set()
-
-    for index, prop in enumerate(props, start=1):
-        if prop.stat in ("Fantasy Score", "Dunks"):
-            print(f"Skipping {prop.stat} for {prop.player_name}")
+UNSUPPORTED_STATS = ("Dunks",)  # not in ESPN box scores
+
+# Stages that can be run on their own, in pipeline order. The ingest stages hand their results
+# to each other in memory, so they run together; "calculate" without "ingest" recalculates
+# every stored prop from the stored game logs.
+STAGE_GROUPS = {
+    "ingest": ("fetch_props", "resolve_players", "fetch_logs", "store_logs", "store_props"),
+    "calculate": ("calculate", "store_stats"),
+    "snapshot": ("snapshot",),
+}
+
+
+@contextmanager
+def _stage(name: str, timings: dict, job=None):
+    """
+    Time one pipeline stage: elapsed seconds go to `timings` and the pipeline_stage_seconds metric.
+    With a `job` (services.jobs.Job), the stage is reported to it and a cancel request stops
+    the run before the stage starts.
+    """
+    if job is not None:
+        job.start_stage(name)
+    log.info(f"▶️ Stage: {name}")
+    start_time = time.time()
+    try:
+        with metrics.timer("pipeline_stage_seconds", stage=name):
+            yield
+    finally:
+        timings[name] = time.time() - start_time
+        log.info(f"✅ Stage {name} done in {timings[name]:.2f}s")
+    if job is not None:
+        job.finish_stage(name, timings[name])
+
+
+def _progress(job, done: int, total: int | None = None):
+    if job is not None:
+        job.progress(done, total)
+
+
+def fetch_props_stage(archive_dir: str | None = None) -> list:
+    """
+    Stream every page of the PrizePicks board into supported Prop objects (no JSON file
+    round-trip). With `archive_dir`, the raw pages are also saved as .jsonl.gz.
+    """
+    pages = fetch_board_pages()
+    if archive_dir:
+        pages = archive_pages(pages, archive_file(archive_dir))
+    supported, skipped = [], 0
+    for prop in iter_props(pages):
+        if prop.stat in UNSUPPORTED_STATS:
+            skipped += 1
+        else:
+            supported.append(prop)
+    log.info(f"Loaded {len(supported) + skipped} props, skipping {skipped} unsupported ({', '.join(UNSUPPORTED_STATS)})")
+    return supported
+
+
+def resolve_players_stage(props: list, fetcher) -> dict[str, str]:
+    """Map every prop's player name to an ESPN athlete id. Returns {player_name: espn_id}."""
+    name_index = NameIndex(build_espn_player_map(fetcher))
+    resolved = {}
+    missing = set()
+    for player_name in {prop.player_name for prop in props}:
+        match = name_index.resolve(player_name)
+        if match:
+            resolved[player_name] = match.player_id
+            if match.distance:
+                log.warning(f"⚠️ Resolved '{player_name}' to ESPN '{match.name}' (edit distance {match.distance})")
+            elif match.name != player_name:
+                log.debug(f"Resolved '{player_name}' to ESPN '{match.name}'")
+        else:
+            missing.add(player_name)
+    if missing:
+        log.warning(f"ESPN ID not found for {len(missing)} players, skipping: {', '.join(sorted(missing))}")
+    return resolved
+
+
+def fetch_logs_stage(players: dict[str, str], fetcher, progress=None) -> dict[int, tuple]:
+    """
+    Fetch every player's gamelog in parallel. Returns {player_id: (name, team, team_id, game_logs)}.
+    `progress(done, total)` is called as players complete.
+    """
+    results = fetch_all_player_stats_espn(players, fetcher, progress)
+    player_stats = {}
+    for player_name, result in results.items():
+        if isinstance(result, Exception):
+            log.warning(f"Failed to fetch stats for {player_name}: {result}")
             continue
+        player_stats[int(players[player_name])] = result
+    return player_stats
+
+
+def store_logs_stage(db: Session, player_stats: dict[int, tuple], high_water_marks: dict | None = None) -> set[int]:
+    """
+    Bulk upsert PlayerStats summaries and ingest PlayerGameLog rows (does not commit).
+    With `high_water_marks`, only games newer than the player's latest stored game are inserted.
+    Returns the ids of players that received new games.
+    """
+    high_water_marks = high_water_marks or {}
+    summary_rows = []
+    log_rows = []
+    updated_players = set()
+    for player_id, (player_name, team, team_id, game_logs) in player_stats.items():
+        summary_rows.append(player_stats_row(player_id, player_name, team, team_id, game_logs))
+        latest = high_water_marks.get(player_id)
+        new_logs = [
+            log for log in game_logs
+            if latest is None or (log["game_date"] is not None and log["game_date"] > latest)
+        ]
+        if new_logs:
+            updated_players.add(player_id)
+        log_rows.extend(game_log_row(log) for log in new_logs)
+
+    upsert_player_stats(db, summary_rows)
+    inserted = ingest_player_game_logs(db, rows_to_columns(log_rows))
+    metrics.inc("db_rows_written_total", len(summary_rows), table="player_stats", op="upsert")
+    metrics.inc("db_rows_written_total", inserted, table="player_game_log", op="insert")
+    log.info(f"Stored {inserted} new game logs for {len(updated_players)} of {len(summary_rows)} players")
+    return updated_players
+
+
+def _board_rows(props: list, player_ids: dict[str, int]) -> list[dict]:
+    """PrizePicksProp column values for every prop whose player resolved to an id."""
+    return [
+        {
+            "player_name": prop.player_name,
+            "player_id": player_ids[prop.player_name],
+            "stat": prop.stat,
+            "target": prop.target,
+            "over_under": prop.over_under,
+            "odds_type": prop.odds_type.value,
+            "team": prop.team,
+            "opponent": prop.opponent,
+        }
+        for prop in props
+        if prop.player_name in player_ids
+    ]
+
+
+def _prop_key(player_name, stat, odds_type, over_under, target) -> tuple:
+    """
+    Identity of a line on the board. A standard line is one per player/stat, so a moved
+    target is an update; goblins/demons can stack several targets, so target is part of the key.
+    """
+    if odds_type == OddsType.STANDARD.value:
+        return player_name, stat, odds_type, over_under
+    return player_name, stat, odds_type, over_under, target
+
+
+PROP_CALC_COLUMNS = (
+    PrizePicksProp.id,
+    PrizePicksProp.player_id,
+    PrizePicksProp.player_name,
+    PrizePicksProp.stat,
+    PrizePicksProp.target,
+    PrizePicksProp.over_under,
+    PrizePicksProp.opponent,
+)
 
-        espn_id = espn_player_map.get(prop.player_name)
-        if not espn_id:
-            print(f"ESPN ID not found for {prop.player_name}, skipping.")
-            continue
 
-        player_id = int(espn_id)
-        player_start_time = time.time()
-
-        if player_id not in fetched_players:
-            try:
-                player_name, team, team_id, game_logs = fetch_player_stats_espn(espn_id, prop.player_name)
-                store_player_stats(db, player_id, player_name, team, team_id, game_logs)
-                fetched_players.add(player_id)
-                print(f"Stored {len(game_logs)} game logs for {player_name}")
-                time.sleep(0.3)
-            except Exception as e:
-                print(f"Failed to fetch/store stats for {prop.player_name}: {e}")
-                continue
-
-        new_prop = PrizePicksProp(
-            player_name=prop.player_name,
-            player_id=player_id,
-            stat=prop.stat,
-            target=prop.target,
-            over_under=prop.over_under,
-            odds_type=prop.odds_type.value,
-        )
-        db.add(new_prop)
-        db.commit()
-
-        calculated_stats = calculate_hit_rates(db, new_prop)
-        if calculated_stats:
-            store_calculated_stats(db, calculated_stats)
+def store_props_stage(db: Session, props: list, player_ids: dict[str, int]) -> list:
+    """
+    Bulk insert props for players that have game logs (does not commit).
+    Returns the inserted rows (id, player_id, player_name, stat, target, over_under, opponent).
+    """
+    rows = _board_rows(props, player_ids)
+    if not rows:
+        return []
+
+    stmt = insert(PrizePicksProp).returning(*PROP_CALC_COLUMNS, sort_by_parameter_order=True)
+    new_props = db.execute(stmt, rows).all()
+    metrics.inc("db_rows_written_total", len(new_props), table="prize_picks_props", op="insert")
+    log.info(f"Stored {len(new_props)} props")
+    return new_props
+
+
+def sync_props_stage(db: Session, props: list, player_ids: dict[str, int], updated_players: set[int]) -> list:
+    """
+    Diff the new board against stored props in one transaction: insert new lines, update
+    moved standard lines, retire lines that left the board (with their calculated stats).
+    Returns the props whose hit rates need recomputing: inserted, updated, and any prop of
+    a player that received new games.
+    """
+    board = {}
+    for row in _board_rows(props, player_ids):
+        board[_prop_key(row["player_name"], row["stat"], row["odds_type"], row["over_under"], row["target"])] = row
+
+    existing = {}
+    retired_ids = []
+    for prop in db.query(PrizePicksProp).all():
+        key = _prop_key(prop.player_name, prop.stat, prop.odds_type, prop.over_under, prop.target)
+        if key in existing or key not in board:
+            retired_ids.append(prop.id)
         else:
-            print(f"No stats calc for {prop.player_name} / {prop.stat}")
-
-        player_elapsed = time.time() - player_start_time
-        print(f"Done: {prop.player_name} {prop.stat} ({player_elapsed:.1f}s) [{index}/{len(props)}]")
-
-    db.close()
-
-    total_elapsed = time.time() - total_start_time
-    print(f"Total time: {total_elapsed:.1f}s | Players: {len(fetched_players)} | Props attempted: {len(props)}")
+            existing[key] = prop
+
+    updates = [
+        {"id": existing[key].id, "target": row["target"], "player_id": row["player_id"]}
+        for key, row in board.items()
+        if key in existing and (existing[key].target != row["target"] or existing[key].player_id != row["player_id"])
+    ]
+    inserts = [row for key, row in board.items() if key not in existing]
+
+    if retired_ids:
+        db.query(PlayerStatsCalculated).filter(PlayerStatsCalculated.prop_id.in_(retired_ids)).delete(synchronize_session=False)
+        db.query(PrizePicksProp).filter(PrizePicksProp.id.in_(retired_ids)).delete(synchronize_session=False)
+    if updates:
+        db.execute(update(PrizePicksProp), updates)
+    inserted_ids = []
+    if inserts:
+        inserted_ids = db.scalars(insert(PrizePicksProp).returning(PrizePicksProp.id), inserts).all()
+
+    touched_ids = set(inserted_ids) | {row["id"] for row in updates}
+    touched_ids |= {prop.id for prop in existing.values() if prop.player_id in updated_players}
+    db.commit()
+    for op, count in (("insert", len(inserts)), ("update", len(updates)), ("delete", len(retired_ids))):
+        metrics.inc("db_rows_written_total", count, table="prize_picks_props", op=op)
+    log.info(f"Props: {len(inserts)} new, {len(updates)} updated, {len(retired_ids)} retired, "
+          f"{len(touched_ids)} to recalculate")
+
+    if not touched_ids:
+        return []
+    return db.query(*PROP_CALC_COLUMNS).filter(PrizePicksProp.id.in_(touched_ids)).all()
+
+
+def fetch_and_calculate_and_store(incremental: bool = False, archive_dir: str | None = None,
+                                  summary_path: str | None = None, stages=None, job=None):
+    """
+    Staged refresh: fetch props -> resolve players -> fetch logs -> bulk insert logs ->
+    bulk insert props -> cached/vectorized hit rates + opponent adjustments + role windows -> one bulk upsert
+    of PlayerStatsCalculated.
+    Storing logs and props is one transaction (on a full refresh, with the wipe before them),
+    and so is every later DB stage.
+
+    `incremental=True` keeps existing rows: only games newer than each player's latest stored
+    game are inserted, the board is diffed against stored props, and only touched props are
+    recalculated.
+
+    `stages` picks STAGE_GROUPS to run (default: all). Rows are only wiped when "ingest" runs,
+    once every fetch has finished.
+    `job` (services.jobs.Job) receives per-stage progress and can cancel the run between
+    stages or while game logs are fetched; stages that already committed stay committed.
+
+    The run holds the database-wide pipeline lock (crud/pipeline_lock.py) from start to end and
+    raises PipelineLocked while another run, in any process, holds it.
+
+    Every run records a JSON summary (stage timings, HTTP calls per upstream, DB rows written,
+    cache hit ratios) as `metrics.last_run`, also written to `summary_path` when given.
+    """
+    stages = set(STAGE_GROUPS) if stages is None else set(stages)
+    unknown = stages - set(STAGE_GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}. Available: {', '.join(STAGE_GROUPS)}")
+    if job is not None:
+        job.check_cancelled()
+
+    lock_db: Session = next(get_db())
+    try:
+        with pipeline_lock(lock_db):
+            if job is not None:
+                job.claim()
+            return _refresh(incremental, archive_dir, summary_path, stages, job)
+    finally:
+        lock_db.close()
+
+
+def _refresh(incremental: bool, archive_dir: str | None, summary_path: str | None, stages: set, job) -> int:
+    """The body of fetch_and_calculate_and_store, run under the pipeline lock."""
+    # The run's own metrics: API requests served meanwhile don't leak into its summary.
+    with metrics.run_scope() as run_metrics:
+        total_start_time = time.time()
+        timings = {}
+        board_ts = utc_now()
+        props, espn_ids, player_stats, calc_props = [], {}, {}, []
+
+        if "ingest" in stages:
+            with _stage("fetch_props", timings, job):
+                props = fetch_props_stage(archive_dir)
+                _progress(job, len(props), len(props))
+
+            with make_espn_fetcher() as fetcher:
+                with _stage("resolve_players", timings, job):
+                    espn_ids = resolve_players_stage(props, fetcher)
+                    _progress(job, len(espn_ids), len({prop.player_name for prop in props}))
+                with _stage("fetch_logs", timings, job):
+                    player_stats = fetch_logs_stage(espn_ids, fetcher, job.progress if job is not None else None)
+
+        db: Session = next(get_db())
+        try:
+            if "ingest" in stages:
+                high_water_marks = {}
+                if incremental:
+                    high_water_marks = fetch_latest_game_dates(db, {int(espn_id) for espn_id in espn_ids.values()})
+
+                # Logs and props (and, on a full refresh, the wipe before them) are one transaction,
+                # committed after store_props: a failed or cancelled run leaves the old data in place.
+                with _stage("store_logs", timings, job):
+                    if not incremental:
+                        delete_all_rows(db)
+                    updated_players = store_logs_stage(db, player_stats, high_water_marks)
+                    _progress(job, len(player_stats), len(player_stats))
+
+                with _stage("store_props", timings, job):
+                    # Players whose fetch failed keep their props if we already hold their logs.
+                    player_ids = {
+                        name: int(espn_id) for name, espn_id in espn_ids.items()
+                        if int(espn_id) in player_stats or int(espn_id) in high_water_marks
+                    }
+                    if incremental:
+                        calc_props = sync_props_stage(db, props, player_ids, updated_players)
+                    else:
+                        calc_props = store_props_stage(db, props, player_ids)
+                    _progress(job, len(props), len(props))
+                    db.commit()
+
+            if "calculate" in stages:
+                with _stage("calculate", timings, job):
+                    if "ingest" not in stages:
+                        calc_props = db.query(*PROP_CALC_COLUMNS).all()
+                    # One store load serves the hit rates, opponent adjustments and role windows.
+                    store = load_game_log_store(db, {prop.player_id for prop in calc_props})
+                    stats_list = get_hit_rates(db, calc_props, store=store)
+                    add_matchup_adjustments(db, calc_props, stats_list, store=store)
+                    add_role_windows(db, calc_props, stats_list, store=store)
+                    _progress(job, len(calc_props), len(calc_props))
+
+                with _stage("store_stats", timings, job):
+                    store_stats_bulk(db, stats_list)
+                    _progress(job, len(stats_list), len(stats_list))
+
+            if "snapshot" in stages:
+                with _stage("snapshot", timings, job):
+                    snapshot_board(db, board_ts)
+                    compact_snapshots(db, now=board_ts)
+        finally:
+            # Bump even after a failed stage: earlier stages already committed.
+            db.rollback()
+            version = bump_dataset_version(db)
+            db.commit()
+            db.close()
+            log.info(f"Dataset version: {version}")
+
+        total_elapsed = time.time() - total_start_time
+        stage_summary = " | ".join(f"{name}: {elapsed:.1f}s" for name, elapsed in timings.items())
+        log.info(f"Stage timings: {stage_summary}")
+        log.info(f"Total time: {total_elapsed:.1f}s | Players: {len(player_stats)} | Props calculated: {len(calc_props)} | Props attempted: {len(props)}")
+
+    metrics.inc("pipeline_runs_total", mode="incremental" if incremental else "full")
+    metrics.last_run = {
+        "board_ts": board_ts.isoformat(),
+        "incremental": incremental,
+        "stage_groups": [group for group in STAGE_GROUPS if group in stages],
+        "total_seconds": round(total_elapsed, 3),
+        "dataset_version": version,
+        "players": len(player_stats),
+        "props_attempted": len(props),
+        "props_calculated": len(calc_props),
+        **run_summary(run_metrics.snapshot()),
+    }
+    if summary_path:
+        with open(summary_path, "w") as f:
+            json.dump(metrics.last_run, f, indent=2)
+        log.info(f"Run summary written to {summary_path}")
     return len(props)
 
 
 if __name__ == "__main__":
-    fetch_and_calculate_and_store()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Refresh PrizePicks props, game logs and hit rates")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only add new games / changed props instead of wiping every table first")
+    parser.add_argument("--offline", action="store_true",
+                        help="Replay PrizePicks / ESPN responses from the on-disk HTTP cache, no network")
+    parser.add_argument("--archive-dir", default=None,
+                        help="Also save the raw PrizePicks pages as a timestamped .jsonl.gz in this directory")
+    parser.add_argument("--summary", default=None,
+                        help="Write the run summary (stage timings, HTTP calls, rows written, cache hits) as JSON here")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGE_GROUPS), default=None,
+                        help="Only run these stage groups (default: all)")
+    args = parser.parse_args()
+    if args.offline:
+        os.environ["HTTP_CACHE_OFFLINE"] = "1"  # read by common.http_cache.default_http_cache
+    fetch_and_calculate_and_store(incremental=args.incremental, archive_dir=args.archive_dir, summary_path=args.summary,
+                                  stages=args.stages)
@@ -4,20 +4,39 @@ from sqlalchemy.orm import Session
 from nba_api.stats.endpoints import commonallplayers, playergamelog, commonplayerinfo, teamgamelog, teaminfocommon
 from alphabetter.nba_backend.database import get_db
 from alphabetter.nba_backend.models import PlayerStats, PlayerGameLog, TeamInfo
+from alphabetter.nba_backend.crud.bulk_ingest import (
+    ingest_player_game_logs,
+    ingest_team_game_logs,
+    rows_to_columns,
+    upsert_player_stats,
+)
 from nba_api.stats.static import teams
+from alphabetter.nba_backend.common.metrics import metrics
+
+
+def _nba_api_frame(endpoint, **kwargs) -> pd.DataFrame:
+    """First data frame of an nba_api endpoint call, timed as the "nba_api" upstream."""
+    try:
+        with metrics.timer("http_request_seconds", upstream="nba_api"):
+            frame = endpoint(**kwargs).get_data_frames()[0]
+    except Exception:
+        metrics.inc("http_requests_total", upstream="nba_api", result="error")
+        raise
+    metrics.inc("http_requests_total", upstream="nba_api", result="fetched")
+    return frame
 
 # Function to fetch player stats
 def fetch_player_stats(player_id: int) -> list:
     """Fetches all games for the current season for a player using the NBA API."""
-    player_info = commonplayerinfo.CommonPlayerInfo(player_id=player_id).get_data_frames()[0]
+    player_info = _nba_api_frame(commonplayerinfo.CommonPlayerInfo, player_id=player_id)
     player_name = player_info["DISPLAY_FIRST_LAST"].iloc[0]
     team = player_info["TEAM_NAME"].iloc[0]
     team_id = player_info["TEAM_ID"].iloc[0]
     # Fetch the player's game logs
-    gamelog_df = playergamelog.PlayerGameLog(player_id=player_id, season='2025-26').get_data_frames()[0]
+    gamelog_df = _nba_api_frame(playergamelog.PlayerGameLog, player_id=player_id, season='2025-26')
     time.sleep(.2)
     # Fetch the team's schedule
-    team_schedule_df = teamgamelog.TeamGameLog(team_id=team_id, season='2025-26').get_data_frames()[0]
+    team_schedule_df = _nba_api_frame(teamgamelog.TeamGameLog, team_id=team_id, season='2025-26')
     time.sleep(.2)
     # Merge game log with team schedule
     merged_df = pd.merge(
@@ -68,12 +87,10 @@ def fetch_player_stats(player_id: int) -> list:
 
     return player_name, team, team_id, game_logs
 
-# Function to store player stats in the database
-def store_player_stats(db: Session, player_id: int, player_name: str, team: str, team_id: int, game_logs: list):
-    """Stores player stats in the database."""
-    # Store player summary stats
+def player_stats_row(player_id: int, player_name: str, team: str, team_id: int, game_logs: list) -> dict:
+    """Builds the PlayerStats summary row (per-game averages) for one player."""
     games_played = len(game_logs)
-    
+
     if games_played > 0:
         points_per_game = sum(float(log["pts"]) for log in game_logs) / games_played
         assists_per_game = sum(float(log["ast"]) for log in game_logs) / games_played
@@ -83,46 +100,42 @@ def store_player_stats(db: Session, player_id: int, player_name: str, team: str,
         assists_per_game = 0.0
         rebounds_per_game = 0.0
 
-    new_player_stats = PlayerStats(
-        player_id=int(player_id),
-        name=player_name,
-        team=team,
-        team_id=int(team_id),
-        games_played=int(games_played),
-        points_per_game=float(points_per_game),
-        assists_per_game=float(assists_per_game),
-        rebounds_per_game=float(rebounds_per_game),
-    )
-    db.add(new_player_stats)
+    return {
+        "player_id": int(player_id),
+        "name": player_name,
+        "team": team,
+        "team_id": int(team_id),
+        "games_played": int(games_played),
+        "points_per_game": float(points_per_game),
+        "assists_per_game": float(assists_per_game),
+        "rebounds_per_game": float(rebounds_per_game),
+    }
+
+GAME_LOG_FLOAT_COLUMNS = (
+    "min", "pts", "oreb", "dreb", "reb", "ast", "stl", "blk", "tov", "fgm", "fga", "fg_pct",
+    "fg3m", "fg3a", "fg3_pct", "ftm", "fta", "ft_pct",
+)
+
+def game_log_row(log: dict) -> dict:
+    """Normalizes one fetched game log dict into PlayerGameLog column values."""
+    row = {
+        "player_id": int(log["player_id"]),
+        "team_id": int(log["team_id"]),
+        "game_date": log["game_date"],
+        "matchup": log["matchup"],
+    }
+    for col in GAME_LOG_FLOAT_COLUMNS:
+        row[col] = float(log[col])
+    return row
+
+# Function to store player stats in the database
+def store_player_stats(db: Session, player_id: int, player_name: str, team: str, team_id: int, game_logs: list):
+    """Stores player stats in the database. Games that are already stored are skipped."""
+    # Store player summary stats
+    upsert_player_stats(db, [player_stats_row(player_id, player_name, team, team_id, game_logs)])
 
     # Store individual game logs
-    for log in game_logs:
-        new_game_log = PlayerGameLog(
-            player_id=int(log["player_id"]),
-            team_id=int(log["team_id"]),
-            game_date=log["game_date"],
-            matchup=log["matchup"],
-            # wl=log["wl"],
-            min=float(log["min"]),
-            pts=float(log["pts"]),
-            oreb=float(log["oreb"]),
-            dreb=float(log["dreb"]),
-            reb=float(log["reb"]),
-            ast=float(log["ast"]),
-            stl=float(log["stl"]),
-            blk=float(log["blk"]),
-            tov=float(log["tov"]),
-            fgm=float(log["fgm"]),
-            fga=float(log["fga"]),
-            fg_pct=float(log["fg_pct"]),
-            fg3m=float(log["fg3m"]),
-            fg3a=float(log["fg3a"]),
-            fg3_pct=float(log["fg3_pct"]),
-            ftm=float(log["ftm"]),
-            fta=float(log["fta"]),
-            ft_pct=float(log["ft_pct"]),
-        )
-        db.add(new_game_log)
+    ingest_player_game_logs(db, rows_to_columns([game_log_row(log) for log in game_logs]))
 
     db.commit()
 
@@ -134,7 +147,7 @@ def get_active_team_ids():
 
 def fetch_team_gamelog(team_id: int) -> list:
     """Fetches all games for the current season for a team using the NBA API."""
-    team_gamelog_df = teamgamelog.TeamGameLog(team_id=team_id, season='2025-26').get_data_frames()[0]
+    team_gamelog_df = _nba_api_frame(teamgamelog.TeamGameLog, team_id=team_id, season='2025-26')
 
     team_logs = []
     for _, row in team_gamelog_df.iterrows():
@@ -176,45 +189,15 @@ def fetch_team_gamelog(team_id: int) -> list:
     return team_logs
 
 def store_team_gamelog(db: Session, team_id: int, team_logs: list):
-    """Stores team game logs in the database."""
-    for log in team_logs:
-        new_team_info = TeamInfo(
-            team_id=log["team_id"],
-            game_id=log["game_id"],
-            game_date=log["game_date"],
-            matchup=log["matchup"],
-            wl=log["wl"],
-            w=log["w"],
-            l=log["l"],
-            w_pct=log["w_pct"],
-            min=log["min"],
-            fgm=log["fgm"],
-            fga=log["fga"],
-            fg_pct=log["fg_pct"],
-            fg3m=log["fg3m"],
-            fg3a=log["fg3a"],
-            fg3_pct=log["fg3_pct"],
-            ftm=log["ftm"],
-            fta=log["fta"],
-            ft_pct=log["ft_pct"],
-            oreb=log["oreb"],
-            dreb=log["dreb"],
-            reb=log["reb"],
-            ast=log["ast"],
-            stl=log["stl"],
-            blk=log["blk"],
-            tov=log["tov"],
-            pf=log["pf"],
-            pts=log["pts"],
-        )
-        db.add(new_team_info)
+    """Stores team game logs in the database. Games that are already stored are skipped."""
+    ingest_team_game_logs(db, rows_to_columns(team_logs))
     db.commit()
 
 def fetch_and_store_player_stats():
     db: Session = next(get_db())
 
     # Fetch all current players
-    players = commonallplayers.CommonAllPlayers(is_only_current_season=1).get_data_frames()[0]
+    players = _nba_api_frame(commonallplayers.CommonAllPlayers, is_only_current_season=1)
     player_ids = players["PERSON_ID"].tolist()
 
     # for player_id in player_ids[:10]:
@@ -18,9 +18,8 @@ def generate_prop_files():
 def store_prize_picks_props(db: Session, props: list):
     for prop in props:
 
-        #Skip fantasy score for now.  unsupported.
-        if prop.stat == "Fantasy Score" or prop.stat == "Dunks":  # Skip unsupported stats
-            print(f"Skipping prop for {prop.player_name} with stat 'Fantasy Score'")
+        if prop.stat == "Dunks":  # Skip unsupported stats
+            print(f"Skipping prop for {prop.player_name} with stat 'Dunks'")
             continue
         
         from alphabetter.nba_backend.common.nba_api_common import get_player_id as _nba_get_player_id
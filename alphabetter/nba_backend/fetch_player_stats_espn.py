@@ -1,8 +1,12 @@
-import time
-import requests
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from alphabetter.nba_backend.models import PlayerStats, PlayerGameLog
+from alphabetter.nba_backend.common.concurrent_fetch import ConcurrentFetcher
+from alphabetter.nba_backend.common.game_day import game_day
+from alphabetter.nba_backend.common.http_cache import default_http_cache, until_next_game_day
+from alphabetter.nba_backend.common.log import get_logger
+
+log = get_logger(__name__)
 
 ESPN_TEAMS_URL = "https://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams?limit=30"
 ESPN_ROSTER_URL = "https://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams/{team_id}/roster"
@@ -13,23 +17,51 @@ HEADERS = {
     "Accept": "application/json",
 }
 
+# Concurrency / rate limits for the shared ESPN fetcher
+ESPN_MAX_WORKERS = 8
+ESPN_REQUESTS_PER_SECOND = 10.0
+
+# On-disk cache TTLs (see common/http_cache.py): team list and rosters change rarely,
+# gamelogs only change once games are played.
+ESPN_TEAMS_TTL = 7 * 24 * 3600
+ESPN_ROSTER_TTL = 24 * 3600
+ESPN_GAMELOG_TTL = until_next_game_day
+
 
-def build_espn_player_map() -> dict[str, str]:
-    """Fetches all 30 NBA team rosters and returns a name -> ESPN athlete ID map."""
-    resp = requests.get(ESPN_TEAMS_URL, headers=HEADERS, timeout=15)
-    resp.raise_for_status()
-    teams = resp.json()["sports"][0]["leagues"][0]["teams"]
-    team_ids = [t["team"]["id"] for t in teams]
+def make_espn_fetcher() -> ConcurrentFetcher:
+    """One pooled session + rate limiter + on-disk HTTP cache shared by every ESPN request of a run."""
+    return ConcurrentFetcher(
+        max_workers=ESPN_MAX_WORKERS,
+        rate_per_second=ESPN_REQUESTS_PER_SECOND,
+        headers=HEADERS,
+        cache=default_http_cache(),
+    )
+
+
+def build_espn_player_map(fetcher: ConcurrentFetcher | None = None) -> dict[str, str]:
+    """Fetches all 30 NBA team rosters (in parallel) and returns a name -> ESPN athlete ID map."""
+    own_fetcher = fetcher is None
+    fetcher = fetcher or make_espn_fetcher()
+    try:
+        teams = fetcher.get_json(ESPN_TEAMS_URL, ttl=ESPN_TEAMS_TTL)["sports"][0]["leagues"][0]["teams"]
+        team_ids = [t["team"]["id"] for t in teams]
+
+        rosters = fetcher.map_json({
+            team_id: ESPN_ROSTER_URL.format(team_id=team_id) for team_id in team_ids
+        }, ttl=ESPN_ROSTER_TTL)
+    finally:
+        if own_fetcher:
+            fetcher.close()
 
     player_map = {}
     for team_id in team_ids:
-        roster_resp = requests.get(ESPN_ROSTER_URL.format(team_id=team_id), headers=HEADERS, timeout=15)
-        roster_resp.raise_for_status()
-        for athlete in roster_resp.json().get("athletes", []):
+        roster = rosters[team_id]
+        if isinstance(roster, Exception):
+            raise roster
+        for athlete in roster.get("athletes", []):
             player_map[athlete["fullName"]] = athlete["id"]
-        time.sleep(0.2)
 
-    print(f"ESPN player map built: {len(player_map)} players across {len(team_ids)} teams")
+    log.info(f"ESPN player map built: {len(player_map)} players across {len(team_ids)} teams")
     return player_map
 
 
@@ -49,16 +81,42 @@ def _safe_float(val, default: float = 0.0) -> float:
         return default
 
 
-def fetch_player_stats_espn(espn_id: str, player_name: str) -> tuple:
+def fetch_player_stats_espn(espn_id: str, player_name: str, fetcher: ConcurrentFetcher | None = None) -> tuple:
     """
     Fetches regular season + postseason game logs for a player from ESPN.
     Returns (player_name, team_name, team_id, game_logs).
     """
     url = ESPN_GAMELOG_URL.format(athlete_id=espn_id)
-    resp = requests.get(url, headers=HEADERS, timeout=15)
-    resp.raise_for_status()
-    data = resp.json()
+    if fetcher is not None:
+        data = fetcher.get_json(url, ttl=ESPN_GAMELOG_TTL)
+    else:
+        with make_espn_fetcher() as own_fetcher:
+            data = own_fetcher.get_json(url, ttl=ESPN_GAMELOG_TTL)
+    return _parse_espn_gamelog(data, espn_id, player_name)
+
 
+def fetch_all_player_stats_espn(players: dict[str, str], fetcher: ConcurrentFetcher | None = None,
+                                progress=None) -> dict:
+    """
+    Fetches game logs for many players in parallel. `players` maps player name -> ESPN id.
+    Returns {player_name: (player_name, team_name, team_id, game_logs) or the exception raised}.
+    `progress(done, total)` is called as players complete (see `ConcurrentFetcher.map`).
+    """
+    own_fetcher = fetcher is None
+    fetcher = fetcher or make_espn_fetcher()
+    try:
+        return fetcher.map(
+            lambda item: fetch_player_stats_espn(item[1], item[0], fetcher),
+            {name: (name, espn_id) for name, espn_id in players.items()},
+            progress,
+        )
+    finally:
+        if own_fetcher:
+            fetcher.close()
+
+
+def _parse_espn_gamelog(data: dict, espn_id: str, player_name: str) -> tuple:
+    """Turn an ESPN gamelog response into (player_name, team_name, team_id, game_logs)."""
     labels = data.get("labels", [])
     label_idx = {label: i for i, label in enumerate(labels)}
 
@@ -107,7 +165,9 @@ def fetch_player_stats_espn(espn_id: str, player_name: str) -> tuple:
 
                 raw_date = game_info.get("gameDate", "")
                 try:
-                    game_date = datetime.fromisoformat(raw_date.replace("Z", "+00:00")).astimezone(timezone.utc).date()
+                    # Store the game day (like nba_api's GAME_DATE), not the UTC date: evening
+                    # tip-offs are already the next day in UTC.
+                    game_date = game_day(datetime.fromisoformat(raw_date.replace("Z", "+00:00")).astimezone(timezone.utc))
                 except Exception:
                     game_date = None
 
@@ -2,8 +2,15 @@ import os
 import json
 import requests
 from pathlib import Path
+from alphabetter.nba_backend.common.http_cache import OfflineCacheMiss
+from alphabetter.nba_backend.get_props.prizepicks_stream import fetch_board_pages
 
 def gen_prizepicks_json():
+    """
+    Dump the whole PrizePicks board (every page) to prizepicks_props.json.
+    The pipeline streams the board directly (see prizepicks_stream); this file is for inspection
+    and for the legacy load_bets_json / create_props path.
+    """
     script_dir = Path(__file__).parent
     file_name = script_dir / "prizepicks_props.json"
 
@@ -13,46 +20,25 @@ def gen_prizepicks_json():
         except OSError as e:
             raise RuntimeError(f"Failed to delete existing props file: {e}") from e
 
-    session = requests.Session()
-    session.verify = True
-
-    # NOTE: league_id=7 = NBA, league_id=8 = NFL
-    url = "https://api.prizepicks.com/projections?league_id=7&per_page=250&single_stat=true"
-
-    headers = {
-        "Host": "api.prizepicks.com",
-        "Sec-Ch-Ua": '"Not_A Brand";v="99", "Google Chrome";v="109", "Chromium";v="109"',
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "Sec-Ch-Ua-Mobile": "?1",
-        "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Mobile Safari/537.36",
-        "Sec-Ch-Ua-Platform": '"Android"',
-        "Origin": "https://app.prizepicks.com",
-        "Sec-Fetch-Site": "same-site",
-        "Sec-Fetch-Mode": "cors",
-        "Sec-Fetch-Dest": "empty",
-        "Referer": "https://app.prizepicks.com/",
-        "Accept-Language": "en-US,en;q=0.9",
-        "If-Modified-Since": "Thu, 12 Jan 2023 19:23:47 GMT"
-    }
-
+    board = {"data": [], "included": []}
+    seen_included = set()
     try:
-        response = session.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        for page in fetch_board_pages():
+            board["data"].extend(page.get("data", []))
+            for item in page.get("included", []):
+                if (item["type"], item["id"]) not in seen_included:
+                    seen_included.add((item["type"], item["id"]))
+                    board["included"].append(item)
+    except (requests.exceptions.RequestException, OfflineCacheMiss, ValueError) as e:
         raise RuntimeError(f"PrizePicks API request failed: {e}") from e
 
     try:
         with open(file_name, 'w') as f:
-            try:
-                json_data = response.json()
-                json.dump(json_data, f, indent=2)
-            except ValueError:
-                f.write(response.text)
+            json.dump(board, f, indent=2)
     except IOError as e:
         raise RuntimeError(f"Failed to write props file: {e}") from e
 
     print(f"done - file saved at: {file_name}")
 
 if __name__ == "__main__":
-    gen_prizepicks_json()
\ No newline at end of file
+    gen_prizepicks_json()
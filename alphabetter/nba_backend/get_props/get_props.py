@@ -8,13 +8,15 @@ from pathlib import Path
 # FILE_PATH = r"C:\github\SportsPropAnalyzer\alphabetter\nba_backend\get_props\prizepicks_props.json"
 FILE_PATH = Path(__file__).parent / "prizepicks_props.json"
 
-@dataclass
+@dataclass(slots=True)
 class Prop:
     player_name: str
     stat: str
     target: float
     over_under: str
     odds_type: OddsType
+    team: str | None = None      # player's team abbreviation
+    opponent: str | None = None  # projection "description", e.g. "LAL"
 
 
 def load_bets_json(filepath: str = FILE_PATH) -> dict:
@@ -44,40 +46,47 @@ def extract_players(bet_data: dict) -> Dict[str, dict]:
     }
 
 
+def prop_from_projection(bet: dict, players: Dict[str, dict]) -> Prop | None:
+    """Build a Prop from one projection ("data" entry); None if it should be skipped."""
+    attr = bet["attributes"]
+    player_id = bet["relationships"]["new_player"]["data"]["id"]
+    player = players.get(player_id, {})
+
+    if not player:
+        return None  # Skip if player details are missing
+
+    player_name = player.get("name", "Unknown")
+
+    # Skip if the player name contains a '+'
+    if "+" in player_name:
+        return None
+
+    # Determine Over/Under (Placeholder logic, adjust if needed)
+    over_under = "over" if attr["line_score"] > 0 else "under"
+
+    # Convert odds_type string to an enum value
+    odds_type = OddsType.from_string(attr.get("odds_type", "standard"))
+
+    return Prop(
+        player_name=player_name,
+        stat=attr["stat_type"],
+        target=attr["line_score"],
+        over_under=over_under,
+        odds_type=odds_type,
+        team=player.get("team"),
+        opponent=attr.get("description"),
+    )
+
+
 def create_props(bet_data: dict) -> List[Prop]:
     """Create Prop objects from bet and player data."""
     players = extract_players(bet_data)
     props = []
 
     for bet in bet_data.get("data", []):
-        attr = bet["attributes"]
-        player_id = bet["relationships"]["new_player"]["data"]["id"]
-        player = players.get(player_id, {})
-
-        if not player:
-            continue  # Skip if player details are missing
-
-        player_name = player.get("name", "Unknown")
-
-        # Skip if the player name contains a '+'
-        if "+" in player_name:
-            continue
-
-        # Determine Over/Under (Placeholder logic, adjust if needed)
-        over_under = "over" if attr["line_score"] > 0 else "under"
-
-        # Convert odds_type string to an enum value
-        odds_type = OddsType.from_string(attr.get("odds_type", "standard"))
-
-        props.append(
-            Prop(
-                player_name=player_name,
-                stat=attr["stat_type"],
-                target=attr["line_score"],
-                over_under=over_under,
-                odds_type=odds_type,
-            )
-        )
+        prop = prop_from_projection(bet, players)
+        if prop is not None:
+            props.append(prop)
 
     return props
 
@@ -0,0 +1,135 @@
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import requests
+
+from alphabetter.nba_backend.common.game_day import utc_now
+from alphabetter.nba_backend.common.http_cache import default_http_cache
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.get_props.get_props import Prop, prop_from_projection
+
+log = get_logger(__name__)
+
+# NOTE: league_id=7 = NBA, league_id=8 = NFL
+PRIZEPICKS_PROJECTIONS_URL = "https://api.prizepicks.com/projections?league_id=7&single_stat=true"
+PRIZEPICKS_PER_PAGE = 250
+PRIZEPICKS_MAX_PAGES = 100  # safety stop if the API keeps returning a "next" link
+
+# The board moves all day; reuse a download for a few minutes (and revalidate after that).
+# Freshness is decided by page 1 for the whole board, see fetch_board_pages.
+PRIZEPICKS_TTL = 5 * 60
+
+PRIZEPICKS_HEADERS = {
+    "Sec-Ch-Ua": '"Not_A Brand";v="99", "Google Chrome";v="109", "Chromium";v="109"',
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "Sec-Ch-Ua-Mobile": "?1",
+    "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Mobile Safari/537.36",
+    "Sec-Ch-Ua-Platform": '"Android"',
+    "Origin": "https://app.prizepicks.com",
+    "Sec-Fetch-Site": "same-site",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Dest": "empty",
+    "Referer": "https://app.prizepicks.com/",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def _page_url(page: int) -> str:
+    return f"{PRIZEPICKS_PROJECTIONS_URL}&per_page={PRIZEPICKS_PER_PAGE}&page={page}"
+
+
+def _has_next_page(body: dict, page: int) -> bool:
+    """JSON:API pagination: follow links.next / meta.total_pages, else stop on a short page."""
+    links, meta = body.get("links") or {}, body.get("meta") or {}
+    if "next" in links:
+        return bool(links["next"])
+    if "total_pages" in meta:
+        return page < int(meta["total_pages"])
+    return len(body.get("data", [])) >= PRIZEPICKS_PER_PAGE
+
+
+def fetch_board_pages(session: requests.Session | None = None, cache=None) -> Iterator[dict]:
+    """
+    Yield every page of the PrizePicks NBA board as parsed JSON, one request at a time.
+    Pages go through the on-disk HTTP cache (and replay from it in offline mode).
+
+    The pages of one read must come from the same moment, so page 1 decides for all of them:
+    while it is fresh, later pages are served from the cache whatever their own age (they were
+    downloaded with it); once it needs the network, every later page is revalidated too.
+    """
+    own_session = session is None
+    session = session or requests.Session()
+    session.headers.update(PRIZEPICKS_HEADERS)
+    cache = cache or default_http_cache()
+    revalidate = not cache.is_fresh(_page_url(1))
+    try:
+        for page in range(1, PRIZEPICKS_MAX_PAGES + 1):
+            body = cache.get_json(session, _page_url(page), ttl=PRIZEPICKS_TTL, timeout=30,
+                                  revalidate=None if page == 1 else revalidate)
+            yield body
+            if not body.get("data") or not _has_next_page(body, page):
+                return
+        log.warning(f"⚠️ Stopped after {PRIZEPICKS_MAX_PAGES} PrizePicks pages")
+    finally:
+        cache.evict()
+        if own_session:
+            session.close()
+
+
+def archive_pages(pages: Iterable[dict], path: Path | str) -> Iterator[dict]:
+    """Pass pages through while appending each one as a compact JSON line to a gzip file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for page in pages:
+            f.write(json.dumps(page, separators=(",", ":")) + "\n")
+            yield page
+    log.info(f"Archived PrizePicks board to {path}")
+
+
+def read_archived_pages(path: Path | str) -> Iterator[dict]:
+    """Replay pages written by `archive_pages`."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def archive_file(directory: Path | str, now: datetime | None = None) -> Path:
+    """
+    Timestamped archive path for one board download, e.g. prizepicks_20250301_183000.jsonl.gz.
+    The stamp is UTC (like snapshot board_ts), whatever the machine's time zone.
+    """
+    return Path(directory) / f"prizepicks_{(now or utc_now()):%Y%m%d_%H%M%S}.jsonl.gz"
+
+
+def iter_props(pages: Iterable[dict]) -> Iterator[Prop]:
+    """
+    Parse pages into Prop records as they arrive. Players ("included") are remembered across
+    pages; a projection whose player hasn't been seen yet waits until it shows up.
+    """
+    players: dict[str, dict] = {}
+    pending: dict[str, list[dict]] = {}
+    for page in pages:
+        for item in page.get("included", []):
+            if item["type"] == "new_player":
+                players[item["id"]] = item["attributes"]
+        for bet in page.get("data", []):
+            player_id = bet["relationships"]["new_player"]["data"]["id"]
+            if player_id not in players:
+                pending.setdefault(player_id, []).append(bet)
+                continue
+            prop = prop_from_projection(bet, players)
+            if prop is not None:
+                yield prop
+        for player_id in [pid for pid in pending if pid in players]:
+            for bet in pending.pop(player_id):
+                prop = prop_from_projection(bet, players)
+                if prop is not None:
+                    yield prop
+    if pending:
+        log.info(f"Skipped {sum(len(bets) for bets in pending.values())} projections with no player details")
@@ -1,5 +1,6 @@
 from alphabetter.nba_backend.database import engine, Base  # Use relative import
 from alphabetter.nba_backend.models import PlayerStats, PlayerStatsCalculated  # Use relative import
+from alphabetter.nba_backend.migrations import run_migrations
 
 # Debug: Print registered tables
 print("Registered tables:", Base.metadata.tables.keys())
@@ -8,6 +9,7 @@ print("Initializing database...")
 # Base.metadata.drop_all(bind=engine)  # Drop tables (for development only)
 # Base.metadata.drop_all(bind=engine, tables=[PlayerStatsCalculated.__table__])
 Base.metadata.create_all(bind=engine)  # Create tables
+run_migrations(engine)  # Indexes / constraints added to tables that already existed
 
 print("Tables after creating:", Base.metadata.tables.keys())
 
@@ -1,14 +1,45 @@
-from fastapi import FastAPI, Depends, BackgroundTasks
+from datetime import datetime
+from typing import Annotated, Literal
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import Field
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from alphabetter.nba_backend.database import get_db
-from alphabetter.nba_backend.models import PlayerGameLog, PrizePicksProp, PlayerStatsCalculated
-from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import calculate_hit_rates, store_calculated_stats, STAT_MAPPING, _get_stat_value
-from alphabetter.nba_backend.player_utils import get_player_id
+from alphabetter.nba_backend.models import PrizePicksProp, PlayerStatsCalculated
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import calculate_hit_rates, store_calculated_stats, STAT_MAPPING, _get_stat_array
+from alphabetter.nba_backend.stat_collector.game_log_index import column_name, load_game_log_store
+from alphabetter.nba_backend.stat_collector.distribution import RECENCY_HALF_LIFE, fit_cache
+from alphabetter.nba_backend.player_utils import get_player_id, get_player_name_index
 from alphabetter.nba_backend.crud.player_gamelogs import fetch_player_gamelogs
-from alphabetter.nba_backend.fetch_and_calculate_all import fetch_and_calculate_and_store
-import requests
+from alphabetter.nba_backend.crud.props import (
+    CALCULATED_FIELDS,
+    COMBINED_FIELDS,
+    MAX_PAGE_SIZE,
+    PROP_FIELDS,
+    SORT_KEYS,
+    PropQueryError,
+    parse_fields,
+    query_props,
+)
+from alphabetter.nba_backend.crud.dataset_version import get_dataset_version
+from alphabetter.nba_backend.crud.snapshots import latest_snapshot, line_history
+from alphabetter.nba_backend.services.slip_optimizer import (
+    DEFAULT_BEAM_WIDTH,
+    OBJECTIVES,
+    POWER_PLAY_PAYOUTS,
+    load_candidate_legs,
+    optimize_slips,
+)
+from alphabetter.nba_backend.common.response_cache import ResponseCache, etag_matches
+from alphabetter.nba_backend.common.metrics import metrics
+from alphabetter.nba_backend.fetch_and_calculate_all import STAGE_GROUPS, fetch_and_calculate_and_store
+from alphabetter.nba_backend.services.jobs import Job, JobConflict, job_manager
+import httpx
+import io
 
 app = FastAPI()
 
@@ -18,24 +49,102 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Rendered GET responses keyed by (path, query, dataset version); see cached_json.
+response_cache = ResponseCache(max_entries=512)
+
+def cached_json(request: Request, db: Session, build) -> Response:
+    """
+    Serve `build(db)` (a JSON-able value) from the response cache. Data only changes when the
+    refresh pipeline bumps the dataset version, so a hit costs one primary-key lookup.
+    Sends an ETag and answers a matching If-None-Match with 304.
+
+    Routes using it are plain `def`: FastAPI runs them in its threadpool, so the queries and
+    the CPU-heavy crud work (ORM hydration, hit-rate and fit math, JSON encoding) never block
+    the event loop, and each request holds one pooled connection.
+    """
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())), get_dataset_version(db))
+    entry = response_cache.get(key)
+    if entry is None:
+        entry = response_cache.put(key, JSONResponse(jsonable_encoder(build(db))).body)
+    body, etag = entry
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}  # clients revalidate every time
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/player-gamelogs/{player_name}")
-async def get_player_gamelogs(player_name: str, db: Session = Depends(get_db)):
-    game_logs = fetch_player_gamelogs(player_name, db)
-    if game_logs is None:
-        return {"message": f"Player '{player_name}' not found."}
-    return {"game_logs": game_logs}
+def get_player_gamelogs(player_name: str, request: Request, db: Session = Depends(get_db)):
+    def build(session: Session):
+        game_logs = fetch_player_gamelogs(player_name, session)
+        if game_logs is None:
+            return {
+                "message": f"Player '{player_name}' not found.",
+                "suggestions": get_player_name_index(session).suggest(player_name),
+            }
+        return {"game_logs": game_logs}
+    return cached_json(request, db, build)
+
+def start_pipeline_job(incremental: bool = False, stages: list[str] | None = None) -> Job:
+    """
+    Start a refresh on the job manager's worker thread; 409 while another refresh runs, here
+    or in another process holding the database lock.
+    """
+    def run(job: Job) -> dict:
+        fetch_and_calculate_and_store(incremental=incremental, stages=stages, job=job)
+        return metrics.last_run
+
+    try:
+        return job_manager.start(run, wait_for_claim=True, incremental=incremental,
+                                 stages=stages or list(STAGE_GROUPS))
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "job_id": getattr(e.active, "id", None)})
+
+def _job_or_404(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.post("/api/jobs", status_code=202)
+def create_job(incremental: bool = False, stages: list[Literal[tuple(STAGE_GROUPS)]] | None = Query(None)):
+    """Start a pipeline run (optionally only some stage groups). Poll /api/jobs/{id} for progress."""
+    return start_pipeline_job(incremental, stages).to_dict()
+
+@app.get("/api/jobs")
+def list_jobs():
+    return {"active": getattr(job_manager.active(), "id", None), "jobs": [job.to_dict() for job in job_manager.jobs()]}
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status, per-stage progress (done / total, seconds) and, once finished, the run summary or error."""
+    return _job_or_404(job_id).to_dict()
+
+@app.post("/api/jobs/{job_id}/cancel", status_code=202)
+def cancel_job(job_id: str):
+    """Cancel at the next checkpoint (between stages, or between players while fetching game logs)."""
+    job = _job_or_404(job_id)
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {job.status}")
+    job.cancel()
+    return job.to_dict()
 
 @app.post("/api/fetch_and_calculate_all_bg")
-def run_pipeline_background(background_tasks: BackgroundTasks):
-    background_tasks.add_task(fetch_and_calculate_and_store)
-    return {"status": "Task started in the background"}
+def run_pipeline_background(incremental: bool = False):
+    job = start_pipeline_job(incremental)
+    return {"status": "Task started in the background", "job_id": job.id}
 
 @app.post("/api/fetch_and_calculate_all")
-def run_pipeline_sync():
-    prop_num = fetch_and_calculate_and_store()
-    return {"prop_num": prop_num}
+async def run_pipeline_sync(incremental: bool = False):
+    """Run a refresh as a job and wait for it (the wait runs off the event loop)."""
+    job = start_pipeline_job(incremental)
+    await run_in_threadpool(job.wait)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=500, detail={"job_id": job.id, "status": job.status, "error": job.error})
+    return {"prop_num": job.result["props_attempted"], "job_id": job.id}
 
 @app.get("/api/test_real_stats")
 async def test_real_stats():
@@ -43,15 +152,16 @@ async def test_real_stats():
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
         "Referer": "https://www.nba.com/",
-        "Accept-Encoding": "gzip, deflate, br",
+        "Accept-Encoding": "gzip, deflate",  # httpx only decodes br when brotli is installed
         "Accept-Language": "en-US,en;q=0.9",
         "Origin": "https://www.nba.com",
     }
     try:
-        response = requests.get(url, headers=headers, timeout=120)
+        async with httpx.AsyncClient(timeout=120) as client:
+            response = await client.get(url, headers=headers)
         response.raise_for_status()
         return {"status": "success", "content": response.json()}
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return {"status": "error", "error": str(e)}
 
 import pandas as pd
@@ -60,7 +170,11 @@ import pandas as pd
 async def test_real_stats_bbref():
     try:
         url = "https://www.basketball-reference.com/players/g/garlada01/gamelog/2024"
-        tables = pd.read_html(url)
+        async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+            response = await client.get(url)
+        response.raise_for_status()
+        # Parsing is CPU-bound, so it runs in the threadpool rather than on the event loop.
+        tables = await run_in_threadpool(pd.read_html, io.StringIO(response.text))
         gamelog = tables[0].astype(object)  # Cast to avoid numpy float issues
         gamelog = gamelog.replace({float('inf'): None, float('-inf'): None})
         gamelog = gamelog.where(pd.notnull(gamelog), None)
@@ -80,7 +194,8 @@ async def ping_stats_nba():
     """Ping stats.nba.com and return the result."""
     url = "https://stats.nba.com"
     try:
-        response = requests.get(url, timeout=10)  # Set a timeout of 10 seconds
+        async with httpx.AsyncClient(timeout=10) as client:  # Set a timeout of 10 seconds
+            response = await client.get(url)
         response.raise_for_status()  # Raise an exception for HTTP errors
         return {
             "status": "success",
@@ -88,7 +203,7 @@ async def ping_stats_nba():
             "headers": dict(response.headers),
             "content": response.text[:500],  # Return the first 500 characters of the response
         }
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return {
             "status": "error",
             "error": str(e),
@@ -98,23 +213,153 @@ async def ping_stats_nba():
 def read_root():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def get_metrics(format: Literal["prometheus", "json"] = "prometheus"):
+    """
+    Process metrics: pipeline stage timings, HTTP calls per upstream, DB rows written and cache
+    lookups, plus (JSON only) the summary of the latest pipeline run in this process.
+    """
+    if format == "json":
+        return metrics.to_json()
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+class PropQueryParams:
+    """Shared pagination / filter / sort / projection query params for the prop list endpoints."""
+
+    def __init__(
+        self,
+        limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit for every row"),
+        cursor: str | None = Query(None, description="next_cursor from the previous page"),
+        player: str | None = Query(None, description="Case-insensitive player name match"),
+        stat: str | None = None,
+        odds_type: str | None = None,
+        min_l10: float | None = Query(None, ge=0, le=1),
+        min_last_percent: float | None = Query(None, ge=0, le=1),
+        sort: Literal[SORT_KEYS] = "id",
+        order: Literal["asc", "desc"] = "asc",
+        fields: str | None = Query(None, description="Comma separated columns to return"),
+    ):
+        self.fields = fields
+        self.filters = dict(
+            limit=limit, cursor=cursor, player=player, stat=stat, odds_type=odds_type,
+            min_l10=min_l10, min_last_percent=min_last_percent, sort=sort, order=order,
+        )
+
+    def run(self, db: Session, default_fields: tuple) -> tuple[list[dict], str | None]:
+        try:
+            return query_props(db, parse_fields(self.fields, default_fields), **self.filters)
+        except PropQueryError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/props")
-async def get_props(db: Session = Depends(get_db)):
-    props = db.query(PrizePicksProp).all()
-    return {"props": props}
+def get_props(request: Request, params: PropQueryParams = Depends(), db: Session = Depends(get_db)):
+    def build(session: Session):
+        props, next_cursor = params.run(session, PROP_FIELDS)
+        return {"props": props, "next_cursor": next_cursor}
+    return cached_json(request, db, build)
 
 @app.get("/api/player-stats-calculated")
-async def get_player_stats_calculated(db: Session = Depends(get_db)):
-    stats = db.query(PlayerStatsCalculated).all()
-    return {"stats": stats}
+def get_player_stats_calculated(request: Request, params: PropQueryParams = Depends(), db: Session = Depends(get_db)):
+    # Served from the hit-rate cache; anything not cached yet is computed on first request.
+    def build(session: Session):
+        stats, next_cursor = params.run(session, CALCULATED_FIELDS)
+        return {"stats": stats, "next_cursor": next_cursor}
+    return cached_json(request, db, build)
+
+@app.get("/api/props-with-stats")
+def get_props_with_stats(request: Request, params: PropQueryParams = Depends(), db: Session = Depends(get_db)):
+    """Props joined with their hit rates in one query, so clients don't join the two lists themselves."""
+    def build(session: Session):
+        props, next_cursor = params.run(session, COMBINED_FIELDS)
+        return {"props": props, "next_cursor": next_cursor}
+    return cached_json(request, db, build)
+
+@app.get("/api/snapshots/latest")
+def get_latest_snapshot(request: Request, db: Session = Depends(get_db)):
+    """The most recent stored board from the append-only snapshot history."""
+    return cached_json(request, db, lambda session: {"props": latest_snapshot(session)})
+
+@app.get("/api/line-history/{player_id}")
+def get_line_history(player_id: int, request: Request, stat: str, odds_type: str | None = None,
+                     since: datetime | None = None, db: Session = Depends(get_db)):
+    """Line movement for one player/stat across every stored snapshot, oldest first."""
+    return cached_json(request, db, lambda session: {
+        "player_id": player_id,
+        "stat": stat,
+        "history": line_history(session, player_id, stat, odds_type=odds_type, since=since),
+    })
+
+@app.get("/api/slips")
+def get_slips(
+    request: Request,
+    min_legs: int = Query(2, ge=min(POWER_PLAY_PAYOUTS), le=max(POWER_PLAY_PAYOUTS)),
+    max_legs: int = Query(6, ge=min(POWER_PLAY_PAYOUTS), le=max(POWER_PLAY_PAYOUTS)),
+    top: int = Query(10, ge=1, le=100),
+    objective: Literal[OBJECTIVES] = "probability",
+    max_per_team: int | None = Query(None, ge=1),
+    max_per_game: int | None = Query(None, ge=1),
+    stat: str | None = None,
+    min_probability: float | None = Query(None, ge=0, le=1),
+    beam_width: int = Query(DEFAULT_BEAM_WIDTH, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    """Top slips by estimated joint hit probability (or expected value) built from the stored hit rates."""
+    if min_legs > max_legs:
+        raise HTTPException(status_code=400, detail="min_legs must be <= max_legs")
+
+    def build(session: Session):
+        legs = load_candidate_legs(session, stat=stat, min_probability=min_probability)
+        slips = optimize_slips(legs, min_legs, max_legs, top, objective, max_per_team, max_per_game, beam_width)
+        return {"candidates": len(legs), "slips": [slip.to_dict() for slip in slips]}
+    return cached_json(request, db, build)
+
+# /api/hit-probability takes a bounded number of finite, plausible lines.
+MAX_TARGET = 1000.0
+MAX_TARGETS = 50
+Target = Annotated[float, Field(ge=0, le=MAX_TARGET, allow_inf_nan=False)]
+
+@app.get("/api/hit-probability/{player_id}")
+def get_hit_probability(player_id: int, request: Request, stat: str,
+                        targets: list[Target] = Query(..., min_length=1, max_length=MAX_TARGETS),
+                        over_under: Literal["over", "under"] = "over",
+                        half_life: float | None = Query(None, ge=0, description="Games; 0 weights every game equally"),
+                        db: Session = Depends(get_db)):
+    """P(hit) at any targets from the player's fitted `stat` distribution (not limited to posted lines)."""
+    return cached_json(request, db, lambda session: _hit_probability(
+        player_id, stat, targets, over_under, RECENCY_HALF_LIFE if half_life is None else half_life, session,
+    ))
+
+def _hit_probability(player_id: int, stat: str, targets: list[float], over_under: str, half_life: float,
+                     db: Session) -> dict:
+    stat_type = STAT_MAPPING.get(stat)
+    if not stat_type:
+        return {"message": f"Stat '{stat}' not supported."}
+    column = column_name(stat_type)
+    logs = load_game_log_store(db, [player_id]).player(player_id)
+    fit = fit_cache.get(logs, column, logs.column(column), half_life)
+    if fit is None:
+        return {"message": "No game logs found for the player."}
+    return {
+        "player_id": player_id,
+        "stat": stat,
+        "distribution": fit.kind,
+        "mean": fit.mean,
+        "games": fit.games,
+        "probabilities": [
+            {"target": target, "over_under": over_under, "probability": probability}
+            for target, probability in zip(targets, fit.prob_hit(targets, [over_under] * len(targets)).tolist())
+        ],
+    }
 
 @app.get("/api/player/{player_name}")
-async def get_player_id_endpoint(player_name: str, db: Session = Depends(get_db)):
+def get_player_id_endpoint(player_name: str, db: Session = Depends(get_db)):
     return get_player_id(player_name, db)
 
 @app.get("/api/last_x/{prop_id}/{num_games}")
-async def get_player_last_x(prop_id: int, num_games: int, db: Session = Depends(get_db)):
+def get_player_last_x(prop_id: int, num_games: int, request: Request, db: Session = Depends(get_db)):
+    return cached_json(request, db, lambda session: _player_last_x(prop_id, num_games, session))
 
+def _player_last_x(prop_id: int, num_games: int, db: Session) -> dict:
     prop = db.query(PrizePicksProp).filter(PrizePicksProp.id == prop_id).first()
     if not prop:
         return {"message": f"Prop with id '{prop_id}' not found."}
@@ -122,30 +367,28 @@ async def get_player_last_x(prop_id: int, num_games: int, db: Session = Depends(
     player_id = prop.player_id
 
     stat_type = STAT_MAPPING.get(prop.stat)
-    if not stat_type or stat_type == "fantasy_score":
+    if not stat_type:
         return {"message": f"Stat '{prop.stat}' not supported in game log view."}
 
-    game_logs = db.query(PlayerGameLog).filter(
-        PlayerGameLog.player_id == player_id
-    ).order_by(PlayerGameLog.game_date.desc()).limit(num_games).all()
-
-    if not game_logs:
+    logs = load_game_log_store(db, [player_id]).player(player_id)
+    if not len(logs):
         return {"message": "No game logs found for the player."}
 
-    result_info = []
-    for game_log in game_logs:
-        game_stat = _get_stat_value(game_log, stat_type)
-
-        game_minutes = getattr(game_log, "min")
-        game_date = getattr(game_log, "game_date")
-        game_matchup = getattr(game_log, "matchup")
-
-        result_info.append({
+    recent = slice(0, max(num_games, 0))
+    result_info = [
+        {
             "game_date": game_date,
             "matchup": game_matchup,
             "game_minutes": game_minutes,
-            "stat_value": game_stat
-        })
+            "stat_value": game_stat,
+        }
+        for game_date, game_matchup, game_minutes, game_stat in zip(
+            logs.game_dates[recent].astype(object),
+            logs.matchups[recent],
+            logs.minutes[recent].tolist(),
+            _get_stat_array(logs, stat_type)[recent].tolist(),
+        )
+    ]
 
     return {
         "player_id": player_id,
@@ -0,0 +1,139 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from alphabetter.nba_backend.models import GAME_LOG_COVERED_COLUMNS
+
+def add_column(table: str, column: str, ddl: str):
+    """Migration step adding a column unless it exists (SQLite has no ADD COLUMN IF NOT EXISTS)."""
+    def step(conn: Connection):
+        if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+def rebuild_index_if_include_differs(table: str, index: str, include: tuple):
+    """
+    Migration step dropping `index` when its INCLUDE list (PostgreSQL) isn't `include`.
+    `CREATE INDEX IF NOT EXISTS` keeps an outdated index, so the step after this recreates it.
+    """
+    def step(conn: Connection):
+        if conn.dialect.name != "postgresql":
+            return  # INCLUDE is PostgreSQL only
+        for existing in inspect(conn).get_indexes(table):
+            if existing["name"] == index:
+                if list(existing.get("dialect_options", {}).get("postgresql_include", [])) != list(include):
+                    conn.execute(text(f"DROP INDEX {index}"))
+                return
+    return step
+
+
+def run_once(marker: str, statements: list):
+    """
+    Migration step for data changes that must not run twice: applies `statements` the first
+    time only and records `marker` in schema_markers.
+    """
+    def step(conn: Connection):
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_markers (name VARCHAR PRIMARY KEY)"))
+        if conn.execute(text("SELECT 1 FROM schema_markers WHERE name = :name"), {"name": marker}).first():
+            return
+        for statement in statements:
+            conn.execute(text(_statement_for(statement, conn.dialect.name)))
+        conn.execute(text("INSERT INTO schema_markers (name) VALUES (:name)"), {"name": marker})
+    return step
+
+
+# Newest first, plus INCLUDE on PostgreSQL so the last-N query is index-only.
+GAME_LOG_INDEX_DDL = {
+    "postgresql": "CREATE UNIQUE INDEX IF NOT EXISTS uq_player_game_log_player_date_desc "
+                  "ON player_game_log (player_id, game_date DESC) "
+                  f"INCLUDE ({', '.join(GAME_LOG_COVERED_COLUMNS)})",
+    "default": "CREATE UNIQUE INDEX IF NOT EXISTS uq_player_game_log_player_date_desc "
+               "ON player_game_log (player_id, game_date DESC)",
+}
+
+# Ordered, idempotent schema changes for databases created before the models changed.
+# `Base.metadata.create_all` only creates missing tables, so new indexes on existing
+# tables are added here.
+MIGRATIONS = [
+    (
+        "player_game_log unique (player_id, game_date DESC)",
+        [
+            # Drop duplicate games (keep the first row) so the unique index can be built.
+            """
+            DELETE FROM player_game_log WHERE id NOT IN (
+                SELECT MIN(id) FROM player_game_log GROUP BY player_id, game_date
+            )
+            """,
+            GAME_LOG_INDEX_DDL,
+        ],
+    ),
+    (
+        "player_game_log drop indexes covered by (player_id, game_date DESC)",
+        [
+            "DROP INDEX IF EXISTS uq_player_game_log_player_date",
+            "DROP INDEX IF EXISTS ix_player_game_log_player_id",
+        ],
+    ),
+    (
+        "player_stats lower(name) index",
+        ["CREATE INDEX IF NOT EXISTS ix_player_stats_lower_name ON player_stats (lower(name))"],
+    ),
+    (
+        "prize_picks_props team / opponent",
+        [add_column("prize_picks_props", "team", "VARCHAR"), add_column("prize_picks_props", "opponent", "VARCHAR")],
+    ),
+    (
+        "player_stats_calculated opponent adjustments",
+        [add_column("player_stats_calculated", column, "FLOAT")
+         for column in ("opp_factor", "opp_adj_expected", "opp_adj_l10_hit_rate")],
+    ),
+    (
+        "fitted hit probability",
+        [add_column("player_stats_calculated", "dist_probability", "FLOAT"),
+         add_column("hit_rate_cache", "dist_probability", "FLOAT")],
+    ),
+    (
+        "player_stats_calculated role windows",
+        [add_column("player_stats_calculated", "role_games", "INTEGER"),
+         add_column("player_stats_calculated", "projected_minutes", "FLOAT"),
+         add_column("player_stats_calculated", "per_minute_l10_hit_rate", "FLOAT"),
+         add_column("player_stats_calculated", "role_last_percent_total", "VARCHAR"),
+         add_column("player_stats_calculated", "role_last_percent_rate", "FLOAT")],
+    ),
+    (
+        # ESPN games used to be dated by the UTC date of tip-off, so evening games sat a day
+        # late and the next night's game collided with them. Tip times aren't stored, so the
+        # rows can't be re-dated: drop them (and everything keyed by their dates) and the next
+        # refresh, incremental or not, ingests every game again.
+        "game logs dated by game day",
+        [run_once("game_log_dates_are_game_days",
+                  ["DELETE FROM player_game_log", "DELETE FROM hit_rate_cache", "DELETE FROM player_role_state"])],
+    ),
+    (
+        # Keep the INCLUDE list in step with GAME_LOG_COVERED_COLUMNS (e.g. databases indexed
+        # before "fta" was covered).
+        "player_game_log covering index columns",
+        [rebuild_index_if_include_differs("player_game_log", "uq_player_game_log_player_date_desc",
+                                          GAME_LOG_COVERED_COLUMNS),
+         GAME_LOG_INDEX_DDL],
+    ),
+]
+
+
+def _statement_for(statement, dialect: str) -> str:
+    """A statement is plain SQL, or {dialect name: SQL, "default": SQL} where backends differ
+    (or a callable taking the connection, see `add_column`)."""
+    if isinstance(statement, dict):
+        return statement.get(dialect, statement["default"])
+    return statement
+
+
+def run_migrations(engine: Engine):
+    """Apply every migration in order. Each migration runs in its own transaction."""
+    for name, statements in MIGRATIONS:
+        print(f"Applying migration: {name}")
+        with engine.begin() as conn:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(text(_statement_for(statement, engine.dialect.name)))
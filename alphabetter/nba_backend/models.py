@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import JSON, Column, Integer, String, Float, Date, DateTime, Index, func
 from alphabetter.nba_backend.database import Base
 from enum import Enum
 
@@ -14,11 +14,24 @@ class PlayerStats(Base):
     assists_per_game = Column(Float)
     rebounds_per_game = Column(Float)
 
+    __table_args__ = (
+        # Case-insensitive name lookups (`lower(name) = ...`) in player_utils.get_player_id.
+        Index("ix_player_stats_lower_name", func.lower(name)),
+    )
+
+# Columns the hit-rate / last_x reads and the GameLogStore load need (matchup for opponent
+# adjustments), carried in the game log index on PostgreSQL (INCLUDE) so "last N games for
+# player X" is an index-only scan. Migrations rebuild the index when this list changes.
+GAME_LOG_COVERED_COLUMNS = (
+    "min", "matchup", "pts", "reb", "oreb", "dreb", "ast", "stl", "blk", "tov",
+    "fgm", "fga", "fg3m", "fg3a", "ftm", "fta",
+)
+
 class PlayerGameLog(Base):
     __tablename__ = "player_game_log"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    player_id = Column(Integer, index=True)
+    player_id = Column(Integer)  # leading column of the composite index below
     team_id = Column(Integer)
     game_date = Column(Date)
     matchup = Column(String)
@@ -42,6 +55,17 @@ class PlayerGameLog(Base):
     fta = Column(Float)
     ft_pct = Column(Float)
 
+    __table_args__ = (
+        # One row per player per game (bulk ingestion skips games it already has), stored
+        # newest first to match `filter(player_id == X).order_by(game_date.desc())`.
+        Index(
+            "uq_player_game_log_player_date_desc",
+            player_id, game_date.desc(),
+            unique=True,
+            postgresql_include=list(GAME_LOG_COVERED_COLUMNS),
+        ),
+    )
+
 class TeamInfo(Base):
     __tablename__ = "team_info"
 
@@ -95,6 +119,8 @@ class PrizePicksProp(Base):
     stat = Column(String)
     target = Column(Float)
     over_under = Column(String)
+    team = Column(String)
+    opponent = Column(String)
     odds_type = Column(String)  # Store as string.  Convert laterfrom sqlalchemy import Column, Integer, Float, String
 from alphabetter.nba_backend.database import Base
 
@@ -110,3 +136,109 @@ class PlayerStatsCalculated(Base):
     l20_hit_rate = Column(Float)
     last_percent_total = Column(String)      # Formatted string, e.g., "24/25"
     last_percent_rate = Column(Float)        # Percentage as a decimal, e.g., 0.96
+    dist_probability = Column(Float)         # P(hit) from the fitted stat distribution
+    opp_factor = Column(Float)               # tonight's opponent vs. league average for this stat
+    opp_adj_expected = Column(Float)         # last-10 average re-scaled to tonight's opponent
+    opp_adj_l10_hit_rate = Column(Float)
+    role_games = Column(Integer)             # games since the last detected role change
+    projected_minutes = Column(Float)        # mean minutes of the current role
+    per_minute_l10_hit_rate = Column(Float)  # L10 with each game scaled to projected minutes
+    role_last_percent_total = Column(String) # last % within the current role only
+    role_last_percent_rate = Column(Float)
+
+class HitRateCache(Base):
+    """
+    Hit rates keyed by what they depend on, not by prop: the same line re-posted (or posted
+    again as a goblin / demon at the same target) shares a row. Over and under are separate
+    rows, since `over_under` is part of the key. `last_game_date` is the player's latest stored
+    game, so a new game log changes the key and old rows are never read again.
+    """
+    __tablename__ = "hit_rate_cache"
+
+    id = Column(Integer, primary_key=True)
+    player_id = Column(Integer, nullable=False)
+    stat = Column(String, nullable=False)
+    target = Column(Float, nullable=False)
+    over_under = Column(String, nullable=False)
+    last_game_date = Column(Date, nullable=False)
+    l5_hit_rate = Column(Float)
+    l10_hit_rate = Column(Float)
+    l20_hit_rate = Column(Float)
+    last_percent_total = Column(String)
+    last_percent_rate = Column(Float)
+    dist_probability = Column(Float)
+
+    __table_args__ = (
+        Index(
+            "uq_hit_rate_cache_key",
+            "player_id", "stat", "target", "over_under", "last_game_date",
+            unique=True,
+        ),
+    )
+
+class PlayerRoleState(Base):
+    """
+    Online role-change tracker per player (`stat_collector.role_tracker`). `state` holds the
+    detector internals; refreshes feed only the games after `last_game_date`.
+    """
+    __tablename__ = "player_role_state"
+
+    player_id = Column(Integer, primary_key=True)
+    last_game_date = Column(Date)
+    role_games = Column(Integer)
+    projected_minutes = Column(Float)
+    state = Column(JSON, nullable=False)
+
+class DatasetVersion(Base):
+    """
+    Single-row counter bumped whenever the refresh pipeline changes data. Read endpoints key
+    their response cache (and ETags) on it.
+    """
+    __tablename__ = "dataset_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class PipelineLock(Base):
+    """
+    Single-row lock held by the running refresh on databases without advisory locks (SQLite).
+    `holder` is NULL while no run holds it. See crud/pipeline_lock.py.
+    """
+    __tablename__ = "pipeline_lock"
+
+    id = Column(Integer, primary_key=True)
+    holder = Column(String)
+    acquired_at = Column(DateTime)
+
+
+class PropSnapshot(Base):
+    """
+    Append-only history of every board the pipeline stored, with the hit rates it showed at
+    that moment. Keyed by (board_ts, line); `delete_all_rows` never touches it. Intraday
+    captures are folded into one "daily" row per line by `crud.snapshots.compact_snapshots`.
+    Range-partitioned by month on PostgreSQL.
+    """
+    __tablename__ = "prop_snapshots"
+
+    board_ts = Column(DateTime, primary_key=True)  # UTC, when the board was fetched
+    player_id = Column(Integer, primary_key=True)
+    stat = Column(String, primary_key=True)
+    odds_type = Column(String, primary_key=True)
+    over_under = Column(String, primary_key=True)
+    target = Column(Float, primary_key=True)
+    player_name = Column(String)
+    granularity = Column(String, nullable=False, default="intraday")  # "intraday" | "daily"
+    l5_hit_rate = Column(Float)
+    l10_hit_rate = Column(Float)
+    l20_hit_rate = Column(Float)
+    last_percent_total = Column(String)
+    last_percent_rate = Column(Float)
+
+    __table_args__ = (
+        # Line movement for one player/stat: an index range scan however big the archive gets.
+        Index("ix_prop_snapshots_line_history", "player_id", "stat", "board_ts"),
+        # Compaction only looks at intraday rows.
+        Index("ix_prop_snapshots_granularity_ts", "granularity", "board_ts"),
+        {"postgresql_partition_by": "RANGE (board_ts)"},
+    )
@@ -1,25 +1,33 @@
+import threading
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from alphabetter.nba_backend.models import PlayerStats, PrizePicksProp
+from alphabetter.nba_backend.models import PlayerStats
+from alphabetter.nba_backend.common.name_index import NameIndex
+from alphabetter.nba_backend.crud.dataset_version import get_dataset_version
+
+# NameIndex over player_stats, rebuilt only when the refresh pipeline bumps the dataset version.
+_name_index = {"version": None, "index": None}
+_name_index_lock = threading.Lock()
+
+
+def get_player_name_index(db: Session) -> NameIndex:
+    version = get_dataset_version(db)
+    with _name_index_lock:
+        if _name_index["version"] != version:
+            names = dict(db.query(PlayerStats.name, PlayerStats.player_id).all())
+            _name_index.update(version=version, index=NameIndex(names))
+        return _name_index["index"]
+
 
 def get_player_id(player_name: str, db: Session):
-    # Query player ID for the player using case-insensitive match
+    # Case-insensitive exact match first (served by the lower(name) index)
     player = db.query(PlayerStats).filter(func.lower(PlayerStats.name) == player_name.lower()).first()
-    if not player:
-        # If player is not found, return all available props
-        props = db.query(PrizePicksProp).all()
-        props_list = [
-            {
-                "id": prop.id,
-                "player_name": prop.player_name,
-                "player_id": prop.player_id,
-                "stat": prop.stat,
-                "target": prop.target,
-                "over_under": prop.over_under,
-                "odds_type": prop.odds_type,
-            }
-            for prop in props
-        ]
-        return {"error": "Player not found", "props": props_list}
+    if player:
+        return {"player_id": player.player_id}
 
-    return {"player_id": player.player_id}
\ No newline at end of file
+    # Accents / suffixes / small typos: "Nikola Jokic", "Jaren Jackson", "Shai Gilgeous Alexander"
+    index = get_player_name_index(db)
+    match = index.resolve(player_name)
+    if match:
+        return {"player_id": match.player_id, "matched_name": match.name}
+    return {"error": "Player not found", "suggestions": index.suggest(player_name)}
@@ -0,0 +1,179 @@
+"""
+Background runs of the refresh pipeline with job ids, progress and cancellation.
+
+Only one job runs at a time (two refreshes would wipe and refill the same tables under each
+other); starting a second one raises `JobConflict`. That check is per process: the pipeline
+also takes a database-wide lock (crud/pipeline_lock.py) and claims the job once it holds it,
+so `start(..., wait_for_claim=True)` raises the lock's JobConflict too. A job runs on its own worker thread, so
+the API keeps serving while it works. The pipeline reports into the job between stages and
+while fetching, which is also where a cancel request takes effect.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from alphabetter.nba_backend.common.log import get_logger
+
+log = get_logger(__name__)
+
+MAX_FINISHED_JOBS = 50  # finished jobs kept for /api/jobs/{id}
+
+
+class JobCancelled(Exception):
+    """Raised inside the pipeline at the next checkpoint after `Job.cancel()`."""
+
+
+class JobConflict(RuntimeError):
+    """Another job is still running. `active` is None when it runs in another process."""
+
+    def __init__(self, active: "Job | None", message: str | None = None):
+        super().__init__(message or f"Job {active.id} is still {active.status}")
+        self.active = active
+
+
+class Job:
+    """
+    One pipeline run. `status` goes queued -> running -> succeeded | failed | cancelled.
+    `stages` holds per-stage progress: {name: {"status", "done", "total", "seconds"}}.
+    """
+
+    def __init__(self, params: dict | None = None):
+        self.id = uuid.uuid4().hex
+        self.params = params or {}
+        self.status = "queued"
+        self.stage: str | None = None
+        self.stages: dict[str, dict] = {}
+        self.result = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._claimed = threading.Event()
+        self._exception: Exception | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self):
+        """Ask the run to stop at its next checkpoint (a no-op once finished)."""
+        self._cancel.set()
+
+    def claim(self):
+        """Called by the runner once it holds the database-wide lock."""
+        self._claimed.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+
+    def start_stage(self, name: str):
+        self.check_cancelled()
+        with self._lock:
+            self.stage = name
+            self.stages[name] = {"status": "running", "done": 0, "total": None, "seconds": None}
+
+    def progress(self, done: int, total: int | None = None):
+        """Progress of the current stage (e.g. players fetched / players). Also a cancel checkpoint."""
+        with self._lock:
+            if self.stage in self.stages:
+                self.stages[self.stage].update(done=done, **({"total": total} if total is not None else {}))
+        self.check_cancelled()
+
+    def finish_stage(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name].update(status="done", seconds=round(seconds, 3))
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "params": self.params,
+                "stage": self.stage,
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "cancel_requested": self._cancel.is_set(),
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "error": self.error,
+                "result": self.result,
+            }
+
+    def _run(self, runner):
+        with self._lock:
+            self.status, self.started_at = "running", time.time()
+        try:
+            result = runner(self)
+            with self._lock:
+                self.result, self.status = result, "succeeded"
+        except JobCancelled:
+            with self._lock:
+                self.status = "cancelled"
+        except Exception as e:
+            if not isinstance(e, JobConflict):
+                log.exception(f"❌ Job {self.id} failed")
+            with self._lock:
+                self.status, self.error, self._exception = "failed", f"{type(e).__name__}: {e}", e
+        finally:
+            with self._lock:
+                if self.stage in self.stages and self.stages[self.stage]["status"] == "running":
+                    self.stages[self.stage]["status"] = self.status
+                self.finished_at = time.time()
+            self._claimed.set()
+            self._done.set()
+            log.info(f"Job {self.id} {self.status} in {self.finished_at - self.started_at:.1f}s")
+
+
+class JobManager:
+    """Single-flight runner: `start` refuses while a job is running. Keeps the last MAX_FINISHED_JOBS."""
+
+    def __init__(self, max_jobs: int = MAX_FINISHED_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+        self._active: Job | None = None
+
+    def start(self, runner, wait_for_claim: bool = False, **params) -> Job:
+        """
+        Run `runner(job)` on a worker thread. Raises JobConflict while another job runs.
+        With `wait_for_claim`, returns once the runner called `job.claim()`; a JobConflict the
+        runner raised before that (the database lock is taken) is raised here instead.
+        """
+        with self._lock:
+            if self._active is not None and not self._active.finished:
+                raise JobConflict(self._active)
+            job = Job(params)
+            self._active = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        threading.Thread(target=job._run, args=(runner,), name=f"job-{job.id[:8]}", daemon=True).start()
+        if wait_for_claim:
+            job._claimed.wait()
+            if isinstance(job._exception, JobConflict):
+                with self._lock:
+                    self._jobs.pop(job.id, None)
+                raise job._exception
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def active(self) -> Job | None:
+        job = self._active
+        return job if job is not None and not job.finished else None
+
+    def jobs(self) -> list[Job]:
+        """Most recent first."""
+        return list(reversed(self._jobs.values()))
+
+
+job_manager = JobManager()
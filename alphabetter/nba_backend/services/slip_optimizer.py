@@ -0,0 +1,264 @@
+"""
+Build PrizePicks slips from the calculated hit rates.
+
+Each candidate prop gets one leg probability, a weighted blend of its stored L5/L10/L20/last-%
+rates. A slip's joint probability is the product of its legs (legs treated as independent).
+The search is a bounded beam search over legs sorted best first, so 1,000+ candidates stay
+interactive; with a beam as wide as the number of feasible partial slips it is exhaustive.
+
+    python -m alphabetter.nba_backend.services.slip_optimizer --min-legs 3 --max-legs 3 --top 5
+"""
+import argparse
+import heapq
+import itertools
+import math
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from alphabetter.nba_backend.crud.props import query_props
+from alphabetter.nba_backend.database import DATABASE_URL
+from alphabetter.nba_backend.models import OddsType
+
+# Power Play multiplier by number of legs (every leg must hit).
+POWER_PLAY_PAYOUTS = {2: 3.0, 3: 5.0, 4: 10.0, 5: 20.0, 6: 37.5}
+
+# Goblins are easier lines that shrink the slip payout, demons harder ones that grow it.
+# PrizePicks prices them per line and doesn't publish the numbers; these per-leg factors
+# on the Power Play multiplier are typical values.
+ODDS_TYPE_PAYOUT_FACTOR = {OddsType.STANDARD: 1.0, OddsType.GOBLIN: 0.8, OddsType.DEMON: 1.5}
+
+# How the stored rates blend into one leg probability.
+DEFAULT_RATE_WEIGHTS = {"l5_hit_rate": 0.2, "l10_hit_rate": 0.3, "l20_hit_rate": 0.3, "last_percent_rate": 0.2}
+# Never treat a leg as a lock (or a sure miss): 10/10 and 0/5 samples are small.
+PROBABILITY_FLOOR, PROBABILITY_CEILING = 0.02, 0.98
+
+DEFAULT_BEAM_WIDTH = 200
+MIN_TEAMS = 2  # PrizePicks rule: a slip needs players from at least two teams (see _team_count)
+OBJECTIVES = ("probability", "ev")
+
+CANDIDATE_FIELDS = ("id", "player_id", "player_name", "stat", "target", "over_under", "odds_type",
+                    "team", "opponent") + tuple(DEFAULT_RATE_WEIGHTS)
+
+
+@dataclass(frozen=True, slots=True)
+class Leg:
+    prop_id: int
+    player_id: int
+    player_name: str
+    stat: str
+    target: float
+    over_under: str
+    odds_type: str
+    team: str | None
+    game: str | None
+    probability: float
+    payout_factor: float
+
+
+@dataclass(slots=True)
+class Slip:
+    legs: tuple[Leg, ...]
+    probability: float
+    payout: float
+
+    @property
+    def expected_value(self) -> float:
+        """Expected profit per unit staked."""
+        return self.probability * self.payout - 1
+
+    def to_dict(self) -> dict:
+        return {
+            "legs": [
+                {"prop_id": leg.prop_id, "player_name": leg.player_name, "stat": leg.stat, "target": leg.target,
+                 "over_under": leg.over_under, "odds_type": leg.odds_type, "team": leg.team,
+                 "probability": round(leg.probability, 4)}
+                for leg in self.legs
+            ],
+            "probability": round(self.probability, 6),
+            "payout": round(self.payout, 3),
+            "expected_value": round(self.expected_value, 4),
+        }
+
+
+def leg_probability(row: dict, weights: dict = DEFAULT_RATE_WEIGHTS) -> float | None:
+    """Blend of the stored rates (weights renormalized over the rates present); None without rates."""
+    present = {name: weight for name, weight in weights.items() if row.get(name) is not None}
+    if not present:
+        return None
+    blended = sum(row[name] * weight for name, weight in present.items()) / sum(present.values())
+    return min(max(blended, PROBABILITY_FLOOR), PROBABILITY_CEILING)
+
+
+def _game_key(team: str | None, opponent: str | None) -> str | None:
+    if team and opponent:
+        return "-".join(sorted((team, opponent)))
+    return None
+
+
+def load_candidate_legs(db: Session, weights: dict = DEFAULT_RATE_WEIGHTS, stat: str | None = None,
+                        min_probability: float | None = None) -> list[Leg]:
+    """Every prop on the board with hit rates, as a Leg."""
+    rows, _ = query_props(db, CANDIDATE_FIELDS, stat=stat)
+    legs = []
+    for row in rows:
+        probability = leg_probability(row, weights)
+        if probability is None or (min_probability is not None and probability < min_probability):
+            continue
+        legs.append(Leg(
+            prop_id=row["id"], player_id=row["player_id"], player_name=row["player_name"], stat=row["stat"],
+            target=row["target"], over_under=row["over_under"], odds_type=row["odds_type"], team=row["team"],
+            game=_game_key(row["team"], row["opponent"]), probability=probability,
+            payout_factor=ODDS_TYPE_PAYOUT_FACTOR[OddsType.from_string(row["odds_type"] or "standard")],
+        ))
+    return legs
+
+
+def slip_payout(legs) -> float:
+    """Power Play multiplier for this many legs, scaled by each goblin/demon leg."""
+    payout = POWER_PLAY_PAYOUTS[len(legs)]
+    for leg in legs:
+        payout *= leg.payout_factor
+    return payout
+
+
+def _leg_weight(leg: Leg, objective: str) -> float:
+    # Scores are sums of logs: log P(slip) (+ log payout for "ev"), so partial slips compare additively.
+    if objective == "ev":
+        return math.log(leg.probability) + math.log(leg.payout_factor)
+    return math.log(leg.probability)
+
+
+def _team_count(teams: dict, n_legs: int) -> int:
+    """
+    Distinct teams among `n_legs` legs, `teams` counting the legs with a known team. A leg
+    whose team is unknown (props stored before teams were) counts as a team of its own:
+    it's another player, and nothing says it's on the same team.
+    """
+    return len(teams) + n_legs - sum(teams.values())
+
+
+def _prune_per_player(legs: list[Leg], keep: int) -> list[Leg]:
+    """
+    A player's legs share team and game, so swapping in a better leg of the same player never
+    breaks a constraint: only each player's `keep` best legs can appear in the top `keep` slips.
+    """
+    per_player: dict[int, int] = {}
+    kept = []
+    for leg in legs:
+        if per_player.get(leg.player_id, 0) < keep:
+            per_player[leg.player_id] = per_player.get(leg.player_id, 0) + 1
+            kept.append(leg)
+    return kept
+
+
+def optimize_slips(legs: list[Leg], min_legs: int = 2, max_legs: int = 6, top_k: int = 10,
+                   objective: str = "probability", max_per_team: int | None = None,
+                   max_per_game: int | None = None, beam_width: int = DEFAULT_BEAM_WIDTH) -> list[Slip]:
+    """
+    Top `top_k` slips with `min_legs`..`max_legs` legs. One leg per player, at most
+    `max_per_team` legs from a team and `max_per_game` from one game, at least MIN_TEAMS teams.
+    Partial slips that can no longer reach MIN_TEAMS teams with the legs left are dropped while
+    expanding, so they never crowd feasible slips out of the beam.
+    `objective`: "probability" ranks by joint hit probability, "ev" by expected payout.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}")
+    if not (min(POWER_PLAY_PAYOUTS) <= min_legs <= max_legs <= max(POWER_PLAY_PAYOUTS)):
+        raise ValueError(f"legs must be between {min(POWER_PLAY_PAYOUTS)} and {max(POWER_PLAY_PAYOUTS)}")
+
+    beam_width = max(beam_width, top_k)
+    weights = {leg.prop_id: _leg_weight(leg, objective) for leg in legs}
+    candidates = _prune_per_player(sorted(legs, key=lambda leg: weights[leg.prop_id], reverse=True), top_k)
+    leg_weights = [weights[leg.prop_id] for leg in candidates]
+
+    def size_bonus(n: int) -> float:
+        return math.log(POWER_PLAY_PAYOUTS[n]) if objective == "ev" else 0.0
+
+    # Beam state: (score, tiebreak, index of last leg, leg indices, players, per-team counts, per-game counts)
+    beam = [(0.0, 0, -1, (), frozenset(), {}, {})]
+    best: list[tuple[float, tuple]] = []  # min-heap of (score, leg indices)
+    tiebreak = itertools.count(1)
+    for depth in range(1, max_legs + 1):
+        next_beam = []  # min-heap of the `beam_width` best children so far
+        for score, _, last, chosen, players, teams, games in beam:
+            # Candidates are sorted best first: once a child can't beat the worst of a full
+            # next beam, none of this parent's later children can either (bound).
+            for i in range(last + 1, len(candidates)):
+                child_score = score + leg_weights[i]
+                if len(next_beam) == beam_width and child_score <= next_beam[0][0]:
+                    break
+                leg = candidates[i]
+                if leg.player_id in players:
+                    continue
+                if max_per_team is not None and leg.team and teams.get(leg.team, 0) >= max_per_team:
+                    continue
+                if max_per_game is not None and leg.game and games.get(leg.game, 0) >= max_per_game:
+                    continue
+                child_teams = {**teams, leg.team: teams.get(leg.team, 0) + 1} if leg.team else teams
+                if _team_count(child_teams, depth) + max_legs - depth < MIN_TEAMS:
+                    continue
+                child_games = {**games, leg.game: games.get(leg.game, 0) + 1} if leg.game else games
+                child = (child_score, next(tiebreak), i, chosen + (i,), players | {leg.player_id},
+                         child_teams, child_games)
+                if len(next_beam) < beam_width:
+                    heapq.heappush(next_beam, child)
+                else:
+                    heapq.heapreplace(next_beam, child)
+        beam = sorted(next_beam, reverse=True)
+        if not beam:
+            break
+        if depth >= min_legs:
+            for score, _, _, chosen, _, teams, _ in beam:
+                if _team_count(teams, depth) < MIN_TEAMS:
+                    continue
+                entry = (score + size_bonus(depth), chosen)
+                if len(best) < top_k:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+
+    slips = []
+    for _, chosen in sorted(best, reverse=True):
+        slip_legs = tuple(candidates[i] for i in chosen)
+        slips.append(Slip(
+            legs=slip_legs,
+            probability=math.prod(leg.probability for leg in slip_legs),
+            payout=slip_payout(slip_legs),
+        ))
+    return slips
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top PrizePicks slips from the calculated hit rates")
+    parser.add_argument("--min-legs", type=int, default=2)
+    parser.add_argument("--max-legs", type=int, default=6)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--objective", choices=OBJECTIVES, default="probability")
+    parser.add_argument("--max-per-team", type=int, default=None)
+    parser.add_argument("--max-per-game", type=int, default=None)
+    parser.add_argument("--stat", default=None, help="Only legs for this stat, e.g. Points")
+    parser.add_argument("--beam-width", type=int, default=DEFAULT_BEAM_WIDTH)
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        legs = load_candidate_legs(session, stat=args.stat)
+        start_time = time.time()
+        slips = optimize_slips(legs, args.min_legs, args.max_legs, args.top, args.objective,
+                               args.max_per_team, args.max_per_game, args.beam_width)
+        print(f"Searched {len(legs)} candidate legs in {time.time() - start_time:.2f}s")
+        for rank, slip in enumerate(slips, start=1):
+            print(f"\n#{rank}  P={slip.probability:.3f}  payout {slip.payout:.2f}x  EV {slip.expected_value:+.3f}")
+            for leg in slip.legs:
+                print(f"   {leg.player_name} ({leg.team}) {leg.over_under} {leg.target} {leg.stat} "
+                      f"[{leg.odds_type}]  p={leg.probability:.2f}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
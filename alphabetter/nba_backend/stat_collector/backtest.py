@@ -0,0 +1,238 @@
+"""
+Backtest the hit-rate metrics against archived PrizePicks boards.
+
+Every archived board is replayed at its own time: each prop is settled against the player's
+game on the board's game day (`common.game_day`, the convention snapshots and stored game
+dates use, so a UTC time after midnight still counts as the evening's game), and its
+L5/L10/L20 and last-% are computed from the games strictly before that one. Same rules as
+the live calc (`STAT_MAPPING`, `_is_hit`, `last_percent`), run through the vectorized
+hit-rate engine in one batch per player.
+
+    python -m alphabetter.nba_backend.stat_collector.backtest --archive-dir archives/
+"""
+import argparse
+import re
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from alphabetter.nba_backend.common.game_day import game_day
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.database import DATABASE_URL
+from alphabetter.nba_backend.get_props.prizepicks_stream import iter_props, read_archived_pages
+from alphabetter.nba_backend.player_utils import get_player_name_index
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import STAT_MAPPING, _get_stat_array
+from alphabetter.nba_backend.stat_collector.game_log_index import GameLogStore, load_game_log_store
+from alphabetter.nba_backend.stat_collector.hit_rate_engine import compute_hit_rates_from, hit_matrix
+
+log = get_logger(__name__)
+
+BACKTEST_METRICS = ("l5_hit_rate", "l10_hit_rate", "l20_hit_rate", "last_percent_rate")
+CALIBRATION_BINS = np.linspace(0, 1, 11)
+ROI_THRESHOLDS = (0.5, 0.6, 0.7, 0.8)
+
+# A 2-pick power play pays 3x, so one leg is worth sqrt(3) units at even strength
+# (break-even hit rate ~57.7%).
+LEG_PAYOUT = 3 ** 0.5
+
+_ARCHIVE_NAME = re.compile(r"prizepicks_(\d{8})_(\d{6})\.jsonl\.gz$")
+
+
+@dataclass(slots=True)
+class BoardProp:
+    board_ts: datetime  # UTC, when the board was downloaded
+    player_id: int
+    player_name: str
+    stat: str
+    target: float
+    over_under: str
+
+    @property
+    def board_day(self) -> date:
+        return game_day(self.board_ts)
+
+
+def load_archived_boards(session: Session, directory: Path | str) -> list[BoardProp]:
+    """
+    Props from every archive in `directory` (written by `fetch_and_calculate_all --archive-dir`),
+    stamped with the archive's file name (UTC). When a game day was archived more than once, its
+    last download wins. Players are resolved against player_stats.
+    """
+    latest_per_day: dict[date, tuple[datetime, Path]] = {}
+    for path in sorted(Path(directory).glob("prizepicks_*.jsonl.gz")):
+        match = _ARCHIVE_NAME.search(path.name)
+        if match:
+            board_ts = datetime.strptime(match.group(1) + match.group(2), "%Y%m%d%H%M%S")
+            latest_per_day[game_day(board_ts)] = (board_ts, path)
+
+    name_index = get_player_name_index(session)
+    board, unresolved, fuzzy = [], set(), {}
+    for board_ts, path in sorted(latest_per_day.values()):
+        for prop in iter_props(read_archived_pages(path)):
+            if prop.stat not in STAT_MAPPING:
+                continue
+            match = name_index.resolve(prop.player_name)
+            if match is None:
+                unresolved.add(prop.player_name)
+                continue
+            if match.distance:
+                fuzzy[prop.player_name] = match
+            board.append(BoardProp(board_ts, int(match.player_id), prop.player_name, prop.stat,
+                                   prop.target, prop.over_under))
+    for player_name, match in sorted(fuzzy.items()):
+        log.warning(f"⚠️ Resolved '{player_name}' to '{match.name}' (edit distance {match.distance})")
+    log.info(f"Loaded {len(board)} props from {len(latest_per_day)} boards "
+             f"({len(unresolved)} unresolved players skipped)")
+    return board
+
+
+def replay(store: GameLogStore, props: list[BoardProp]) -> dict[str, np.ndarray]:
+    """
+    Point-in-time metrics and outcomes for every prop whose player played on the board's game day.
+    Returns columns: index (position in `props`), one array per BACKTEST_METRICS, outcome
+    (1.0 hit / 0.0 miss). DNPs and days without a game are void, as on PrizePicks. (DNPs are
+    not always stored, so a later game never stands in for the board day's.)
+    """
+    groups: dict[int, dict[date, list[int]]] = {}
+    for i, prop in enumerate(props):
+        groups.setdefault(prop.player_id, {}).setdefault(prop.board_day, []).append(i)
+
+    index, outcomes = [], []
+    metrics = {metric: [] for metric in BACKTEST_METRICS}
+    for player_id, by_date in groups.items():
+        logs = store.player(player_id)
+        n_games = len(logs)
+        if not n_games:
+            continue
+        dates_asc = logs.game_dates[::-1]
+
+        # Find each board day's game; every prop of the player is then one row of one batch.
+        members, game_cols = [], []
+        for board_day, day_members in by_date.items():
+            day = np.datetime64(board_day, "D")
+            prior = int(np.searchsorted(dates_asc, day, side="left"))
+            if prior == n_games or dates_asc[prior] != day:
+                continue  # no game that day
+            game = n_games - 1 - prior  # column of the board day's game, most recent first
+            if logs.minutes[game] <= 0:
+                continue  # DNP
+            members.extend(day_members)
+            game_cols.extend([game] * len(day_members))
+        if not members:
+            continue
+
+        group = [props[i] for i in members]
+        stat_columns = {}
+        for prop in group:
+            if prop.stat not in stat_columns:
+                stat_columns[prop.stat] = _get_stat_array(logs, STAT_MAPPING[prop.stat])
+        values = np.vstack([stat_columns[prop.stat] for prop in group])
+        targets = [prop.target for prop in group]
+        over_under = [prop.over_under for prop in group]
+        game_cols = np.asarray(game_cols)
+
+        rates = compute_hit_rates_from(values, logs.minutes, game_cols + 1, targets, over_under)
+        outcome = values[np.arange(len(group)), game_cols]
+
+        index.extend(members)
+        outcomes.append(hit_matrix(outcome[:, None], targets, over_under)[:, 0])
+        for metric in BACKTEST_METRICS:
+            metrics[metric].append(rates[metric])
+
+    def _join(parts):
+        return np.concatenate(parts).astype(float) if parts else np.zeros(0)
+
+    return {
+        "index": np.asarray(index, dtype=int),
+        "outcome": _join(outcomes),
+        **{metric: _join(parts) for metric, parts in metrics.items()},
+    }
+
+
+def calibration(predicted: np.ndarray, outcome: np.ndarray, bins: np.ndarray = CALIBRATION_BINS) -> list[dict]:
+    """Per probability bucket: how many props, mean predicted rate, observed hit rate."""
+    bucket = np.clip(np.digitize(predicted, bins[1:-1]), 0, len(bins) - 2)
+    counts = np.bincount(bucket, minlength=len(bins) - 1)
+    pred_sums = np.bincount(bucket, weights=predicted, minlength=len(bins) - 1)
+    hit_sums = np.bincount(bucket, weights=outcome, minlength=len(bins) - 1)
+    return [
+        {
+            "bin": f"{bins[b]:.1f}-{bins[b + 1]:.1f}",
+            "count": int(counts[b]),
+            "predicted": float(pred_sums[b] / counts[b]),
+            "observed": float(hit_sums[b] / counts[b]),
+        }
+        for b in range(len(bins) - 1)
+        if counts[b]
+    ]
+
+
+def roi(predicted: np.ndarray, outcome: np.ndarray, thresholds=ROI_THRESHOLDS, payout: float = LEG_PAYOUT) -> list[dict]:
+    """Flat one-unit stake on every prop whose metric is >= threshold."""
+    rows = []
+    for threshold in thresholds:
+        picked = predicted >= threshold
+        n = int(picked.sum())
+        hits = float(outcome[picked].sum())
+        rows.append({
+            "threshold": threshold,
+            "bets": n,
+            "hit_rate": hits / n if n else 0.0,
+            "roi": (hits * payout - n) / n if n else 0.0,
+        })
+    return rows
+
+
+def backtest_report(results: dict[str, np.ndarray]) -> dict:
+    """Brier score, calibration table and ROI by threshold for each metric."""
+    outcome = results["outcome"]
+    report = {"props": len(outcome), "base_hit_rate": float(outcome.mean()) if len(outcome) else 0.0, "metrics": {}}
+    for metric in BACKTEST_METRICS:
+        predicted = results[metric]
+        report["metrics"][metric] = {
+            "brier": float(np.mean((predicted - outcome) ** 2)) if len(outcome) else 0.0,
+            "calibration": calibration(predicted, outcome),
+            "roi": roi(predicted, outcome),
+        }
+    return report
+
+
+def run_backtest(session: Session, props: list[BoardProp]) -> dict:
+    start_time = time.time()
+    store = load_game_log_store(session, {prop.player_id for prop in props})
+    results = replay(store, props)
+    report = backtest_report(results)
+    log.info(f"Replayed {len(props)} props ({report['props']} settled) in {time.time() - start_time:.2f}s")
+    return report
+
+
+def print_report(report: dict):
+    print(f"\n=== Backtest: {report['props']} settled props, base hit rate {report['base_hit_rate']:.3f} ===")
+    for metric, result in report["metrics"].items():
+        print(f"\n{metric}  (Brier {result['brier']:.4f})")
+        for row in result["calibration"]:
+            print(f"  {row['bin']}: n={row['count']:>6}  predicted {row['predicted']:.3f}  observed {row['observed']:.3f}")
+        for row in result["roi"]:
+            print(f"  >= {row['threshold']:.2f}: {row['bets']:>6} bets  hit {row['hit_rate']:.3f}  ROI {row['roi']:+.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest hit-rate metrics against archived PrizePicks boards")
+    parser.add_argument("--archive-dir", required=True, help="Directory of prizepicks_*.jsonl.gz board archives")
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        print_report(run_backtest(session, load_archived_boards(session, args.archive_dir)))
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
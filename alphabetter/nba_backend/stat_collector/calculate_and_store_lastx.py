@@ -1,9 +1,20 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, update
 from sqlalchemy.orm import sessionmaker
 from alphabetter.nba_backend.database import DATABASE_URL, Base
 from alphabetter.nba_backend.models import PlayerGameLog, PlayerStatsCalculated, PrizePicksProp
+from alphabetter.nba_backend.stat_collector.hit_rate_engine import compute_hit_rates, compute_hit_rates_batch
+from alphabetter.nba_backend.stat_collector.game_log_index import (
+    FANTASY_SCORE_WEIGHTS, GameLogStore, PlayerLogArrays, column_name, load_game_log_store,
+)
+from alphabetter.nba_backend.stat_collector.distribution import fit_cache
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.common.metrics import metrics
 import argparse
+import time
+import numpy as np
+
+log = get_logger(__name__)
 
 STAT_MAPPING = {
     "Points": "pts",
@@ -26,26 +37,27 @@ STAT_MAPPING = {
     "Pts+Asts": ["pts", "ast"],
     "Pts+Rebs": ["pts", "reb"],
     "Blks+Stls": ["blk", "stl"],
-    "Fantasy Score": "fantasy_score",  # Special case for Fantasy Score
+    "Fantasy Score": "fantasy_score",  # weighted, see FANTASY_SCORE_WEIGHTS
 }
 
 
 def _get_stat_value(game, stat):
     """Extract the relevant stat value from a game log row."""
     if stat == "fantasy_score":
-        return (
-            getattr(game, "pts", 0) * 1 +
-            getattr(game, "reb", 0) * 1.2 +
-            getattr(game, "ast", 0) * 1.5 +
-            getattr(game, "blk", 0) * 3 +
-            getattr(game, "stl", 0) * 3 +
-            getattr(game, "tov", 0) * -1
-        )
+        total = 0
+        for col, weight in FANTASY_SCORE_WEIGHTS.items():
+            total = total + getattr(game, col, 0) * weight
+        return total
     if isinstance(stat, list):
         return sum(getattr(game, s, 0) for s in stat)
     return getattr(game, stat, 0)
 
 
+def _get_stat_array(logs: PlayerLogArrays, stat) -> np.ndarray:
+    """Columnar version of `_get_stat_value`: the stat for every game of one player (one column read)."""
+    return logs.column(column_name(stat))
+
+
 def _is_hit(stat_value, target, over_under):
     if over_under == 'over':
         return stat_value >= target
@@ -93,6 +105,12 @@ def last_percent(hits: list[bool]) -> tuple[float, str]:
     # Return the best percentage and its fraction string
     return round(max_percent * 100, 2), f"{best_hit_count}/{best_total}"
 
+def _hit_rates_from_games(games, target, over_under, stat) -> dict:
+    """Run the hit-rate engine over ORM game log rows ordered most recent first (reference path)."""
+    values = [_get_stat_value(game, stat) for game in games]
+    minutes = [game.min or 0 for game in games]
+    return compute_hit_rates(values, minutes, target, over_under)
+
 def calculate_hit_rates(session: Session, prop: PrizePicksProp):
     """Calculate hit rates for a given PrizePicksProp object."""
     player_id = prop.player_id
@@ -102,36 +120,19 @@ def calculate_hit_rates(session: Session, prop: PrizePicksProp):
     odds_type = prop.odds_type
     stat = STAT_MAPPING.get(prop.stat, "pts")
 
-    print(f"Calculating hit rates for {player_name} on {prop.stat} with odds_type: {odds_type}")
+    log.debug(f"Calculating hit rates for {player_name} on {prop.stat} with odds_type: {odds_type}")
 
-    player_games = session.query(PlayerGameLog).filter(
-        PlayerGameLog.player_id == player_id
-    ).order_by(PlayerGameLog.game_date.desc()).all()
+    logs = load_game_log_store(session, [player_id]).player(player_id)
 
-    if not player_games:
-        print("No games found for the player")
+    if not len(logs):
+        log.info("No games found for the player")
         return None
 
-    l5_hit_rate = _calc_hit_rate(player_games[:5], target, over_under, stat)
-    l10_hit_rate = _calc_hit_rate(player_games[:10], target, over_under, stat)
-    l20_hit_rate = _calc_hit_rate(player_games[:20], target, over_under, stat)
-
-    games = [
-        _is_hit(_get_stat_value(game, stat), target, over_under)
-        for game in player_games
-        if game.min and game.min > 0
-    ]
-    last_percent_rate, last_percent_total = last_percent(games)
-
     return {
         "player_id": player_id,
         "player_name": player_name,
         "prop_id": prop.id,
-        "l5_hit_rate": l5_hit_rate,
-        "l10_hit_rate": l10_hit_rate,
-        "l20_hit_rate": l20_hit_rate,
-        "last_percent_total": last_percent_total,
-        "last_percent_rate": last_percent_rate / 100,  # store as 0.882 not 88.2
+        **compute_hit_rates(_get_stat_array(logs, stat), logs.minutes, target, over_under),
     }
 
 def store_calculated_stats(session: Session, stats: dict):
@@ -147,7 +148,7 @@ def store_calculated_stats(session: Session, stats: dict):
         existing_record.l20_hit_rate = stats["l20_hit_rate"]
         existing_record.last_percent_total = stats["last_percent_total"]
         existing_record.last_percent_rate = stats["last_percent_rate"]
-        print(f"""🔄 Updating existing record:
+        log.debug(f"""🔄 Updating existing record:
         Player ID: {existing_record.player_id}
         Name: {existing_record.player_name}
         Prop ID: {existing_record.prop_id}
@@ -169,7 +170,7 @@ def store_calculated_stats(session: Session, stats: dict):
             last_percent_rate=stats["last_percent_rate"]
         )
         session.add(player_stats_calculated)
-        print(f"""➡️ Adding new record:
+        log.debug(f"""➡️ Adding new record:
         Player ID: {player_stats_calculated.player_id}
         Name: {player_stats_calculated.player_name}
         Prop ID: {player_stats_calculated.prop_id}
@@ -181,86 +182,110 @@ def store_calculated_stats(session: Session, stats: dict):
 
     # Commit the changes to the database
     session.commit()
-    print("✅ Stats committed to database.")
-
-def calculate_and_store_stats_bulk(session: Session, props: list):
-    """Batch calculate and store stats for a list of props."""    
-    print("Start calculating stats (bulk).  Will take a moment...")
-    # Preload all player game logs
-    player_ids = {prop.player_id for prop in props}
-    player_game_logs = session.query(PlayerGameLog).filter(
-        PlayerGameLog.player_id.in_(player_ids)
-    ).order_by(PlayerGameLog.game_date.desc()).all()
-
-    # Preload existing PlayerStatsCalculated records
-    prop_ids = [prop.id for prop in props]
-    existing_stats = {
-        record.prop_id: record
-        for record in session.query(PlayerStatsCalculated).filter(
-            PlayerStatsCalculated.prop_id.in_(prop_ids)
-        ).all()
-    }
-
-    stats_list = []
-    for prop in props:
-        # Filter game logs for the current player
-        player_logs = [log for log in player_game_logs if log.player_id == prop.player_id]
-
-        # Perform calculations
-        prop_stat = STAT_MAPPING.get(prop.stat, "pts")
-        l5_hit_rate = _calc_hit_rate(player_logs[:5], prop.target, prop.over_under, prop_stat)
-        l10_hit_rate = _calc_hit_rate(player_logs[:10], prop.target, prop.over_under, prop_stat)
-        l20_hit_rate = _calc_hit_rate(player_logs[:20], prop.target, prop.over_under, prop_stat)
-        hits = [
-            _is_hit(_get_stat_value(log, prop_stat), prop.target, prop.over_under)
-            for log in player_logs
-            if log.min and log.min > 0
-        ]
-        last_percent_rate, last_percent_total = last_percent(hits)
-
-        stats = {
+    metrics.inc("db_rows_written_total", table="player_stats_calculated", op="update" if existing_record else "insert")
+    log.debug("✅ Stats committed to database.")
+
+def _dist_probabilities(logs: PlayerLogArrays, player_props: list, columns: list[str]) -> list:
+    """Fitted P(hit) per prop: one (cached) fit per stat column, every line of it scored at once."""
+    probabilities = [None] * len(player_props)
+    by_column = {}
+    for i, column in enumerate(columns):
+        by_column.setdefault(column, []).append(i)
+    for column, rows in by_column.items():
+        fit = fit_cache.get(logs, column, logs.column(column))
+        if fit is None:
+            continue
+        hit = fit.prob_hit([player_props[i].target for i in rows], [player_props[i].over_under for i in rows])
+        for i, p in zip(rows, hit.tolist()):
+            probabilities[i] = p
+    return probabilities
+
+
+def player_stats(logs: PlayerLogArrays, player_props: list) -> list[dict]:
+    """Hit rates for every prop of one player with a single batched engine call."""
+    columns = [column_name(STAT_MAPPING.get(prop.stat, "pts")) for prop in player_props]
+    matrix = np.vstack([logs.column(column) for column in columns])
+    results = compute_hit_rates_batch(
+        matrix,
+        logs.minutes,
+        [prop.target for prop in player_props],
+        [prop.over_under for prop in player_props],
+    )
+    return [
+        {
             "player_id": prop.player_id,
             "player_name": prop.player_name,
             "prop_id": prop.id,
-            "l5_hit_rate": l5_hit_rate,
-            "l10_hit_rate": l10_hit_rate,
-            "l20_hit_rate": l20_hit_rate,
-            "last_percent_total": last_percent_total,
-            "last_percent_rate": last_percent_rate / 100,  # store as 0.882 not 88.2
+            **rates,
+            "dist_probability": probability,
         }
-        stats_list.append(stats)
-
-    # Batch insert or update stats
-    for stats in stats_list:
-        if stats["prop_id"] in existing_stats:
-            # Update existing record
-            record = existing_stats[stats["prop_id"]]
-            record.l5_hit_rate = stats["l5_hit_rate"]
-            record.l10_hit_rate = stats["l10_hit_rate"]
-            record.l20_hit_rate = stats["l20_hit_rate"]
-            record.last_percent_total = stats["last_percent_total"]
-            record.last_percent_rate = stats["last_percent_rate"]
-        else:
-            # Add new record
-            player_stats_calculated = PlayerStatsCalculated(
-                player_id=stats["player_id"],
-                player_name=stats["player_name"],
-                prop_id=stats["prop_id"],
-                l5_hit_rate=stats["l5_hit_rate"],
-                l10_hit_rate=stats["l10_hit_rate"],
-                l20_hit_rate=stats["l20_hit_rate"],
-                last_percent_total=stats["last_percent_total"],
-                last_percent_rate=stats["last_percent_rate"]
-            )
-            session.add(player_stats_calculated)
+        for prop, rates, probability in zip(player_props, results, _dist_probabilities(logs, player_props, columns))
+    ]
+
+
+def calculate_stats_bulk(session: Session, props: list, store: GameLogStore | None = None) -> list[dict]:
+    """
+    Batch calculate stats for a list of props with one game log query (none when `store`, a
+    GameLogStore holding the props' players, is passed in). Nothing is written.
+    """
+    log.info("Start calculating stats (bulk).  Will take a moment...")
+    # Preload all player game logs as columnar arrays (one raw query, no ORM rows);
+    # every prop for a player reads the same array slices.
+    if store is None:
+        store = load_game_log_store(session, {prop.player_id for prop in props})
+
+    calc_start_time = time.time()
+    props_by_player = {}
+    for prop in props:
+        props_by_player.setdefault(prop.player_id, []).append(prop)
+
+    stats_list = []
+    for player_id, player_props in props_by_player.items():
+        stats_list.extend(player_stats(store.player(player_id), player_props))
+
+    calc_elapsed = time.time() - calc_start_time
+    props_per_second = len(props) / calc_elapsed if calc_elapsed > 0 else float("inf")
+    log.info(f"Calculated {len(props)} props for {len(props_by_player)} players "
+          f"in {calc_elapsed:.2f}s ({props_per_second:.0f} props/s)")
+    return stats_list
+
+
+def store_stats_bulk(session: Session, stats_list: list[dict]):
+    """Upsert PlayerStatsCalculated rows (keyed by prop_id) with one bulk UPDATE and one bulk INSERT."""
+    prop_ids = [stats["prop_id"] for stats in stats_list]
+    existing_ids = dict(
+        session.query(PlayerStatsCalculated.prop_id, PlayerStatsCalculated.id).filter(
+            PlayerStatsCalculated.prop_id.in_(prop_ids)
+        ).all()
+    )
+
+    updates = [{"id": existing_ids[stats["prop_id"]], **stats} for stats in stats_list if stats["prop_id"] in existing_ids]
+    inserts = [stats for stats in stats_list if stats["prop_id"] not in existing_ids]
+    if updates:
+        session.execute(update(PlayerStatsCalculated), updates)
+    if inserts:
+        session.execute(insert(PlayerStatsCalculated), inserts)
 
     # Commit all changes in one go
     session.commit()
-    print(f"✅ Bulk stats committed to database.")
+    metrics.inc("db_rows_written_total", len(inserts), table="player_stats_calculated", op="insert")
+    metrics.inc("db_rows_written_total", len(updates), table="player_stats_calculated", op="update")
+    log.info(f"✅ Bulk stats committed to database ({len(inserts)} new, {len(updates)} updated).")
+
+
+def calculate_and_store_stats_bulk(session: Session, props: list):
+    """Batch calculate and store stats for a list of props. Returns props/second for the calc step."""
+    calc_start_time = time.time()
+    stats_list = calculate_stats_bulk(session, props)
+    calc_elapsed = time.time() - calc_start_time
+    store_stats_bulk(session, stats_list)
+    return len(props) / calc_elapsed if calc_elapsed > 0 else float("inf")
 
 def main():
     parser = argparse.ArgumentParser(description="Calculate hit rates for a given prop_id")
     parser.add_argument("prop_id", type=int, nargs="?", help="The ID of the prop to calculate hit rates for")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Batch mode: shard props by player across this many processes (default: 1, in-process)")
     args = parser.parse_args()
 
     engine = create_engine(DATABASE_URL)
@@ -290,14 +315,11 @@ def main():
     else:
         # Batch mode — full stats including last% stored in DB
         props = session.query(PrizePicksProp).all()
-        for prop in props:
-            print(f"Processing prop_id: {prop.id} for player: {prop.player_name}")
-            stats = calculate_hit_rates(session, prop)
-            if stats:
-                store_calculated_stats(session, stats)
-                print(f"✅ Hit rates calculated and stored for prop_id: {prop.id}")
-            else:
-                print(f"❌ Failed to calculate hit rates for prop_id: {prop.id}")
+        if args.workers > 1:
+            from alphabetter.nba_backend.stat_collector.parallel_calc import calculate_and_store_stats_parallel
+            calculate_and_store_stats_parallel(session, props, workers=args.workers)
+        else:
+            calculate_and_store_stats_bulk(session, props)
 
 
 if __name__ == "__main__":
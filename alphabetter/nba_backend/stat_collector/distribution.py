@@ -0,0 +1,170 @@
+"""
+Continuous hit probabilities from a fitted per-(player, stat) distribution.
+
+Counting hit rates over 5-10 games only move in 10-20% steps, and lines a point apart often
+score the same. Instead, each player-stat gets one recency-weighted fit of its recent games:
+- counting stats (rebounds, assists, threes, ...): Poisson, or negative binomial when the
+  games are over-dispersed (variance above the mean);
+- points, point combos and fantasy score: a Gaussian kernel density.
+`prob_hit` then gives P(over) / P(under) for any target with the repo's push rule (a game
+landing exactly on the line counts for both sides).
+
+Fits are cached per player-stat (and latest game), so scoring every line of a player-stat
+on the board reuses one fit.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from alphabetter.nba_backend.common.metrics import metrics
+from alphabetter.nba_backend.stat_collector.game_log_index import PlayerLogArrays
+
+# Recency weighting: a game's weight halves every this many games back (0 = equal weights).
+# hit_rate_cache rows are keyed by the latest game, not the half-life: after changing it,
+# cached probabilities refresh as new games arrive (or clear hit_rate_cache).
+RECENCY_HALF_LIFE = float(os.environ.get("HIT_PROBABILITY_HALF_LIFE", 10))
+MAX_GAMES = 40  # games per fit
+OVERDISPERSION = 1.1  # variance / mean above this fits a negative binomial instead of a Poisson
+MIN_BANDWIDTH = 1.0  # kernel width floor, in stat units
+TAIL_SDS = 20  # count pmfs stop this many sds above the mean (negbin tails are long); the cdf is 1 past it
+FIT_CACHE_SIZE = 20000
+
+
+def _uses_kernel(column: str) -> bool:
+    return "pts" in column.split("+") or column == "fantasy_score"
+
+
+def recency_weights(n: int, half_life: float | None = RECENCY_HALF_LIFE) -> np.ndarray:
+    """Weights for n games, most recent first."""
+    if not half_life:
+        return np.ones(n)
+    return 0.5 ** (np.arange(n) / half_life)
+
+
+def _normal_cdf(x: np.ndarray) -> np.ndarray:
+    # Abramowitz & Stegun 7.1.26 erf (|error| < 1.5e-7); numpy has no erf and scipy isn't a dependency.
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
+
+
+class StatDistribution:
+    """A fitted distribution for one player-stat. `kind` is "poisson", "negbin" or "kde"."""
+
+    __slots__ = ("kind", "mean", "params", "games")
+
+    def __init__(self, kind: str, mean: float, params: dict, games: int):
+        self.kind = kind
+        self.mean = mean
+        self.params = params
+        self.games = games
+
+    def cdf(self, x) -> np.ndarray:
+        """P(X <= x) for an array of x."""
+        x = np.asarray(x, dtype=float)
+        if self.kind == "kde":
+            z = (x[..., None] - self.params["points"]) / self.params["bandwidth"]
+            return (_normal_cdf(z) * self.params["weights"]).sum(axis=-1)
+        if x.size == 0:
+            return np.zeros(x.shape)
+        # The pmf only runs to k_cap, so work is bounded whatever x is: below 0 (and -inf) the
+        # cdf is 0, past the cap (and +inf) it is 1. NaN stays NaN.
+        k_cap = self._k_cap()
+        k = np.floor(np.clip(np.nan_to_num(x, nan=-1.0), -1, k_cap + 1)).astype(int)
+        cdf = np.concatenate([[0.0], np.cumsum(self._count_pmf(k_cap)), [1.0]])
+        return np.where(np.isnan(x), np.nan, np.clip(cdf[k + 1], 0, 1))
+
+    def _k_cap(self) -> int:
+        variance = self.mean / self.params["p"] if self.kind == "negbin" else self.mean
+        return int(np.ceil(self.mean + TAIL_SDS * np.sqrt(variance)))
+
+    def _count_pmf(self, k_max: int) -> np.ndarray:
+        j = np.arange(1, k_max + 1)
+        if self.kind == "negbin":
+            r, p = self.params["r"], self.params["p"]
+            ratios = (j - 1 + r) / j * (1 - p)
+            start = p ** r
+        else:
+            ratios = self.mean / j
+            start = np.exp(-self.mean)
+        return start * np.concatenate([[1.0], np.cumprod(ratios)])
+
+    def prob_hit(self, targets, over_under) -> np.ndarray:
+        """
+        P(hit) per target: over is X >= target, under is X <= target. Integer targets on the
+        kernel fit get a half-unit continuity correction, like the discrete counts.
+        """
+        targets = np.asarray(targets, dtype=float)
+        is_over = np.asarray(over_under) == "over"
+        if self.kind == "kde":
+            whole = targets == np.round(targets)
+            over = 1 - self.cdf(np.where(whole, targets - 0.5, targets))
+            under = self.cdf(np.where(whole, targets + 0.5, targets))
+        else:
+            over = 1 - self.cdf(np.ceil(targets) - 1)
+            under = self.cdf(targets)
+        return np.where(is_over, over, under)
+
+
+def fit_distribution(values: np.ndarray, minutes: np.ndarray, column: str,
+                     half_life: float | None = RECENCY_HALF_LIFE, max_games: int = MAX_GAMES) -> StatDistribution | None:
+    """Fit the last `max_games` games played (most recent first). None without a game played."""
+    played = np.asarray(values, dtype=float)[np.asarray(minutes) > 0][:max_games]
+    if not len(played):
+        return None
+    weights = recency_weights(len(played), half_life)
+    weights = weights / weights.sum()
+    mean = float(weights @ played)
+    n_eff = 1 / float(weights @ weights)
+    variance = float(weights @ (played - mean) ** 2) * n_eff / max(n_eff - 1, 1)
+
+    if _uses_kernel(column):
+        bandwidth = max(1.06 * np.sqrt(variance) * n_eff ** -0.2, MIN_BANDWIDTH)
+        return StatDistribution("kde", mean, {"points": played, "weights": weights, "bandwidth": bandwidth},
+                                len(played))
+    if mean > 0 and variance > OVERDISPERSION * mean:
+        r = mean ** 2 / (variance - mean)
+        return StatDistribution("negbin", mean, {"r": r, "p": r / (r + mean)}, len(played))
+    return StatDistribution("poisson", mean, {}, len(played))
+
+
+class FitCache:
+    """
+    LRU of fits keyed by (player_id, column, latest game date, game count, half-life), so a
+    new game or a backfill of older ones misses. Thread-safe: API requests share `fit_cache`
+    from the threadpool.
+    """
+
+    def __init__(self, max_entries: int = FIT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._fits: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, logs: PlayerLogArrays, column: str, values: np.ndarray,
+            half_life: float | None = RECENCY_HALF_LIFE) -> StatDistribution | None:
+        if not len(logs):
+            return None
+        key = (logs.player_id, column, logs.game_dates[0], len(logs), half_life)
+        with self._lock:
+            if key in self._fits:
+                metrics.inc("cache_lookups_total", cache="fit", result="hit")
+                self._fits.move_to_end(key)
+                return self._fits[key]
+        metrics.inc("cache_lookups_total", cache="fit", result="miss")
+        fit = fit_distribution(values, logs.minutes, column, half_life)
+        with self._lock:
+            self._fits[key] = fit
+            if len(self._fits) > self.max_entries:
+                self._fits.popitem(last=False)
+        return fit
+
+    def clear(self):
+        with self._lock:
+            self._fits.clear()
+
+
+fit_cache = FitCache()
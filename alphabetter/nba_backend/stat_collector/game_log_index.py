@@ -0,0 +1,146 @@
+from dataclasses import dataclass, field
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+# Raw PlayerGameLog columns the calc path reads (every STAT_MAPPING column + fantasy score inputs).
+INDEXED_COLUMNS = ("pts", "reb", "oreb", "dreb", "ast", "stl", "blk", "tov", "fgm", "fga", "fg3m", "fg3a", "ftm", "fta")
+
+# PrizePicks fantasy score: weighted sum of the box score.
+FANTASY_SCORE_WEIGHTS = {"pts": 1, "reb": 1.2, "ast": 1.5, "blk": 3, "stl": 3, "tov": -1}
+
+# Combo / weighted stats, computed once per store load so every prop reads a single column.
+DERIVED_COLUMNS = {
+    "reb+ast": {"reb": 1, "ast": 1},
+    "pts+reb+ast": {"pts": 1, "reb": 1, "ast": 1},
+    "pts+ast": {"pts": 1, "ast": 1},
+    "pts+reb": {"pts": 1, "reb": 1},
+    "blk+stl": {"blk": 1, "stl": 1},
+    "fantasy_score": FANTASY_SCORE_WEIGHTS,
+}
+
+# Key columns of the game log index plus GAME_LOG_COVERED_COLUMNS, so the load is index-only on PostgreSQL.
+_STORE_COLUMNS = ("player_id", "game_date", "min", "matchup", *INDEXED_COLUMNS)
+_STORE_SELECT = "SELECT " + ", ".join(_STORE_COLUMNS) + " FROM player_game_log"
+_STORE_ORDER = " ORDER BY player_id, game_date DESC"
+
+
+@dataclass(slots=True)
+class PlayerLogArrays:
+    """One player's game logs as columnar arrays, ordered most recent game first."""
+    player_id: int
+    game_dates: np.ndarray  # datetime64[D]
+    minutes: np.ndarray
+    columns: dict[str, np.ndarray] = field(default_factory=dict)
+    matchups: np.ndarray | None = None
+
+    def __len__(self):
+        return len(self.minutes)
+
+    def column(self, name: str) -> np.ndarray:
+        if name in self.columns:
+            return self.columns[name]
+        return np.zeros(len(self))
+
+
+def column_name(stat) -> str:
+    """Store column for a STAT_MAPPING value: combos like ["pts", "reb"] read "pts+reb"."""
+    return "+".join(stat) if isinstance(stat, list) else stat
+
+
+def _derive(columns: dict[str, np.ndarray], weights: dict[str, float]) -> np.ndarray:
+    # Same term order as the per-game ORM formula, so both paths give identical floats.
+    total = np.zeros(len(next(iter(columns.values()))))
+    for col, weight in weights.items():
+        total = total + columns[col] * weight
+    return total
+
+
+def _with_derived(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    return {**columns, **{name: _derive(columns, weights) for name, weights in DERIVED_COLUMNS.items()}}
+
+
+def _empty_arrays(player_id: int) -> PlayerLogArrays:
+    return PlayerLogArrays(
+        player_id=player_id,
+        game_dates=np.array([], dtype="datetime64[D]"),
+        minutes=np.array([], dtype=float),
+        columns=_with_derived({col: np.array([], dtype=float) for col in INDEXED_COLUMNS}),
+        matchups=np.array([], dtype=object),
+    )
+
+
+class GameLogStore:
+    """
+    Game logs for many players as one contiguous NumPy array per column (no ORM objects),
+    plus the DERIVED_COLUMNS combos. Rows are grouped by player, most recent game first;
+    `player()` hands out zero-copy slices, so every prop of a player reads the same memory.
+    """
+    __slots__ = ("player_ids", "game_dates", "minutes", "matchups", "columns", "_ranges")
+
+    def __init__(self, player_ids: np.ndarray, game_dates: np.ndarray, minutes: np.ndarray,
+                 matchups: np.ndarray | None, columns: dict[str, np.ndarray]):
+        self.player_ids = player_ids
+        self.game_dates = game_dates
+        self.minutes = minutes
+        self.matchups = matchups
+        self.columns = columns
+        ids, starts, counts = np.unique(player_ids, return_index=True, return_counts=True)
+        self._ranges = {
+            int(player_id): (int(start), int(start + count))
+            for player_id, start, count in zip(ids, starts, counts)
+        }
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "GameLogStore":
+        """Rows of (player_id, game_date, min, matchup, *INDEXED_COLUMNS), already grouped by player."""
+        width = 4 + len(INDEXED_COLUMNS)
+        cols = list(zip(*rows)) if rows else [()] * width
+        return cls(
+            player_ids=np.array(cols[0], dtype=np.int64),
+            game_dates=np.array(cols[1], dtype="datetime64[D]"),
+            minutes=np.nan_to_num(np.array(cols[2], dtype=float)),  # NULL minutes count as DNP
+            matchups=np.array(cols[3], dtype=object),
+            columns=_with_derived(
+                {col: np.array(cols[4 + i], dtype=float) for i, col in enumerate(INDEXED_COLUMNS)}
+            ),
+        )
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def __contains__(self, player_id) -> bool:
+        return player_id in self._ranges
+
+    def player(self, player_id: int) -> PlayerLogArrays:
+        """One player's games as array views; empty arrays if the player has no logs."""
+        bounds = self._ranges.get(player_id)
+        if bounds is None:
+            return _empty_arrays(player_id)
+        rows = slice(*bounds)
+        return PlayerLogArrays(
+            player_id=player_id,
+            game_dates=self.game_dates[rows],
+            minutes=self.minutes[rows],
+            columns={col: values[rows] for col, values in self.columns.items()},
+            matchups=self.matchups[rows] if self.matchups is not None else None,
+        )
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store's arrays (matchup strings counted by length)."""
+        numeric = sum(a.nbytes for a in (self.player_ids, self.game_dates, self.minutes, *self.columns.values()))
+        if self.matchups is None:
+            return numeric
+        return numeric + self.matchups.nbytes + sum(len(m or "") for m in self.matchups)
+
+
+def load_game_log_store(session: Session, player_ids=None) -> GameLogStore:
+    """Load game logs (all players, or just `player_ids`) into a GameLogStore with one raw SQL query."""
+    if player_ids is None:
+        rows = session.execute(text(_STORE_SELECT + _STORE_ORDER)).all()
+    else:
+        stmt = text(_STORE_SELECT + " WHERE player_id IN :player_ids" + _STORE_ORDER).bindparams(
+            bindparam("player_ids", expanding=True)
+        )
+        rows = session.execute(stmt, {"player_ids": [int(pid) for pid in player_ids]}).all()
+    return GameLogStore.from_rows(rows)
@@ -0,0 +1,84 @@
+from sqlalchemy.orm import Session
+from alphabetter.nba_backend.models import HitRateCache
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.common.metrics import metrics
+from alphabetter.nba_backend.crud.bulk_ingest import dialect_insert
+from alphabetter.nba_backend.crud.player_gamelogs import fetch_latest_game_dates
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import calculate_stats_bulk
+from alphabetter.nba_backend.stat_collector.game_log_index import GameLogStore
+
+log = get_logger(__name__)
+
+RATE_FIELDS = ("l5_hit_rate", "l10_hit_rate", "l20_hit_rate", "last_percent_total", "last_percent_rate",
+               "dist_probability")
+
+
+def _cache_key(player_id, stat, target, over_under, last_game_date) -> tuple:
+    return int(player_id), stat, float(target), over_under, last_game_date
+
+
+def get_hit_rates(session: Session, props: list, store: GameLogStore | None = None) -> list[dict]:
+    """
+    Hit rates for `props` (anything with id, player_id, player_name, stat, target, over_under),
+    served from the hit_rate_cache table. Missing keys are computed once per distinct key
+    (from `store` when passed in), written to the cache and committed. Returns one stats dict
+    per prop, in order.
+    """
+    if not props:
+        return []
+
+    latest = fetch_latest_game_dates(session, {prop.player_id for prop in props})
+    prop_keys = {
+        prop.id: _cache_key(prop.player_id, prop.stat, prop.target, prop.over_under, latest.get(prop.player_id))
+        for prop in props
+    }
+
+    cached = {}
+    for row in session.query(HitRateCache).filter(HitRateCache.player_id.in_(list(latest))):
+        key = _cache_key(row.player_id, row.stat, row.target, row.over_under, row.last_game_date)
+        cached[key] = {field: getattr(row, field) for field in RATE_FIELDS}
+
+    # One representative prop per missing key; players without logs are never cached.
+    missing = {}
+    for prop in props:
+        key = prop_keys[prop.id]
+        if key not in cached and key not in missing:
+            missing[key] = prop
+
+    if missing:
+        computed = {
+            stats["prop_id"]: stats for stats in calculate_stats_bulk(session, list(missing.values()), store=store)
+        }
+        new_rows = []
+        for key, prop in missing.items():
+            cached[key] = {field: computed[prop.id][field] for field in RATE_FIELDS}
+            if key[-1] is not None:
+                player_id, stat, target, over_under, last_game_date = key
+                new_rows.append({
+                    "player_id": player_id,
+                    "stat": stat,
+                    "target": target,
+                    "over_under": over_under,
+                    "last_game_date": last_game_date,
+                    **cached[key],
+                })
+        if new_rows:
+            stmt = dialect_insert(session, HitRateCache.__table__).on_conflict_do_nothing(
+                index_elements=["player_id", "stat", "target", "over_under", "last_game_date"]
+            )
+            session.execute(stmt, new_rows)
+            session.commit()
+            metrics.inc("db_rows_written_total", len(new_rows), table="hit_rate_cache", op="insert")
+        log.info(f"Hit-rate cache: {len(props) - len(missing)} hits, {len(missing)} computed")
+    metrics.inc("cache_lookups_total", len(props) - len(missing), cache="hit_rate", result="hit")
+    metrics.inc("cache_lookups_total", len(missing), cache="hit_rate", result="miss")
+
+    return [
+        {
+            "player_id": prop.player_id,
+            "player_name": prop.player_name,
+            "prop_id": prop.id,
+            **cached[prop_keys[prop.id]],
+        }
+        for prop in props
+    ]
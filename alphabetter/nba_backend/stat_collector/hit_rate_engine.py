@@ -0,0 +1,190 @@
+import numpy as np
+
+# Lookback windows reported for every prop (L5 / L10 / L20).
+WINDOWS = (5, 10, 20)
+
+
+def hit_matrix(values: np.ndarray, targets: np.ndarray, over_under) -> np.ndarray:
+    """Return a bool matrix of hits. Same rule as `_is_hit`: over is >=, under is <= (push counts)."""
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    targets = np.asarray(targets, dtype=float).reshape(-1, 1)
+    is_over = (np.asarray(over_under) == "over").reshape(-1, 1)
+    return np.where(is_over, values >= targets, values <= targets)
+
+
+def _window_rates(hits: np.ndarray, active: np.ndarray) -> dict:
+    """
+    L5/L10/L20 rates from prefix sums. Windows count rows (DNPs included), rates only active games.
+    `active` is one shared column mask, or one mask per row.
+    """
+    n_games = hits.shape[1]
+    active = np.broadcast_to(active, hits.shape)
+    active_csum = np.cumsum(active, axis=1)
+    hit_csum = np.cumsum(hits & active, axis=1)
+
+    rates = {}
+    for window in WINDOWS:
+        if n_games == 0:
+            rates[window] = np.zeros(hits.shape[0])
+            continue
+        end = min(window, n_games) - 1
+        played = active_csum[:, end]
+        rates[window] = np.divide(hit_csum[:, end], played, out=np.zeros(hits.shape[0]), where=played > 0)
+    return rates
+
+
+def _last_percent_batch(hits: np.ndarray, lengths: np.ndarray | None = None):
+    """
+    Vectorized `last_percent` over the rows of an (active games only) hit matrix.
+    With `lengths`, row r only holds lengths[r] games; the columns after that are padding.
+    Returns (percent, hit_count, total) arrays describing the best window per row.
+    """
+    n_rows, n_games = hits.shape
+    if n_games == 0:
+        zeros = np.zeros(n_rows, dtype=int)
+        return np.zeros(n_rows), zeros, zeros
+
+    padding = np.zeros(hits.shape, dtype=bool)
+    if lengths is not None:
+        padding = np.arange(n_games) >= np.asarray(lengths).reshape(-1, 1)
+        hits = hits & ~padding
+
+    hit_csum = np.cumsum(hits, axis=1)
+    totals = np.arange(1, n_games + 1)
+    percent = hit_csum / totals
+
+    # A 100% window of <= 5 games only counts when the next two games are both misses
+    # (padding past the end of a row is never a miss).
+    padded = np.pad(hits | padding, ((0, 0), (0, 2)), constant_values=True)
+    followed_by_two_misses = ~padded[:, 1:n_games + 1] & ~padded[:, 2:n_games + 2]
+    short_perfect = (hit_csum == totals) & (totals <= 5)
+    valid = (totals > 1) & (~short_perfect | followed_by_two_misses) & ~padding
+
+    scored = np.where(valid, percent, -1.0)
+    best_percent = scored.max(axis=1)
+    # `last_percent` replaces the best on ties (>=), so take the last index holding the max.
+    best_idx = n_games - 1 - np.argmax((scored == best_percent[:, None])[:, ::-1], axis=1)
+
+    found = best_percent >= 0
+    rows = np.arange(n_rows)
+    best_hits = np.where(found, hit_csum[rows, best_idx], 0)
+    best_totals = np.where(found, best_idx + 1, 0)
+    return np.where(found, best_percent, 0.0), best_hits, best_totals
+
+
+def compute_hit_rates_batch(values, minutes, targets, over_under) -> list[dict]:
+    """
+    Compute L5/L10/L20 and last-% for every prop of one player in a single pass.
+
+    `values` is a (props x games) matrix of stat values, `minutes` the shared minutes
+    column, both ordered most recent game first. `targets`/`over_under` have one entry
+    per prop. Games with no minutes are excluded, exactly as `_calc_hit_rate` does.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    minutes = np.nan_to_num(np.asarray(minutes, dtype=float), nan=0.0)
+    active = minutes > 0
+
+    hits = hit_matrix(values, targets, over_under)
+    rates = _window_rates(hits, active)
+    lp_percent, lp_hits, lp_totals = _last_percent_batch(hits[:, active])
+
+    results = []
+    for row in range(values.shape[0]):
+        results.append({
+            "l5_hit_rate": float(rates[5][row]),
+            "l10_hit_rate": float(rates[10][row]),
+            "l20_hit_rate": float(rates[20][row]),
+            "last_percent_total": f"{int(lp_hits[row])}/{int(lp_totals[row])}",
+            # round like `last_percent`, then store as 0.882 not 88.2
+            "last_percent_rate": round(float(lp_percent[row]) * 100, 2) / 100,
+        })
+    return results
+
+
+def compute_hit_rates(values, minutes, target: float, over_under: str) -> dict:
+    """Single-prop wrapper around `compute_hit_rates_batch`."""
+    return compute_hit_rates_batch([values], minutes, [target], [over_under])[0]
+
+
+def compute_hit_rates_from(values, minutes, starts, targets, over_under) -> dict[str, np.ndarray]:
+    """
+    Point-in-time `compute_hit_rates_batch`: row r only sees the games from column starts[r]
+    on (e.g. the games before a board date, most recent first). One call covers every date
+    of a player. Returns one array per stat instead of a dict per prop.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    minutes = np.nan_to_num(np.asarray(minutes, dtype=float), nan=0.0)
+    n_rows, n_games = values.shape
+    if n_games == 0:
+        values, minutes = np.zeros((n_rows, 1)), np.zeros(1)
+        n_games = 1
+
+    # Shift every row left so its first visible game lands in column 0.
+    cols = np.asarray(starts, dtype=int).reshape(-1, 1) + np.arange(n_games)
+    visible = cols < n_games
+    cols = np.minimum(cols, n_games - 1)
+    shifted = np.take_along_axis(values, cols, axis=1)
+    active = (minutes[cols] > 0) & visible
+
+    hits = hit_matrix(shifted, targets, over_under)
+    rates = _window_rates(hits, active)
+    # last %: active games only, moved to the front of each row in order.
+    order = np.argsort(~active, axis=1, kind="stable")
+    lp_percent, lp_hits, lp_totals = _last_percent_batch(
+        np.take_along_axis(hits, order, axis=1), active.sum(axis=1)
+    )
+    return {
+        "l5_hit_rate": rates[5],
+        "l10_hit_rate": rates[10],
+        "l20_hit_rate": rates[20],
+        # round like `last_percent`, then store as 0.882 not 88.2
+        "last_percent_rate": np.array([round(p * 100, 2) / 100 for p in lp_percent.tolist()]),
+        "last_percent_hits": lp_hits,
+        "last_percent_games": lp_totals,
+    }
+
+
+# Games shorter than this are left out of per-minute rates: scaling a 4-minute cameo to 34
+# minutes is mostly noise.
+MIN_SCALED_MINUTES = 10.0
+
+
+def scale_to_minutes(values, minutes, to_minutes) -> np.ndarray:
+    """Per-game values re-scaled to `to_minutes` played (36 for per-36). 0 where nothing was played."""
+    values = np.asarray(values, dtype=float)
+    minutes = np.nan_to_num(np.asarray(minutes, dtype=float), nan=0.0)
+    return np.divide(values * to_minutes, minutes, out=np.zeros(np.broadcast_shapes(values.shape, minutes.shape)),
+                     where=minutes > 0)
+
+
+def compute_role_rates_batch(values, minutes, targets, over_under, role_games: int, projected_minutes: float) -> list[dict]:
+    """
+    Role-aware rates for every prop of one player (same inputs as `compute_hit_rates_batch`):
+    - per_minute_l10_hit_rate: the last 10 games of MIN_SCALED_MINUTES+, each scaled to the
+      role's projected minutes, so a garbage-time night and a full start count alike;
+    - role_last_percent_*: last % over the `role_games` most recent active games only.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    minutes = np.nan_to_num(np.asarray(minutes, dtype=float), nan=0.0)
+    n_rows = values.shape[0]
+
+    hits = hit_matrix(values[:, minutes > 0], targets, over_under)
+    lp_percent, lp_hits, lp_totals = _last_percent_batch(hits[:, :max(int(role_games), 0)])
+
+    scaled_games = (minutes >= MIN_SCALED_MINUTES).nonzero()[0][:WINDOWS[1]]
+    if len(scaled_games) and projected_minutes > 0:
+        scaled = scale_to_minutes(values[:, scaled_games], minutes[scaled_games], projected_minutes)
+        per_minute = hit_matrix(scaled, targets, over_under).mean(axis=1)
+    else:
+        per_minute = np.zeros(n_rows)
+
+    return [
+        {
+            "role_games": int(role_games),
+            "projected_minutes": round(float(projected_minutes), 1),
+            "per_minute_l10_hit_rate": float(per_minute[row]),
+            "role_last_percent_total": f"{int(lp_hits[row])}/{int(lp_totals[row])}",
+            "role_last_percent_rate": round(float(lp_percent[row]) * 100, 2) / 100,
+        }
+        for row in range(n_rows)
+    ]
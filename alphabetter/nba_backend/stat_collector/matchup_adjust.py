@@ -0,0 +1,272 @@
+"""
+Opponent-adjusted expected values and hit rates.
+
+`load_defense_table` turns team_info (one box score per team per game) into a small lookup
+table: for every team, what its opponents averaged against it (points, rebounds, assists,
+threes, ...) and a possessions-based pace proxy, each as a factor over the league average.
+The ESPN pipeline doesn't fill team_info, so without it the table comes from player_game_log
+instead: what the tracked players did against each team, relative to their own averages.
+It is built once per refresh; after that a prop's opponent factor is one dict lookup.
+
+A prop's last games are then re-scaled to tonight's opponent: each game's stat is divided
+by the factor of the defense it came against and multiplied by tonight's.
+"""
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.models import PlayerGameLog, TeamInfo
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import STAT_MAPPING, _get_stat_array
+from alphabetter.nba_backend.stat_collector.game_log_index import (
+    DERIVED_COLUMNS, INDEXED_COLUMNS, GameLogStore, PlayerLogArrays, column_name, load_game_log_store,
+)
+from alphabetter.nba_backend.stat_collector.hit_rate_engine import hit_matrix
+
+log = get_logger(__name__)
+
+# Stats with their own "allowed per game" factor; every other box-score column scales with pace.
+DEFENSE_COLUMNS = ("pts", "reb", "ast", "fg3m")
+DEFENSE_WINDOW_DAYS = 60  # about 30 games per team
+PRIOR_GAMES = 5  # shrink factors toward 1.0 (league average) as if from this many average games
+ADJUSTED_WINDOW = 10
+
+ADJUSTED_FIELDS = ("opp_factor", "opp_adj_expected", "opp_adj_l10_hit_rate")
+
+# ESPN game logs use short abbreviations; PrizePicks and stats.nba.com the three-letter ones.
+TEAM_ALIASES = {"GS": "GSW", "NY": "NYK", "SA": "SAS", "NO": "NOP", "UTAH": "UTA", "WSH": "WAS"}
+
+
+def normalize_team(abbreviation: str | None) -> str | None:
+    if not abbreviation:
+        return None
+    abbreviation = abbreviation.strip().upper()
+    return TEAM_ALIASES.get(abbreviation, abbreviation)
+
+
+def parse_matchup(matchup: str | None) -> tuple[str | None, str | None]:
+    """("OKC", "LAL") from "OKC vs. LAL" or "OKC @ LAL"; (None, None) if it doesn't parse."""
+    if not matchup:
+        return None, None
+    for separator in (" vs. ", " vs ", " @ "):
+        if separator in matchup:
+            team, opponent = matchup.split(separator, 1)
+            return normalize_team(team), normalize_team(opponent)
+    return None, None
+
+
+def _possessions(fga, oreb, tov, fta):
+    return fga - oreb + tov + 0.44 * fta
+
+
+class DefenseTable:
+    """
+    Per-team opponent factors. `allowed[team][col]` is what opponents averaged against the
+    team, `pace[team]` the average possessions of its games. `factor(team, column)` is the
+    precomputed multiplier for any store column (combos included), 1.0 for unknown teams.
+    """
+
+    __slots__ = ("allowed", "pace", "games", "league", "league_pace", "_factors")
+
+    def __init__(self, allowed: dict[str, dict[str, float]], pace: dict[str, float], games: dict[str, int]):
+        self.allowed = allowed
+        self.pace = pace
+        self.games = games
+        self.league = {
+            col: float(np.mean([team[col] for team in allowed.values()])) if allowed else 0.0
+            for col in INDEXED_COLUMNS
+        }
+        self.league_pace = float(np.mean(list(pace.values()))) if pace else 0.0
+        self._factors = {team: self._team_factors(team) for team in allowed}
+
+    def _shrunk(self, team: str, ratio: float) -> float:
+        n = self.games[team]
+        return (n * ratio + PRIOR_GAMES) / (n + PRIOR_GAMES)
+
+    def _raw_factor(self, team: str, col: str) -> float:
+        if col in DEFENSE_COLUMNS and self.league[col] > 0:
+            return self._shrunk(team, self.allowed[team][col] / self.league[col])
+        if self.league_pace > 0:
+            return self._shrunk(team, self.pace[team] / self.league_pace)
+        return 1.0
+
+    def _team_factors(self, team: str) -> dict[str, float]:
+        factors = {col: self._raw_factor(team, col) for col in INDEXED_COLUMNS}
+        # A combo moves with its parts in proportion to their league-average size.
+        for name, weights in DERIVED_COLUMNS.items():
+            baseline = sum(weight * self.league[col] for col, weight in weights.items())
+            scaled = sum(weight * self.league[col] * factors[col] for col, weight in weights.items())
+            factors[name] = scaled / baseline if baseline else 1.0
+        return factors
+
+    def factor(self, team: str | None, column: str) -> float:
+        return self._factors.get(normalize_team(team), {}).get(column, 1.0)
+
+    def __len__(self):
+        return len(self.allowed)
+
+
+def load_defense_table(session: Session, window_days: int = DEFENSE_WINDOW_DAYS) -> DefenseTable:
+    """
+    Defense table over the last `window_days` of games: from team_info box scores when there
+    are any, else from the player game logs.
+    """
+    latest = session.query(func.max(TeamInfo.game_date)).scalar()
+    if latest is not None:
+        return _team_info_defense(session, latest - timedelta(days=window_days))
+    latest = session.query(func.max(PlayerGameLog.game_date)).scalar()
+    if latest is None:
+        log.warning("⚠️ No team_info or game logs; opponent factors default to 1.0")
+        return DefenseTable({}, {}, {})
+    return _game_log_defense(session, latest - timedelta(days=window_days))
+
+
+def _team_info_defense(session: Session, since) -> DefenseTable:
+    """
+    One query over team_info: each team's row joined to its opponent's row of the same game
+    gives what the team allowed.
+    """
+    defense, offense = aliased(TeamInfo), aliased(TeamInfo)
+    rows = session.execute(
+        select(
+            defense.matchup,
+            defense.fga, defense.oreb, defense.tov, defense.fta, offense.fta,
+            *(getattr(offense, col) for col in INDEXED_COLUMNS),
+        )
+        .join(offense, (offense.game_id == defense.game_id) & (offense.team_id != defense.team_id))
+        .where(defense.game_date > since)
+    ).all()
+
+    fga, oreb, tov = (INDEXED_COLUMNS.index(col) for col in ("fga", "oreb", "tov"))
+    sums: dict[str, np.ndarray] = {}
+    possessions: dict[str, float] = {}
+    games: dict[str, int] = {}
+    for row in rows:
+        team, _ = parse_matchup(row[0])
+        if team is None:
+            continue
+        own = _possessions(*(value or 0.0 for value in row[1:5]))
+        allowed = np.array([value or 0.0 for value in row[6:]], dtype=float)
+        theirs = _possessions(allowed[fga], allowed[oreb], allowed[tov], row[5] or 0.0)
+        sums[team] = sums.get(team, 0.0) + allowed
+        possessions[team] = possessions.get(team, 0.0) + (own + theirs) / 2
+        games[team] = games.get(team, 0) + 1
+
+    table = DefenseTable(
+        allowed={team: dict(zip(INDEXED_COLUMNS, (total / games[team]).tolist())) for team, total in sums.items()},
+        pace={team: total / games[team] for team, total in possessions.items()},
+        games=games,
+    )
+    log.info(f"Defense table: {len(table)} teams from {len(rows)} team games")
+    return table
+
+
+def _game_log_defense(session: Session, since) -> DefenseTable:
+    """
+    One query over player_game_log (games played only). Only the board's players have logs,
+    so team totals would mostly measure who is tracked; instead, a team's factor is what the
+    players who faced it scored over what they average (sum over sum, so a star's games count
+    more than a bench player's). `allowed` is that ratio times the average tracked player
+    line, which keeps stats in proportion for combos; pace uses each player's possessions.
+    """
+    rows = session.execute(
+        select(PlayerGameLog.player_id, PlayerGameLog.game_date, PlayerGameLog.matchup,
+               *(getattr(PlayerGameLog, col) for col in INDEXED_COLUMNS))
+        .where(PlayerGameLog.game_date > since, PlayerGameLog.min > 0)
+    ).all()
+    parsed = [parse_matchup(row[2]) for row in rows]
+    rows = [row for row, (team, opponent) in zip(rows, parsed) if opponent is not None]
+    parsed = [matchup for matchup in parsed if matchup[1] is not None]
+    if not rows:
+        log.warning("⚠️ No parseable game log matchups; opponent factors default to 1.0")
+        return DefenseTable({}, {}, {})
+
+    values = np.array([[value or 0.0 for value in row[3:]] for row in rows], dtype=float)
+    fga, oreb, tov, fta = (INDEXED_COLUMNS.index(col) for col in ("fga", "oreb", "tov", "fta"))
+    values = np.column_stack([values, _possessions(values[:, fga], values[:, oreb], values[:, tov], values[:, fta])])
+
+    _, player = np.unique([row[0] for row in rows], return_inverse=True)
+    player_sums = np.zeros((player.max() + 1, values.shape[1]))
+    np.add.at(player_sums, player, values)
+    expected = (player_sums / np.bincount(player)[:, None])[player]
+
+    teams, opponent = np.unique([opponent for _, opponent in parsed], return_inverse=True)
+    teams = teams.tolist()
+    actual_sums = np.zeros((len(teams), values.shape[1]))
+    expected_sums = np.zeros((len(teams), values.shape[1]))
+    np.add.at(actual_sums, opponent, values)
+    np.add.at(expected_sums, opponent, expected)
+    ratio = np.divide(actual_sums, expected_sums, out=np.ones_like(actual_sums), where=expected_sums > 0)
+    scale = values.mean(axis=0)
+
+    games: dict[str, set] = {}
+    for row, (team, opp) in zip(rows, parsed):
+        games.setdefault(opp, set()).add((row[1], team))
+
+    table = DefenseTable(
+        allowed={team: dict(zip(INDEXED_COLUMNS, (ratio[i, :-1] * scale[:-1]).tolist())) for i, team in enumerate(teams)},
+        pace={team: float(ratio[i, -1] * scale[-1]) for i, team in enumerate(teams)},
+        games={team: len(games[team]) for team in teams},
+    )
+    log.info(f"Defense table: {len(table)} teams from {len(rows)} player games (no team_info)")
+    return table
+
+
+def adjusted_rates(logs: PlayerLogArrays, column: str, target: float, over_under: str,
+                   table: DefenseTable, opponent: str | None, past_factors: np.ndarray | None = None) -> dict:
+    """
+    Opponent factor, opponent-adjusted expected value (mean of the last ADJUSTED_WINDOW
+    games) and L10 hit rate for one prop. `past_factors` (the factor of each past game's
+    opponent for `column`) can be passed in when several props share a player and column.
+    """
+    factor = table.factor(opponent, column)
+    window = slice(0, ADJUSTED_WINDOW)  # like L10: the last 10 rows, rated over games played
+    active = logs.minutes[window] > 0
+    if not active.any():
+        return {"opp_factor": factor, "opp_adj_expected": None, "opp_adj_l10_hit_rate": None}
+    if past_factors is None:
+        past_factors = _past_factors(logs, column, table)
+    values = _get_stat_array(logs, column)[window][active] * factor / past_factors[window][active]
+    hits = hit_matrix(values, [target], [over_under])[0]
+    return {
+        "opp_factor": factor,
+        "opp_adj_expected": float(values.mean()),
+        "opp_adj_l10_hit_rate": float(hits.mean()),
+    }
+
+
+def _past_factors(logs: PlayerLogArrays, column: str, table: DefenseTable) -> np.ndarray:
+    games = logs.matchups[:ADJUSTED_WINDOW] if logs.matchups is not None else []
+    return np.array([table.factor(parse_matchup(matchup)[1], column) for matchup in games]
+                    + [1.0] * (min(len(logs), ADJUSTED_WINDOW) - len(games)))
+
+
+def add_matchup_adjustments(session: Session, props: list, stats_list: list[dict],
+                            table: DefenseTable | None = None, store: GameLogStore | None = None) -> list[dict]:
+    """
+    Add ADJUSTED_FIELDS to each stats dict (matched to `props` by prop_id). `props` need
+    id, player_id, stat, target, over_under and opponent. The defense table is loaded once
+    (and the game log store) unless passed in; each prop then costs one lookup plus a
+    10-game vector op.
+    """
+    if not props:
+        return stats_list
+    table = table if table is not None else load_defense_table(session)
+    store = store if store is not None else load_game_log_store(session, {prop.player_id for prop in props})
+
+    by_prop = {stats["prop_id"]: stats for stats in stats_list}
+    past: dict[tuple[int, str], np.ndarray] = {}
+    for prop in props:
+        stats = by_prop.get(prop.id)
+        if stats is None:
+            continue
+        logs = store.player(prop.player_id)
+        column = column_name(STAT_MAPPING.get(prop.stat, "pts"))
+        key = (prop.player_id, column)
+        if key not in past:
+            past[key] = _past_factors(logs, column, table)
+        stats.update(adjusted_rates(logs, column, prop.target, prop.over_under, table,
+                                    prop.opponent, past[key]))
+    return stats_list
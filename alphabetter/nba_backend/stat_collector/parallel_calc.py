@@ -0,0 +1,159 @@
+"""
+Parallel hit-rate evaluation for big slates and historical backfills.
+
+Props are sharded by player across a process pool. The game log arrays are published once
+into a shared memory block that every worker maps read-only (nothing is pickled but the
+prop specs and the result rows). Results stream back to the parent, the single writer,
+which upserts them in batches with `store_stats_bulk`.
+"""
+import heapq
+import time
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import (
+    calculate_and_store_stats_bulk,
+    player_stats,
+    store_stats_bulk,
+)
+from alphabetter.nba_backend.stat_collector.game_log_index import GameLogStore, load_game_log_store
+
+log = get_logger(__name__)
+
+SHARDS_PER_WORKER = 4  # smaller shards keep workers busy and results streaming to the writer
+FLUSH_ROWS = 5000  # result rows per bulk upsert
+_ALIGN = 64
+
+
+class PropSpec(NamedTuple):
+    """The prop fields a worker needs; ORM objects never cross the process boundary."""
+    id: int
+    player_id: int
+    player_name: str
+    stat: str
+    target: float
+    over_under: str
+
+
+def shard_by_player(props: list, n_shards: int) -> list[list[tuple[int, list[PropSpec]]]]:
+    """
+    Group props by player and spread the players over `n_shards` shards, biggest players
+    first onto the lightest shard, so shards carry about the same number of props.
+    """
+    by_player: dict[int, list[PropSpec]] = {}
+    for prop in props:
+        by_player.setdefault(prop.player_id, []).append(PropSpec(
+            prop.id, prop.player_id, prop.player_name, prop.stat, prop.target, prop.over_under,
+        ))
+    shards = [[] for _ in range(max(n_shards, 1))]
+    loads = [(0, i) for i in range(len(shards))]
+    for player_id, specs in sorted(by_player.items(), key=lambda item: -len(item[1])):
+        load, i = heapq.heappop(loads)
+        shards[i].append((player_id, specs))
+        heapq.heappush(loads, (load + len(specs), i))
+    return [shard for shard in shards if shard]
+
+
+def share_store(store: GameLogStore) -> tuple[SharedMemory, dict]:
+    """
+    Copy the store's numeric arrays into one shared memory block. Returns the block (the
+    caller closes and unlinks it) and the picklable layout `attach_store` needs.
+    Matchup strings are left out; the calc never reads them.
+    """
+    arrays = {
+        "player_ids": store.player_ids,
+        "game_dates": store.game_dates,
+        "minutes": store.minutes,
+        **{f"col:{name}": values for name, values in store.columns.items()},
+    }
+    layout, size = {}, 0
+    for name, values in arrays.items():
+        layout[name] = (size, values.dtype.str, len(values))
+        size += -(-values.nbytes // _ALIGN) * _ALIGN
+    shm = SharedMemory(create=True, size=max(size, 1))
+    for name, values in arrays.items():
+        offset, dtype, length = layout[name]
+        np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)[:] = values
+    return shm, {"name": shm.name, "layout": layout}
+
+
+def attach_store(spec: dict) -> tuple[SharedMemory, GameLogStore]:
+    """Map a block written by `share_store` as a GameLogStore (zero-copy views)."""
+    shm = SharedMemory(name=spec["name"])
+    views = {
+        name: np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)
+        for name, (offset, dtype, length) in spec["layout"].items()
+    }
+    store = GameLogStore(
+        player_ids=views["player_ids"],
+        game_dates=views["game_dates"],
+        minutes=views["minutes"],
+        matchups=None,
+        columns={name[4:]: values for name, values in views.items() if name.startswith("col:")},
+    )
+    return shm, store
+
+
+_worker_shm = None
+_worker_store = None
+
+
+def _init_worker(spec: dict):
+    global _worker_shm, _worker_store
+    # Pool workers share the parent's resource tracker, so attaching here doesn't hand
+    # ownership of the block to the worker; the parent still unlinks it.
+    _worker_shm, _worker_store = attach_store(spec)
+
+
+def _calc_shard(shard: list[tuple[int, list[PropSpec]]]) -> list[dict]:
+    rows = []
+    for player_id, specs in shard:
+        rows.extend(player_stats(_worker_store.player(player_id), specs))
+    return rows
+
+
+def calculate_and_store_stats_parallel(session: Session, props: list, workers: int,
+                                       flush_rows: int = FLUSH_ROWS) -> float:
+    """
+    Calculate and store stats for `props` on `workers` processes. Same results as
+    `calculate_and_store_stats_bulk` (which is used as-is for workers <= 1).
+    Returns props/second for calc + store.
+    """
+    if workers <= 1:
+        return calculate_and_store_stats_bulk(session, props)
+
+    start_time = time.time()
+    store = load_game_log_store(session, {prop.player_id for prop in props})
+    shards = shard_by_player(props, workers * SHARDS_PER_WORKER)
+    shm, spec = share_store(store)
+    log.info(f"Sharing {store.nbytes() / 1024 / 1024:.1f} MB of game logs with {workers} workers "
+          f"({len(shards)} shards)")
+    del store
+
+    pending, written = [], 0
+    try:
+        # spawn (not fork): workers start clean, without copies of the parent's DB connections.
+        with get_context("spawn").Pool(workers, initializer=_init_worker, initargs=(spec,)) as pool:
+            for rows in pool.imap_unordered(_calc_shard, shards):
+                pending.extend(rows)
+                if len(pending) >= flush_rows:
+                    store_stats_bulk(session, pending)
+                    written += len(pending)
+                    pending = []
+        if pending:
+            store_stats_bulk(session, pending)
+            written += len(pending)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    elapsed = time.time() - start_time
+    props_per_second = written / elapsed if elapsed > 0 else float("inf")
+    log.info(f"✅ Calculated and stored {written} props on {workers} workers "
+          f"in {elapsed:.2f}s ({props_per_second:.0f} props/s)")
+    return props_per_second
@@ -0,0 +1,192 @@
+"""
+Online role-change detection for the calc engine.
+
+A player's role is tracked with two one-sided CUSUM detectors per signal, over minutes and
+over a usage proxy (FGA + 0.44 FTA + TOV per 36). A sustained move away from the current
+role's mean (more than DRIFT per game, adding up past THRESHOLD) starts a new role at the
+first game of the move. Each game is one O(1) `RoleTracker.update`; the tracker state is
+kept per player in player_role_state, so a refresh only feeds the games it just ingested.
+
+The calc then restricts last-% to the current role and rates games normalized to the
+role's projected minutes (see `hit_rate_engine.compute_role_rates_batch`).
+"""
+from dataclasses import asdict, dataclass, field
+from datetime import date
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.common.metrics import metrics
+from alphabetter.nba_backend.crud.bulk_ingest import dialect_insert
+from alphabetter.nba_backend.models import PlayerRoleState
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import STAT_MAPPING, _get_stat_array
+from alphabetter.nba_backend.stat_collector.game_log_index import GameLogStore, PlayerLogArrays, load_game_log_store
+from alphabetter.nba_backend.stat_collector.hit_rate_engine import compute_role_rates_batch, scale_to_minutes
+
+log = get_logger(__name__)
+
+# Per signal: (drift, threshold). Minutes: +8 a night flags in 4 games, +12 in 2.
+MINUTES_CUSUM = (4.0, 16.0)
+USAGE_CUSUM = (3.0, 12.0)
+MIN_ROLE_GAMES = 3  # games to settle a role's baseline before looking for the next change
+
+ROLE_FIELDS = ("role_games", "projected_minutes", "per_minute_l10_hit_rate", "role_last_percent_total",
+               "role_last_percent_rate")
+
+
+def usage_per36(fga, fta, tov, minutes) -> np.ndarray:
+    """Possessions used per 36 minutes: FGA + 0.44 FTA + TOV."""
+    return scale_to_minutes(fga + 0.44 * fta + tov, minutes, 36)
+
+
+@dataclass(slots=True)
+class Cusum:
+    """Two-sided CUSUM against the running mean of the current role. `update` is O(1)."""
+    drift: float
+    threshold: float
+    n: int = 0
+    mean: float = 0.0
+    hi: float = 0.0
+    lo: float = 0.0
+    hi_run: int = 0
+    hi_sum: float = 0.0
+    lo_run: int = 0
+    lo_sum: float = 0.0
+
+    def update(self, x: float) -> int | None:
+        """Feed one game; on a change, returns how many of the latest games belong to the new role."""
+        if self.n >= MIN_ROLE_GAMES:
+            self.hi = max(0.0, self.hi + x - self.mean - self.drift)
+            self.lo = max(0.0, self.lo + self.mean - x - self.drift)
+            self.hi_run, self.hi_sum = (self.hi_run + 1, self.hi_sum + x) if self.hi > 0 else (0, 0.0)
+            self.lo_run, self.lo_sum = (self.lo_run + 1, self.lo_sum + x) if self.lo > 0 else (0, 0.0)
+            for run, total, level in ((self.hi_run, self.hi_sum, self.hi), (self.lo_run, self.lo_sum, self.lo)):
+                if level > self.threshold:
+                    # New role starts where the move began; its baseline is the games since.
+                    self.n, self.mean = run, total / run
+                    self.hi = self.lo = self.hi_sum = self.lo_sum = 0.0
+                    self.hi_run = self.lo_run = 0
+                    return run
+        self.n += 1
+        self.mean += (x - self.mean) / self.n
+        return None
+
+
+@dataclass(slots=True)
+class RoleTracker:
+    """A player's role state: games in the current role and its projected (mean) minutes."""
+    minutes: Cusum = field(default_factory=lambda: Cusum(*MINUTES_CUSUM))
+    usage: Cusum = field(default_factory=lambda: Cusum(*USAGE_CUSUM))
+    role_games: int = 0
+    last_game_date: date | None = None
+
+    @property
+    def projected_minutes(self) -> float:
+        return self.minutes.mean
+
+    def update(self, game_date: date, minutes: float, usage: float) -> bool:
+        """Feed the next game (oldest first). DNPs only move the date. Returns True on a role change."""
+        self.last_game_date = game_date
+        if minutes <= 0:
+            return False
+        self.role_games += 1
+        changes = [run for run in (self.minutes.update(minutes), self.usage.update(usage)) if run is not None]
+        if changes:
+            self.role_games = min(changes + [self.role_games])
+        return bool(changes)
+
+    def to_state(self) -> dict:
+        state = asdict(self)
+        state["last_game_date"] = self.last_game_date.isoformat() if self.last_game_date else None
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict) -> "RoleTracker":
+        return cls(
+            minutes=Cusum(**state["minutes"]),
+            usage=Cusum(**state["usage"]),
+            role_games=state["role_games"],
+            last_game_date=date.fromisoformat(state["last_game_date"]) if state["last_game_date"] else None,
+        )
+
+
+def feed_new_games(tracker: RoleTracker, logs: PlayerLogArrays) -> int:
+    """Feed the games after `tracker.last_game_date` (logs are most recent first). Returns how many."""
+    dates = logs.game_dates
+    if tracker.last_game_date is not None:
+        new = int(np.count_nonzero(dates > np.datetime64(tracker.last_game_date, "D")))
+    else:
+        new = len(dates)
+    usage = usage_per36(logs.column("fga")[:new], logs.column("fta")[:new], logs.column("tov")[:new],
+                        logs.minutes[:new])
+    for i in range(new - 1, -1, -1):
+        tracker.update(dates[i].astype(object), float(logs.minutes[i]), float(usage[i]))
+    return new
+
+
+def update_role_states(db: Session, player_ids, store: GameLogStore | None = None) -> dict[int, RoleTracker]:
+    """
+    Advance the stored role trackers of `player_ids` by the games they haven't seen and save
+    them in one upsert (does not commit). Returns {player_id: tracker}.
+    """
+    player_ids = {int(player_id) for player_id in player_ids}
+    if not player_ids:
+        return {}
+    store = store if store is not None else load_game_log_store(db, player_ids)
+    trackers = {
+        row.player_id: RoleTracker.from_state(row.state)
+        for row in db.query(PlayerRoleState).filter(PlayerRoleState.player_id.in_(player_ids))
+    }
+    rows, fed = [], 0
+    for player_id in player_ids:
+        tracker = trackers.setdefault(player_id, RoleTracker())
+        fed += feed_new_games(tracker, store.player(player_id))
+        rows.append({
+            "player_id": player_id,
+            "last_game_date": tracker.last_game_date,
+            "role_games": tracker.role_games,
+            "projected_minutes": tracker.projected_minutes,
+            "state": tracker.to_state(),
+        })
+    stmt = dialect_insert(db, PlayerRoleState.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["player_id"],
+        set_={col: stmt.excluded[col] for col in ("last_game_date", "role_games", "projected_minutes", "state")},
+    )
+    db.execute(stmt, rows)
+    metrics.inc("db_rows_written_total", len(rows), table="player_role_state", op="upsert")
+    log.info(f"Role trackers: {len(rows)} players advanced by {fed} games")
+    return trackers
+
+
+def add_role_windows(session: Session, props: list, stats_list: list[dict],
+                     store: GameLogStore | None = None) -> list[dict]:
+    """
+    Add ROLE_FIELDS to each stats dict (matched to `props` by prop_id). Advances the role
+    trackers of the props' players first, then rates every prop of a player in one batch.
+    """
+    if not props:
+        return stats_list
+    store = store if store is not None else load_game_log_store(session, {prop.player_id for prop in props})
+    trackers = update_role_states(session, {prop.player_id for prop in props}, store)
+
+    by_player: dict[int, list] = {}
+    for prop in props:
+        by_player.setdefault(int(prop.player_id), []).append(prop)
+    by_prop = {stats["prop_id"]: stats for stats in stats_list}
+    for player_id, player_props in by_player.items():
+        logs = store.player(player_id)
+        tracker = trackers[player_id]
+        rates = compute_role_rates_batch(
+            [_get_stat_array(logs, STAT_MAPPING.get(prop.stat, "pts")) for prop in player_props],
+            logs.minutes,
+            [prop.target for prop in player_props],
+            [prop.over_under for prop in player_props],
+            tracker.role_games,
+            tracker.projected_minutes,
+        )
+        for prop, role_rates in zip(player_props, rates):
+            if prop.id in by_prop:
+                by_prop[prop.id].update(role_rates)
+    return stats_list
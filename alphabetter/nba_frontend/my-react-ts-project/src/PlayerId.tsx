@@ -4,7 +4,7 @@ import axios from 'axios';
 function PlayerId() {
   const [playerName, setPlayerName] = useState('');
   const [playerId, setPlayerId] = useState<number | null>(null);
-  const [props, setProps] = useState([]);
+  const [suggestions, setSuggestions] = useState<string[]>([]);
   const [error, setError] = useState<string | null>(null);
 
   const handleChange = (e: React.ChangeEvent<HTMLInputElement>) => {
@@ -17,12 +17,12 @@ function PlayerId() {
       .then(response => {
         if (response.data.error) {
           setError(response.data.error);
-          setProps(response.data.props);
+          setSuggestions(response.data.suggestions || []);
           setPlayerId(null);
         } else {
           setPlayerId(response.data.player_id);
           setError(null);
-          setProps([]);
+          setSuggestions([]);
         }
       })
       .catch(error => {
@@ -40,12 +40,12 @@ function PlayerId() {
       </form>
       {error && <p>{error}</p>}
       {playerId && <p>Player ID: {playerId}</p>}
-      {props.length > 0 && (
+      {suggestions.length > 0 && (
         <div>
-          <h2>Props</h2>
+          <h2>Did you mean</h2>
           <ul>
-            {props.map((prop: any, index: number) => (
-              <li key={index}>{prop}</li>
+            {suggestions.map((name: string) => (
+              <li key={name}>{name}</li>
             ))}
           </ul>
         </div>
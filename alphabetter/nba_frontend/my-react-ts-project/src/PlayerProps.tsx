@@ -29,28 +29,19 @@ function PlayerProps() {
   // Fetch props and stats
   // useEffect Run this once when the component loads.
   useEffect(() => {
-    // Fetch props
+    // Fetch props joined with their calculated stats in one request
     axios
-      .get('http://127.0.0.1:8000/api/props')
-      .then((response) => {
-        setProps(response.data.props);
-      })
-      .catch((error) => {
-        console.error('Error fetching props:', error);
-      });
-
-    // Fetch stats
-    axios
-      .get('http://127.0.0.1:8000/api/player-stats-calculated')
+      .get('http://127.0.0.1:8000/api/props-with-stats')
       .then((response) => {
         const statsMap = {};
-        response.data.stats.forEach((stat) => {
-          statsMap[stat.prop_id] = stat; // Map stats by prop_id for easy lookup
+        response.data.props.forEach((prop) => {
+          statsMap[prop.id] = prop; // Each row carries its own l5/l10/l20/last% fields
         });
+        setProps(response.data.props);
         setStats(statsMap);
       })
       .catch((error) => {
-        console.error('Error fetching stats:', error);
+        console.error('Error fetching props:', error);
       });
   }, []);
 
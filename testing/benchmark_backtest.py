@@ -0,0 +1,67 @@
+"""
+Time a full-season backtest replay: one synthetic board per game day, every player on it
+with several props, against a seeded league of game logs.
+
+    python testing/benchmark_backtest.py
+    python testing/benchmark_backtest.py --players 450 --props-per-player 8
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from alphabetter.nba_backend.models import Base
+from alphabetter.nba_backend.stat_collector.backtest import BoardProp, backtest_report, print_report, replay
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import STAT_MAPPING
+from alphabetter.nba_backend.stat_collector.game_log_index import load_game_log_store
+from benchmark_game_log_query import _season_dates, seed_league
+
+
+def synthetic_boards(players: int, props_per_player: int, seed: int = 5) -> list[BoardProp]:
+    rng = random.Random(seed)
+    # seed_league's last season starts 2024-10-22; one board per game day of it
+    return [
+        BoardProp(day, player_id, f"Player {player_id}", rng.choice(list(STAT_MAPPING)),
+                  rng.choice([2.5, 8.5, 15.5, 22.5, 35.5]), rng.choice(["over", "under"]))
+        for day in _season_dates(date(2024, 10, 22), 82)
+        for player_id in range(1, players + 1)
+        for _ in range(props_per_player)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a full-season backtest replay")
+    parser.add_argument("--players", type=int, default=450)
+    parser.add_argument("--seasons", type=int, default=2)
+    parser.add_argument("--props-per-player", type=int, default=6)
+    parser.add_argument("--report", action="store_true", help="Print the full calibration / ROI report")
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}")
+    Base.metadata.create_all(engine)
+    seed_league(engine, args.players, args.seasons)
+    props = synthetic_boards(args.players, args.props_per_player)
+
+    with Session(engine) as db:
+        start = time.perf_counter()
+        store = load_game_log_store(db)
+        loaded = time.perf_counter()
+        results = replay(store, props)
+        replayed = time.perf_counter()
+        report = backtest_report(results)
+        done = time.perf_counter()
+
+    print(f"{len(props)} props on 82 boards ({report['props']} settled)")
+    print(f"load {loaded - start:.2f}s | replay {replayed - loaded:.2f}s | report {done - replayed:.2f}s "
+          f"| {len(props) / (done - start):.0f} props/s overall")
+    if args.report:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark the hot player_game_log query (`last N games for player X`) before and after the
+composite (player_id, game_date DESC) index migration.
+
+Seeds a synthetic multi-season league into a scratch database with the legacy indexes
+(single-column player_id, no uniqueness), measures, applies `run_migrations`, measures again.
+
+    python testing/benchmark_game_log_query.py                       # SQLite scratch file
+    python testing/benchmark_game_log_query.py --database-url postgresql://.../nba_bench
+
+Never point --database-url at a database you care about: player_game_log is dropped and re-seeded.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from alphabetter.nba_backend.crud.bulk_ingest import bulk_ingest, rows_to_columns
+from alphabetter.nba_backend.migrations import run_migrations
+from alphabetter.nba_backend.models import PlayerGameLog
+
+STAT_COLUMNS = ("min", "pts", "oreb", "dreb", "reb", "ast", "stl", "blk", "tov", "fgm", "fga", "fg_pct",
+                "fg3m", "fg3a", "fg3_pct", "ftm", "fta", "ft_pct")
+LAST_N_QUERY = text(
+    "SELECT * FROM player_game_log WHERE player_id = :player_id ORDER BY game_date DESC LIMIT :n"
+)
+
+
+def _season_dates(season_start: date, games: int) -> list[date]:
+    return [season_start + timedelta(days=2 * i) for i in range(games)]
+
+
+def seed_league(engine, players: int, seasons: int, games_per_season: int = 82, seed: int = 7):
+    """Recreate player_game_log with the legacy indexes and fill it with synthetic games."""
+    rng = random.Random(seed)
+    PlayerGameLog.__table__.drop(engine, checkfirst=True)
+    PlayerGameLog.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS uq_player_game_log_player_date_desc"))
+        conn.execute(text("CREATE INDEX ix_player_game_log_player_id ON player_game_log (player_id)"))
+
+    # Insert season by season, all players interleaved, like nightly ingestion does.
+    with Session(engine) as db:
+        for season in range(seasons):
+            dates = _season_dates(date(2025 - seasons + season, 10, 22), games_per_season)
+            for game_date in dates:
+                rows = []
+                for player_id in range(1, players + 1):
+                    row = {col: round(rng.uniform(0, 30), 1) for col in STAT_COLUMNS}
+                    rows.append({"player_id": player_id, "team_id": player_id % 30, "game_date": game_date,
+                                 "matchup": "AAA vs. BBB", **row})
+                # Legacy schema has no (player_id, game_date) key; the primary key is the only arbiter.
+                bulk_ingest(db, PlayerGameLog, rows_to_columns(rows), ("id",))
+            db.commit()
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE player_game_log"))
+        else:
+            conn.execute(text("ANALYZE"))
+
+
+def measure(engine, players: int, n: int, iterations: int, seed: int = 11) -> dict:
+    rng = random.Random(seed)
+    latencies = []
+    with engine.connect() as conn:
+        for _ in range(iterations):
+            player_id = rng.randint(1, players)
+            start = time.perf_counter()
+            conn.execute(LAST_N_QUERY, {"player_id": player_id, "n": n}).all()
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000,
+    }
+
+
+def explain(engine, n: int) -> str:
+    prefix = "EXPLAIN" if engine.dialect.name == "postgresql" else "EXPLAIN QUERY PLAN"
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"{prefix} {LAST_N_QUERY.text}"), {"player_id": 1, "n": n}).all()
+    return "\n".join(f"    {row[-1]}" for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark last-N game log query before/after the composite index")
+    parser.add_argument("--database-url", default=None, help="Scratch database (default: temporary SQLite file)")
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--n", type=int, default=20, help="Games per query (LIMIT)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}"
+    engine = create_engine(url)
+
+    start = time.perf_counter()
+    seed_league(engine, args.players, args.seasons)
+    print(f"Seeded {args.players} players x {args.seasons} seasons x 82 games in {time.perf_counter() - start:.1f}s")
+
+    print("Before (player_id index only):")
+    print(explain(engine, args.n))
+    before = measure(engine, args.players, args.n, args.iterations)
+
+    run_migrations(engine)
+    print("After (player_id, game_date DESC):")
+    print(explain(engine, args.n))
+    after = measure(engine, args.players, args.n, args.iterations)
+
+    print(f"Last-{args.n} query  before: p50 {before['p50_ms']:.3f} ms | p99 {before['p99_ms']:.3f} ms")
+    print(f"Last-{args.n} query  after:  p50 {after['p50_ms']:.3f} ms | p99 {after['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
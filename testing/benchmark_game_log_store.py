@@ -0,0 +1,103 @@
+"""
+Benchmark the hit-rate calc over a full board: ORM path (PlayerGameLog objects + getattr per game)
+vs. the columnar GameLogStore (one raw query into per-column NumPy arrays).
+
+Reports load time, peak Python memory while loading (tracemalloc) and calc time for every prop.
+
+    python testing/benchmark_game_log_store.py
+    python testing/benchmark_game_log_store.py --players 500 --seasons 3 --props-per-player 8
+"""
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from alphabetter.nba_backend.models import Base, PlayerGameLog, PrizePicksProp
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import (
+    STAT_MAPPING, _get_stat_array, _hit_rates_from_games,
+)
+from alphabetter.nba_backend.stat_collector.hit_rate_engine import compute_hit_rates
+from alphabetter.nba_backend.stat_collector.game_log_index import load_game_log_store
+from benchmark_game_log_query import seed_league
+
+
+def seed_props(db: Session, players: int, per_player: int, seed: int = 3) -> list[PrizePicksProp]:
+    rng = random.Random(seed)
+    props = [
+        PrizePicksProp(player_name=f"Player {player_id}", player_id=player_id, stat=rng.choice(list(STAT_MAPPING)),
+                       target=rng.choice([1.5, 5.5, 12.5, 24.5]), over_under=rng.choice(["over", "under"]),
+                       odds_type="standard")
+        for player_id in range(1, players + 1) for _ in range(per_player)
+    ]
+    db.add_all(props)
+    db.commit()
+    return props
+
+
+def _timed(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def orm_path(db: Session, props: list) -> tuple[float, int, float]:
+    def load():
+        games_by_player = defaultdict(list)
+        for game in db.query(PlayerGameLog).order_by(PlayerGameLog.player_id, PlayerGameLog.game_date.desc()):
+            games_by_player[game.player_id].append(game)
+        return games_by_player
+
+    games_by_player, load_s, peak = _timed(load)
+    start = time.perf_counter()
+    for prop in props:
+        _hit_rates_from_games(games_by_player[prop.player_id], prop.target, prop.over_under, STAT_MAPPING[prop.stat])
+    return load_s, peak, time.perf_counter() - start
+
+
+def store_path(db: Session, props: list) -> tuple[float, int, float, int]:
+    store, load_s, peak = _timed(lambda: load_game_log_store(db))
+    start = time.perf_counter()
+    for prop in props:
+        logs = store.player(prop.player_id)
+        compute_hit_rates(_get_stat_array(logs, STAT_MAPPING[prop.stat]), logs.minutes, prop.target, prop.over_under)
+    return load_s, peak, time.perf_counter() - start, store.nbytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ORM vs columnar GameLogStore for the hit-rate calc")
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--seasons", type=int, default=2)
+    parser.add_argument("--props-per-player", type=int, default=6)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}")
+    Base.metadata.create_all(engine)
+    seed_league(engine, args.players, args.seasons)
+    with Session(engine) as db:
+        props = len(seed_props(db, args.players, args.props_per_player))
+        rows = db.query(PlayerGameLog).count()
+    print(f"Seeded {rows} game logs, {props} props")
+
+    # Fresh session per path so neither reuses the other's identity map.
+    with Session(engine) as db:
+        orm_load, orm_peak, orm_calc = orm_path(db, db.query(PrizePicksProp).all())
+    with Session(engine) as db:
+        store_load, store_peak, store_calc, store_bytes = store_path(db, db.query(PrizePicksProp).all())
+
+    print(f"ORM:   load {orm_load:.2f}s | peak {orm_peak / 2**20:.1f} MB | calc {orm_calc:.2f}s")
+    print(f"Store: load {store_load:.2f}s | peak {store_peak / 2**20:.1f} MB | calc {store_calc:.2f}s "
+          f"| arrays {store_bytes / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Line-movement history query (`every snapshot of player X / stat Y`) as prop_snapshots grows.
+Seeds a synthetic archive of boards (every player x stat, several captures a day) and times
+`crud.snapshots.line_history` at each size.
+
+    python testing/benchmark_line_history.py
+    python testing/benchmark_line_history.py --sizes 250000 1000000 3000000
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from alphabetter.nba_backend.crud.snapshots import line_history
+from alphabetter.nba_backend.models import Base, PropSnapshot
+
+STATS = ("Points", "Rebounds", "Assists", "Pts+Rebs+Asts", "3-PT Made", "Fantasy Score")
+
+
+def grow_archive(engine, rows_wanted: int, players: int, state: dict):
+    """Append captures (4 a day, every player x stat) until the table holds `rows_wanted` rows."""
+    rng = random.Random(len(state))
+    with Session(engine) as db:
+        while state["rows"] < rows_wanted:
+            board_ts = state["next_ts"]
+            rows = [
+                {"board_ts": board_ts, "player_id": player_id, "stat": stat, "odds_type": "standard",
+                 "over_under": "over", "target": rng.choice([4.5, 12.5, 24.5]), "player_name": f"Player {player_id}",
+                 "granularity": "intraday", "l10_hit_rate": rng.random()}
+                for player_id in range(1, players + 1) for stat in STATS
+            ]
+            db.execute(insert(PropSnapshot), rows)
+            state["rows"] += len(rows)
+            state["next_ts"] = board_ts + timedelta(hours=6)
+        db.commit()
+
+
+def measure(engine, players: int, iterations: int) -> tuple[float, float]:
+    rng = random.Random(1)
+    latencies, returned = [], []
+    with Session(engine) as db:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            rows = line_history(db, rng.randint(1, players), rng.choice(STATS))
+            latencies.append(time.perf_counter() - start)
+            returned.append(len(rows))
+    return statistics.median(latencies) * 1000, statistics.mean(returned)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark line-history queries as the snapshot archive grows")
+    parser.add_argument("--players", type=int, default=450)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 500_000, 2_000_000])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}")
+    Base.metadata.create_all(engine)
+    state = {"rows": 0, "next_ts": datetime(2024, 10, 22, 14)}
+    for size in args.sizes:
+        grow_archive(engine, size, args.players, state)
+        p50_ms, per_query = measure(engine, args.players, args.iterations)
+        print(f"{state['rows']:>9} rows: line_history p50 {p50_ms:.2f} ms ({per_query:.0f} snapshots per query)")
+
+
+if __name__ == "__main__":
+    main()
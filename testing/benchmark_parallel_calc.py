@@ -0,0 +1,76 @@
+"""
+Benchmark `calculate_and_store_stats_parallel` against the in-process bulk path as the worker
+count grows. Models a historical backfill: one full board per day of the season stacked up,
+so every player carries hundreds of prop snapshots.
+
+    python testing/benchmark_parallel_calc.py                      # workers 1, 2, 4, ... up to cpu_count
+    python testing/benchmark_parallel_calc.py --workers 1 2 8 --props-per-player 400
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from alphabetter.nba_backend.models import Base, PlayerStatsCalculated, PrizePicksProp
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import STAT_MAPPING
+from alphabetter.nba_backend.stat_collector.parallel_calc import calculate_and_store_stats_parallel
+from benchmark_game_log_query import seed_league
+
+
+def seed_snapshots(engine, players: int, per_player: int, seed: int = 3):
+    rng = random.Random(seed)
+    rows = [
+        {"player_name": f"Player {player_id}", "player_id": player_id, "stat": rng.choice(list(STAT_MAPPING)),
+         "target": rng.choice([1.5, 5.5, 12.5, 24.5, 38.5]), "over_under": rng.choice(["over", "under"]),
+         "odds_type": "standard"}
+        for player_id in range(1, players + 1) for _ in range(per_player)
+    ]
+    with Session(engine) as db:
+        db.execute(insert(PrizePicksProp), rows)
+        db.commit()
+
+
+def _default_workers() -> list[int]:
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel hit-rate calc scaling with worker count")
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--seasons", type=int, default=2)
+    parser.add_argument("--props-per-player", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}")
+    Base.metadata.create_all(engine)
+    seed_league(engine, args.players, args.seasons)
+    seed_snapshots(engine, args.players, args.props_per_player)
+    print(f"Seeded {args.players * args.props_per_player} prop snapshots, cpu_count={os.cpu_count()}")
+
+    results = []
+    for workers in args.workers or _default_workers():
+        with Session(engine) as db:
+            db.query(PlayerStatsCalculated).delete()
+            db.commit()
+            props = db.query(PrizePicksProp).all()
+            start = time.perf_counter()
+            calculate_and_store_stats_parallel(db, props, workers=workers)
+            results.append((workers, time.perf_counter() - start, len(props)))
+
+    baseline = results[0][1]
+    for workers, elapsed, n_props in results:
+        print(f"workers={workers:>2}: {elapsed:6.2f}s | {n_props / elapsed:8.0f} props/s | x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Slip optimizer search time on a full-slate candidate list. Builds synthetic legs (a 10-game
+slate: 30 teams' worth of players x several lines each) and times `optimize_slips` for
+each beam width, reporting how close the best slip comes to the widest beam's.
+
+    python testing/benchmark_slip_optimizer.py
+    python testing/benchmark_slip_optimizer.py --legs 3000 --beam-widths 50 200 1000
+"""
+import argparse
+import random
+import time
+
+from alphabetter.nba_backend.services.slip_optimizer import ODDS_TYPE_PAYOUT_FACTOR, Leg, optimize_slips
+from alphabetter.nba_backend.models import OddsType
+
+PROPS_PER_PLAYER = 6
+
+
+def synthetic_legs(n_legs: int, seed: int = 0) -> list[Leg]:
+    rng = random.Random(seed)
+    teams = [f"T{t:02d}" for t in range(30)]
+    legs = []
+    for prop_id in range(n_legs):
+        player_id = prop_id // PROPS_PER_PLAYER
+        team_index = player_id % len(teams)
+        opponent = teams[team_index ^ 1]  # T00 plays T01, T02 plays T03, ...
+        odds_type = rng.choice([OddsType.STANDARD] * 4 + [OddsType.GOBLIN, OddsType.DEMON])
+        legs.append(Leg(
+            prop_id=prop_id, player_id=player_id, player_name=f"Player {player_id}", stat="Points",
+            target=20.5, over_under="over", odds_type=odds_type.value, team=teams[team_index],
+            game="-".join(sorted((teams[team_index], opponent))), probability=rng.betavariate(5, 4),
+            payout_factor=ODDS_TYPE_PAYOUT_FACTOR[odds_type],
+        ))
+    return legs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the slip optimizer beam search")
+    parser.add_argument("--legs", type=int, default=1500)
+    parser.add_argument("--beam-widths", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--objective", choices=["probability", "ev"], default="ev")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    legs = synthetic_legs(args.legs)
+    results = {}
+    for beam_width in sorted(args.beam_widths):
+        start_time = time.time()
+        slips = optimize_slips(legs, 2, 6, args.top, args.objective, max_per_team=2, max_per_game=3,
+                               beam_width=beam_width)
+        elapsed = time.time() - start_time
+        best = slips[0].probability * slips[0].payout if args.objective == "ev" else slips[0].probability
+        results[beam_width] = best
+        print(f"beam {beam_width:>5}: {elapsed * 1000:8.1f} ms  best {args.objective} {best:.4f} "
+              f"({len(slips[0].legs)} legs)")
+
+    widest = results[max(results)]
+    for beam_width, best in results.items():
+        print(f"beam {beam_width:>5}: {best / widest:.2%} of the widest beam's best slip")
+
+
+if __name__ == "__main__":
+    main()
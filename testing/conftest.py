@@ -0,0 +1,226 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from alphabetter.nba_backend.database import Base
+import alphabetter.nba_backend.models  # noqa: F401  (registers tables on Base)
+
+
+@pytest.fixture(autouse=True)
+def http_cache_dir(tmp_path, monkeypatch):
+    """Every test gets its own on-disk HTTP cache (never the repo's .http_cache)."""
+    cache_dir = tmp_path / "http_cache"
+    monkeypatch.setenv("HTTP_CACHE_DIR", str(cache_dir))
+    monkeypatch.delenv("HTTP_CACHE_OFFLINE", raising=False)
+    return cache_dir
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """
+    sessionmaker bound to a throwaway SQLite file with every table created. A file (not
+    :memory:) so the pipeline and the API threads see the same data.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def db_session(session_factory):
+    """Session on the test database (a throwaway SQLite file) with every table created."""
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def seed_game_logs(db_session):
+    """
+    Fills db_session with random data and commits. Call it with the sizes a test needs:
+    `n_players` players (ids 1..n) with `n_games` games each, `days_between` days apart from
+    `start`, and `props_per_player` random props each plus one prop for a player without logs
+    (id 999). Same `random_seed`, same data.
+    """
+    from alphabetter.nba_backend.models import PlayerGameLog, PrizePicksProp
+    from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import STAT_MAPPING
+
+    def seed(n_players: int, n_games: int, props_per_player: int = 0, days_between: int = 1,
+             start: date = date(2025, 1, 1), random_seed: int = 7):
+        rng = random.Random(random_seed)
+        for player_id in range(1, n_players + 1):
+            for g in range(n_games):
+                db_session.add(PlayerGameLog(
+                    player_id=player_id, team_id=1, game_date=start + timedelta(days=days_between * g),
+                    matchup="AAA vs. BBB", min=rng.choice([0, 18, 30, 36]), pts=rng.randint(0, 40),
+                    oreb=0, dreb=0, reb=rng.randint(0, 14), ast=rng.randint(0, 12), stl=rng.randint(0, 4),
+                    blk=rng.randint(0, 4), tov=rng.randint(0, 6), fgm=0, fga=0, fg_pct=0,
+                    fg3m=rng.randint(0, 6), fg3a=0, fg3_pct=0, ftm=0, fta=0, ft_pct=0,
+                ))
+            for _ in range(props_per_player):
+                db_session.add(PrizePicksProp(
+                    player_name=f"Player {player_id}", player_id=player_id, stat=rng.choice(list(STAT_MAPPING)),
+                    target=rng.choice([1.5, 5.5, 12, 24.5]), over_under=rng.choice(["over", "under"]),
+                    odds_type="standard",
+                ))
+        if props_per_player:
+            db_session.add(PrizePicksProp(player_name="Nobody", player_id=999, stat="Points", target=10.5,
+                                          over_under="over", odds_type="standard"))
+        db_session.commit()
+
+    return seed
+
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class StubServer:
+    """
+    Local HTTP server that replays recorded JSON. `routes` maps a URL path (with or
+    without its query string) to a fixture file (relative to testing/fixtures). Sends an ETag per body and answers a
+    matching If-None-Match with 304. Keeps simple request statistics.
+    """
+
+    def __init__(self, routes: dict, delay: float = 0.0):
+        self.routes = routes
+        self.delay = delay
+        self.requests = []
+        self.client_ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append(self.path)
+                    stub.client_ports.add(self.client_address[1])
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    time.sleep(stub.delay)
+                    fixture = stub.routes.get(self.path) or stub.routes.get(self.path.split("?")[0])
+                    if fixture is None:
+                        body, status = b'{"error": "not found"}', 404
+                    else:
+                        body, status = (FIXTURES_DIR / fixture).read_bytes(), 200
+                    etag = f'"{hashlib.md5(body).hexdigest()}"'
+                    if status == 200 and self.headers.get("If-None-Match") == etag:
+                        with stub._lock:
+                            stub.not_modified += 1
+                        body, status = b"", 304
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def espn_stub(monkeypatch):
+    """Stub ESPN server with 2 teams / 4 players; ESPN URLs are pointed at it."""
+    from alphabetter.nba_backend import fetch_player_stats_espn as espn
+
+    routes = {"/teams": "espn/teams.json"}
+    for fixture in (FIXTURES_DIR / "espn").glob("roster_*.json"):
+        team_id = fixture.stem.split("_")[1]
+        routes[f"/teams/{team_id}/roster"] = f"espn/{fixture.name}"
+    for fixture in (FIXTURES_DIR / "espn").glob("gamelog_*.json"):
+        athlete_id = fixture.stem.split("_")[1]
+        routes[f"/athletes/{athlete_id}/gamelog"] = f"espn/{fixture.name}"
+
+    with StubServer(routes, delay=0.05) as server:
+        monkeypatch.setattr(espn, "ESPN_TEAMS_URL", server.base_url + "/teams")
+        monkeypatch.setattr(espn, "ESPN_ROSTER_URL", server.base_url + "/teams/{team_id}/roster")
+        monkeypatch.setattr(espn, "ESPN_GAMELOG_URL", server.base_url + "/athletes/{athlete_id}/gamelog")
+        yield server
+
+
+@pytest.fixture
+def pipeline_env(monkeypatch, session_factory, espn_stub):
+    """
+    Runs fetch_and_calculate_all against SQLite, the ESPN stub and a recorded
+    PrizePicks board. Yields the session factory.
+    """
+    from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+
+    board = json.loads((FIXTURES_DIR / "prizepicks" / "board.json").read_text())
+
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(pipeline, "fetch_board_pages", lambda: [board])
+    monkeypatch.setattr(pipeline, "get_db", _get_db)
+    yield session_factory
+
+
+@pytest.fixture
+def api_client(session_factory):
+    """FastAPI TestClient with `get_db` on the SQLite test database."""
+    from fastapi.testclient import TestClient
+    from alphabetter.nba_backend.database import get_db
+    from alphabetter.nba_backend.main import app, response_cache
+
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    response_cache.clear()  # every test starts a fresh database at dataset version 0
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,88 @@
+"""
+Concurrent load test for the read API. Run against a live server, e.g.
+
+    uvicorn alphabetter.nba_backend.main:app --port 8000
+    python testing/load_test_api.py --url http://127.0.0.1:8000 --concurrency 50 --requests 2000
+
+`--bust-cache` adds a unique query param per request so every call reaches the database
+instead of the response cache. `--slow-path` mixes in requests to a slow endpoint
+(default: the stats.nba.com diagnostic) to show whether they stall everything else.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/api/props", "/api/props-with-stats", "/api/player-stats-calculated"]
+
+
+async def _worker(client, queue, latencies, errors, bust_cache):
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        i, path = item
+        params = {"_": i} if bust_cache else None
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            errors.append(path)
+
+
+async def run_load_test(url: str, paths: list[str], total: int, concurrency: int, bust_cache: bool,
+                        slow_path: str | None = None, slow_requests: int = 0) -> dict:
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait((i, paths[i % len(paths)]))
+    for _ in range(concurrency):
+        queue.put_nowait(None)
+
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency + slow_requests)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=300) as client:
+        start = time.perf_counter()
+        # Slow calls are fired first and not awaited until the end: with a blocking event loop
+        # the fast requests queue up behind them.
+        slow = [asyncio.create_task(client.get(slow_path)) for _ in range(slow_requests)] if slow_path else []
+        await asyncio.gather(*(_worker(client, queue, latencies, errors, bust_cache) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        await asyncio.gather(*slow, return_exceptions=True)
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the read API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable)")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--bust-cache", action="store_true", help="Bypass the response cache")
+    parser.add_argument("--slow-path", default=None, help="e.g. /api/ping_stats_nba")
+    parser.add_argument("--slow-requests", type=int, default=0)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load_test(
+        args.url, args.paths or DEFAULT_PATHS, args.requests, args.concurrency, args.bust_cache,
+        args.slow_path, args.slow_requests,
+    ))
+    print(f"Requests: {result['requests']} ({result['errors']} errors) in {result['seconds']:.2f}s")
+    print(f"Throughput: {result['requests_per_second']:.1f} req/s | "
+          f"p50: {result['p50_ms']:.1f} ms | p99: {result['p99_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
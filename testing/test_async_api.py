@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend import main
+from alphabetter.nba_backend.database import get_db
+from alphabetter.nba_backend.main import app, response_cache
+
+
+def test_concurrent_requests_beyond_pool_size(pipeline_env):
+    """
+    More in-flight requests than pooled connections must queue, not deadlock. (Sync sessions
+    inside `async def` routes blocked the loop while waiting for a connection, so the sessions
+    holding connections could never be closed.)
+    """
+    pipeline.fetch_and_calculate_and_store()
+    engine = create_engine(pipeline_env.kw["bind"].url, connect_args={"check_same_thread": False},
+                           pool_size=2, max_overflow=0, pool_timeout=5)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def _get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.wait_for(asyncio.gather(*(
+                client.get("/api/props-with-stats", params={"_": i}) for i in range(30)
+            )), timeout=30)
+
+    app.dependency_overrides[get_db] = _get_db
+    response_cache.clear()
+    try:
+        responses = asyncio.run(run())
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+    assert all(r.status_code == 200 for r in responses)
+    assert {len(r.json()["props"]) for r in responses} == {12}
+
+
+def _record_loop(loops: list):
+    try:
+        loops.append(asyncio.get_running_loop())
+    except RuntimeError:
+        loops.append(None)
+
+
+def test_responses_are_built_off_the_event_loop(api_client, monkeypatch):
+    """Cached routes are plain `def`: the (CPU-bound) crud build runs in the threadpool, not on the loop."""
+    loops = []
+    monkeypatch.setattr(main, "latest_snapshot", lambda session: _record_loop(loops) or [])
+    monkeypatch.setattr(main, "get_player_id", lambda name, session: _record_loop(loops) or None)
+    assert api_client.get("/api/snapshots/latest").json() == {"props": []}
+    api_client.get("/api/player/Nobody")
+    assert loops == [None, None]
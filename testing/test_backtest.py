@@ -0,0 +1,126 @@
+import copy
+import random
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.get_props.prizepicks_stream import archive_file, archive_pages
+from alphabetter.nba_backend.models import PlayerGameLog
+from alphabetter.nba_backend.stat_collector.backtest import (
+    BoardProp, backtest_report, load_archived_boards, replay, roi,
+)
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import (
+    STAT_MAPPING, _calc_hit_rate, _get_stat_value, _is_hit, last_percent,
+)
+from alphabetter.nba_backend.stat_collector.game_log_index import load_game_log_store
+
+START = date(2025, 1, 1)
+SHAI_ID = 4278073
+
+
+def _settling_game(session, prop):
+    """The player's game on the board's game day."""
+    return session.query(PlayerGameLog).filter(
+        PlayerGameLog.player_id == prop.player_id, PlayerGameLog.game_date == prop.board_day,
+    ).first()
+
+
+def _reference(session, prop, game):
+    """Point-in-time metrics the slow way: ORM rows before the settling game + the original helpers."""
+    games = session.query(PlayerGameLog).filter(
+        PlayerGameLog.player_id == prop.player_id, PlayerGameLog.game_date < game.game_date,
+    ).order_by(PlayerGameLog.game_date.desc()).all()
+    stat = STAT_MAPPING[prop.stat]
+    hits = [_is_hit(_get_stat_value(g, stat), prop.target, prop.over_under) for g in games if g.min and g.min > 0]
+    return {
+        "l5_hit_rate": _calc_hit_rate(games[:5], prop.target, prop.over_under, stat),
+        "l10_hit_rate": _calc_hit_rate(games[:10], prop.target, prop.over_under, stat),
+        "l20_hit_rate": _calc_hit_rate(games[:20], prop.target, prop.over_under, stat),
+        "last_percent_rate": last_percent(hits)[0] / 100,
+    }
+
+
+def test_replay_uses_only_prior_games(db_session, seed_game_logs):
+    seed_game_logs(n_players=4, n_games=40, days_between=2, start=START, random_seed=3)
+    rng = random.Random(3)
+    # Boards in the US afternoon (18:00 UTC) of every day; games are every other day.
+    props = [
+        BoardProp(datetime.combine(START + timedelta(days=day), time(18)), rng.randint(1, 4), "x", rng.choice(list(STAT_MAPPING)),
+                  rng.choice([1.5, 6.5, 14.5, 25.5]), rng.choice(["over", "under"]))
+        for day in range(0, 80) for _ in range(3)
+    ]
+    results = replay(load_game_log_store(db_session), props)
+
+    settled = set(results["index"].tolist())
+    for i, prop in enumerate(props):
+        game = _settling_game(db_session, prop)
+        # Odd days have no game; DNPs are void.
+        assert (i in settled) == bool(game and game.min > 0)
+
+    for row, i in enumerate(results["index"]):
+        prop = props[i]
+        game = _settling_game(db_session, prop)
+        assert results["outcome"][row] == _is_hit(_get_stat_value(game, STAT_MAPPING[prop.stat]), prop.target, prop.over_under)
+        for metric, want in _reference(db_session, prop, game).items():
+            assert results[metric][row] == want, (i, metric)
+
+    report = backtest_report(results)
+    assert report["props"] == len(settled)
+    for metric in report["metrics"].values():
+        assert sum(row["count"] for row in metric["calibration"]) == len(settled)
+
+
+def test_roi_flat_stake():
+    predicted = np.array([0.9, 0.7, 0.7, 0.4])
+    outcome = np.array([1.0, 1.0, 0.0, 1.0])
+    rows = {row["threshold"]: row for row in roi(predicted, outcome, thresholds=(0.6, 0.8), payout=2.0)}
+    assert rows[0.6]["bets"] == 3 and rows[0.6]["roi"] == (2 * 2.0 - 3) / 3
+    assert rows[0.8]["bets"] == 1 and rows[0.8]["roi"] == 1.0
+
+
+def test_load_archived_boards(pipeline_env, tmp_path):
+    pipeline.fetch_and_calculate_and_store()
+    board = copy.deepcopy(pipeline.fetch_board_pages()[0])
+    for when in (datetime(2025, 3, 1, 9), datetime(2025, 3, 1, 18), datetime(2025, 3, 2, 9)):
+        list(archive_pages([board], archive_file(tmp_path, when)))
+
+    props = load_archived_boards(pipeline_env(), tmp_path)
+    # One board per game day (they roll over at 10:00 UTC, so 03-02 09:00 is still 03-01's and
+    # replaces 03-01 18:00); the unknown rookie is unresolved, Dunks is not in STAT_MAPPING.
+    assert {prop.board_ts for prop in props} == {datetime(2025, 3, 1, 9), datetime(2025, 3, 2, 9)}
+    assert {prop.board_day for prop in props} == {date(2025, 2, 28), date(2025, 3, 1)}
+    assert len(props) == 2 * 12
+    assert all(prop.player_name != "Unknown Rookie" for prop in props)
+
+
+def test_replay_settles_utc_tipoffs_on_their_game_day(pipeline_env):
+    pipeline.fetch_and_calculate_and_store()
+    session = pipeline_env()
+    # ESPN dates tip-offs in UTC (00:30Z, every night): each is stored on its US game day. The
+    # 2025-01-13T00:30Z game (Jan 12) was a DNP, so it isn't stored.
+    games = {g.game_date: g for g in session.query(PlayerGameLog).filter(PlayerGameLog.player_id == SHAI_ID)}
+    assert sorted(games) == [date(2025, 1, 10), date(2025, 1, 11), date(2025, 1, 13), date(2025, 1, 14)]
+    assert games[date(2025, 1, 10)].matchup.endswith("vs. GS")
+    assert games[date(2025, 1, 11)].matchup.endswith("vs. LAL")  # tipped 2025-01-12T00:30Z
+
+    def _props(board_ts, game):
+        # Over just below and under just above what the player scored: both hit only on that game.
+        return [BoardProp(board_ts, SHAI_ID, "x", "Points", game.pts - 0.5, "over"),
+                BoardProp(board_ts, SHAI_ID, "x", "Points", game.pts + 0.5, "under")]
+
+    # Jan 11's board before tip-off and during the game (03:00 UTC on Jan 12) settle on the
+    # Jan 11 game, not the back-to-back either side of it; Jan 12 (DNP) and Jan 15 are void.
+    props = (_props(datetime(2025, 1, 11, 15), games[date(2025, 1, 11)])
+             + _props(datetime(2025, 1, 12, 3), games[date(2025, 1, 11)])
+             + _props(datetime(2025, 1, 13, 15), games[date(2025, 1, 13)])
+             + _props(datetime(2025, 1, 12, 15), games[date(2025, 1, 13)])
+             + _props(datetime(2025, 1, 15, 15), games[date(2025, 1, 14)]))
+    results = replay(load_game_log_store(session), props)
+
+    assert sorted(results["index"].tolist()) == list(range(6))
+    assert results["outcome"].tolist() == [1.0] * 6
+    for row, i in enumerate(results["index"]):
+        game = games[props[i].board_day]
+        for metric, want in _reference(session, props[i], game).items():
+            assert results[metric][row] == want, (i, metric)
@@ -0,0 +1,92 @@
+from datetime import date
+
+from alphabetter.nba_backend.crud.bulk_ingest import _copy_csv, rows_to_columns
+from alphabetter.nba_backend.fetch_and_store_player_stats import store_player_stats, store_team_gamelog
+from alphabetter.nba_backend.models import HitRateCache, PlayerGameLog, PlayerRoleState, PlayerStats, TeamInfo
+
+STAT_COLUMNS = ("min", "pts", "oreb", "dreb", "reb", "ast", "stl", "blk", "tov", "fgm", "fga",
+                "fg_pct", "fg3m", "fg3a", "fg3_pct", "ftm", "fta", "ft_pct")
+
+
+def _game(day, pts):
+    return {"player_id": 7, "team_id": 1, "game_date": date(2025, 3, day), "matchup": "OKC vs. LAL",
+            **{col: 0.0 for col in STAT_COLUMNS}, "min": 30.0, "pts": float(pts)}
+
+
+def _team_game(game_id, pts):
+    log = {"team_id": 1, "game_id": game_id, "game_date": date(2025, 3, game_id), "matchup": "OKC vs. LAL",
+           "wl": "W", "w": 1, "l": 0, "w_pct": 1.0}
+    for col in ("min", "fgm", "fga", "fg_pct", "fg3m", "fg3a", "fg3_pct", "ftm", "fta", "ft_pct", "oreb",
+                "dreb", "reb", "ast", "stl", "blk", "tov", "pf"):
+        log[col] = 0.0
+    log["pts"] = float(pts)
+    return log
+
+
+def test_reingesting_a_player_is_idempotent(db_session):
+    store_player_stats(db_session, 7, "Player Seven", "OKC", 1, [_game(1, 20), _game(2, 30)])
+    store_player_stats(db_session, 7, "Player Seven", "OKC", 1, [_game(1, 20), _game(2, 30), _game(3, 10)])
+
+    assert db_session.query(PlayerGameLog).count() == 3
+    summary = db_session.query(PlayerStats).one()
+    assert summary.games_played == 3
+    assert summary.points_per_game == 20.0
+
+
+def test_team_gamelog_is_idempotent(db_session):
+    store_team_gamelog(db_session, 1, [_team_game(1, 100), _team_game(2, 110)])
+    store_team_gamelog(db_session, 1, [_team_game(2, 110), _team_game(3, 120)])
+    assert db_session.query(TeamInfo).count() == 3
+
+
+def test_copy_buffer_writes_nulls():
+    columns = rows_to_columns([{"a": 1, "b": None}, {"a": 2, "b": date(2025, 1, 2)}])
+    assert _copy_csv(columns).read().splitlines() == ["1,\\N", "2,2025-01-02"]
+
+
+def test_migrations_are_idempotent(db_session):
+    from alphabetter.nba_backend.migrations import run_migrations
+    run_migrations(db_session.get_bind())
+    run_migrations(db_session.get_bind())
+
+
+def test_migration_replaces_legacy_indexes_and_serves_last_n_from_index(db_session):
+    from sqlalchemy import inspect, text
+    from alphabetter.nba_backend.migrations import run_migrations
+
+    engine = db_session.get_bind()
+    with engine.begin() as conn:  # schema as created before the composite index existed
+        conn.execute(text("DROP INDEX uq_player_game_log_player_date_desc"))
+        conn.execute(text("CREATE INDEX ix_player_game_log_player_id ON player_game_log (player_id)"))
+        conn.execute(text("CREATE UNIQUE INDEX uq_player_game_log_player_date ON player_game_log (player_id, game_date)"))
+
+    run_migrations(engine)
+
+    assert {ix["name"] for ix in inspect(engine).get_indexes("player_game_log")} == {"uq_player_game_log_player_date_desc"}
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM player_game_log WHERE player_id = 7 ORDER BY game_date DESC LIMIT 10"
+        )))
+    assert "uq_player_game_log_player_date_desc" in plan
+    assert "TEMP B-TREE" not in plan  # rows come out of the index already ordered
+
+
+def test_game_day_migration_clears_utc_dated_game_logs_once(db_session):
+    from alphabetter.nba_backend.migrations import run_migrations
+
+    def _seed():
+        store_player_stats(db_session, 7, "Player Seven", "OKC", 1, [_game(1, 20), _game(2, 30)])
+        db_session.add(HitRateCache(player_id=7, stat="Points", target=24.5, over_under="over",
+                                    last_game_date=date(2025, 3, 2)))
+        db_session.add(PlayerRoleState(player_id=7, last_game_date=date(2025, 3, 2), state={}))
+        db_session.commit()
+
+    _seed()  # rows from before the migration: re-fetched on the next refresh
+    run_migrations(db_session.get_bind())
+    assert db_session.query(PlayerGameLog).count() == 0
+    assert db_session.query(HitRateCache).count() == 0 and db_session.query(PlayerRoleState).count() == 0
+
+    _seed()  # rows ingested after it are kept by later runs
+    run_migrations(db_session.get_bind())
+    assert db_session.query(PlayerGameLog).count() == 2
+    assert db_session.query(HitRateCache).count() == 1 and db_session.query(PlayerRoleState).count() == 1
@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+import pytest
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.stat_collector.distribution import (
+    FitCache,
+    StatDistribution,
+    _normal_cdf,
+    fit_distribution,
+    recency_weights,
+)
+from alphabetter.nba_backend.stat_collector.game_log_index import PlayerLogArrays
+
+SHAI_ID = 4278073
+
+
+def _poisson_cdf(k, mean):
+    return sum(math.exp(-mean) * mean ** j / math.factorial(j) for j in range(k + 1))
+
+
+def test_normal_cdf_matches_erf():
+    x = np.linspace(-5, 5, 101)
+    expected = [0.5 * (1 + math.erf(v / math.sqrt(2))) for v in x]
+    assert _normal_cdf(x) == pytest.approx(expected, abs=1e-6)
+
+
+def test_poisson_fit_for_equidispersed_counts():
+    values = np.array([4, 6, 5, 5, 4, 6, 5, 5, 4, 6], dtype=float)  # variance < mean
+    fit = fit_distribution(values, np.full(10, 30.0), "ast", half_life=0)
+    assert fit.kind == "poisson" and fit.mean == 5
+    assert fit.cdf([3, 5, 8]) == pytest.approx([_poisson_cdf(k, 5) for k in (3, 5, 8)])
+    # Over 4.5 is X >= 5; under 4.5 is X <= 4: the two sides of a half line add up to 1.
+    over, under = fit.prob_hit([4.5, 4.5], ["over", "under"])
+    assert over == pytest.approx(1 - _poisson_cdf(4, 5)) and over + under == pytest.approx(1)
+    # A whole line pushes to both sides: P(over) + P(under) - P(X == line) = 1.
+    over, under = fit.prob_hit([5, 5], ["over", "under"])
+    assert over + under - math.exp(-5) * 5 ** 5 / math.factorial(5) == pytest.approx(1)
+
+
+def test_negative_binomial_for_overdispersed_counts():
+    values = np.array([0, 12, 1, 9, 2, 14, 0, 8, 1, 13], dtype=float)
+    fit = fit_distribution(values, np.full(10, 30.0), "reb", half_life=0)
+    assert fit.kind == "negbin"
+    pmf = np.diff(np.concatenate([[0.0], fit.cdf(np.arange(200))]))
+    assert pmf.sum() == pytest.approx(1, abs=1e-9)
+    assert (np.arange(200) * pmf).sum() == pytest.approx(fit.mean)
+
+
+@pytest.mark.parametrize("values", [[4, 6, 5, 5, 4, 6, 5, 5, 4, 6], [0, 12, 1, 9, 2, 14, 0, 8, 1, 13]])
+def test_count_cdf_work_is_bounded_with_exact_tails(values, monkeypatch):
+    fit = fit_distribution(np.array(values, dtype=float), np.full(10, 30.0), "reb", half_life=0)
+    sizes = []
+    count_pmf = StatDistribution._count_pmf
+    monkeypatch.setattr(StatDistribution, "_count_pmf", lambda self, k_max: sizes.append(k_max) or count_pmf(self, k_max))
+    cdf = fit.cdf([-np.inf, -3, 1e12, np.inf, np.nan])
+    assert sizes == [fit._k_cap()] and sizes[0] < 200
+    assert cdf[:4].tolist() == [0, 0, 1, 1] and np.isnan(cdf[4])
+    assert fit.prob_hit([1e12, 1e12], ["over", "under"]).tolist() == [0, 1]
+
+
+def test_kernel_fit_separates_lines_counting_cannot():
+    values = np.array([22, 27, 30, 19, 26, 31, 24, 28, 21, 33], dtype=float)
+    fit = fit_distribution(values, np.full(10, 34.0), "pts")
+    assert fit.kind == "kde"
+    # 24.5 and 25.5 both have 6/10 games over, but the fitted probability still moves.
+    p_low, p_high = fit.prob_hit([24.5, 25.5], ["over", "over"])
+    assert (values > 24.5).sum() == (values > 25.5).sum()
+    assert 0 < p_high < p_low < 1
+
+
+def test_recency_weighting_and_dnps():
+    assert recency_weights(3, 1) == pytest.approx([1, 0.5, 0.25])
+    assert recency_weights(3, 0) == pytest.approx([1, 1, 1])
+    values = np.array([10, 0, 10, 2, 2, 2, 2, 2], dtype=float)  # hot last two games; one DNP
+    minutes = np.array([30, 0, 30, 30, 30, 30, 30, 30], dtype=float)
+    recent = fit_distribution(values, minutes, "ast", half_life=1)
+    flat = fit_distribution(values, minutes, "ast", half_life=0)
+    assert flat.games == 7 and flat.mean == pytest.approx(30 / 7)
+    assert recent.mean > flat.mean
+    assert fit_distribution(values, np.zeros(8), "ast") is None
+
+
+def test_fit_cache_refits_after_a_new_game():
+    cache = FitCache()
+    logs = PlayerLogArrays(player_id=1, game_dates=np.array(["2025-03-02", "2025-03-01"], dtype="datetime64[D]"),
+                           minutes=np.array([30.0, 30.0]), columns={"ast": np.array([5.0, 7.0])})
+    fit = cache.get(logs, "ast", logs.column("ast"))
+    assert cache.get(logs, "ast", logs.column("ast")) is fit
+    newer = PlayerLogArrays(player_id=1, game_dates=np.array(["2025-03-04", "2025-03-02", "2025-03-01"], dtype="datetime64[D]"),
+                            minutes=np.array([30.0, 30.0, 30.0]), columns={"ast": np.array([9.0, 5.0, 7.0])})
+    assert cache.get(newer, "ast", newer.column("ast")) is not fit
+
+
+def test_pipeline_and_endpoint_serve_fitted_probabilities(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    props = api_client.get("/api/props-with-stats", params={"fields": "id,stat,dist_probability,l10_hit_rate"}).json()["props"]
+    assert all(0 <= p["dist_probability"] <= 1 for p in props)
+
+    body = api_client.get(f"/api/hit-probability/{SHAI_ID}",
+                          params={"stat": "Points", "targets": [24.5, 25.5, 40.5]}).json()
+    assert body["distribution"] == "kde"
+    over = [row["probability"] for row in body["probabilities"]]
+    assert over == sorted(over, reverse=True)
+    assert api_client.get(f"/api/hit-probability/{SHAI_ID}", params={"stat": "Dunks", "targets": 1}).json() == {
+        "message": "Stat 'Dunks' not supported."
+    }
+    for targets in ([float("inf")], ["nan"], [1e9], [-1], [0.5] * 51):
+        response = api_client.get(f"/api/hit-probability/{SHAI_ID}", params={"stat": "Rebounds", "targets": targets})
+        assert response.status_code == 422, targets
@@ -0,0 +1,62 @@
+import time
+from datetime import date
+
+from alphabetter.nba_backend.common.concurrent_fetch import ConcurrentFetcher, TokenBucket
+from alphabetter.nba_backend.fetch_player_stats_espn import (
+    build_espn_player_map, fetch_all_player_stats_espn, fetch_player_stats_espn
+)
+
+
+def test_build_player_map_from_stub(espn_stub):
+    player_map = build_espn_player_map(ConcurrentFetcher(max_workers=4, rate_per_second=100))
+    assert player_map == {
+        "Shai Gilgeous-Alexander": "4278073",
+        "Jalen Williams": "4593803",
+        "Victor Wembanyama": "5104157",
+        "Stephon Castle": "5106137",
+    }
+
+
+def test_parallel_gamelogs_match_sequential(espn_stub):
+    players = {
+        "Shai Gilgeous-Alexander": "4278073",
+        "Jalen Williams": "4593803",
+        "Victor Wembanyama": "5104157",
+        "Stephon Castle": "5106137",
+        "Not On ESPN": "1",
+    }
+    fetcher = ConcurrentFetcher(max_workers=4, rate_per_second=100)
+    results = fetch_all_player_stats_espn(players, fetcher)
+
+    assert isinstance(results["Not On ESPN"], Exception)
+    for name, espn_id in list(players.items())[:4]:
+        assert results[name] == fetch_player_stats_espn(espn_id, name)
+
+    name, team, team_id, logs = results["Shai Gilgeous-Alexander"]
+    assert (team, team_id) == ("Oklahoma City Thunder", 25)
+    assert len(logs) == 4  # preseason game and 0-minute game are dropped
+    # Tip-offs are 00:30 UTC: each game is stored on the US evening it was played.
+    # Tip-offs are 00:30 UTC: each game is stored on the US evening it was played (the
+    # 2025-01-12T00:30Z game against LAL is Jan 11).
+    assert sorted((log["game_date"], log["matchup"]) for log in logs) == [
+        (date(2025, 1, 10), "OKC vs. GS"), (date(2025, 1, 11), "OKC vs. LAL"),
+        (date(2025, 1, 13), "OKC vs. NY"), (date(2025, 1, 14), "OKC vs. BOS"),
+    ]
+
+
+def test_concurrency_is_bounded_and_connections_reused(espn_stub):
+    fetcher = ConcurrentFetcher(max_workers=3, rate_per_second=1000)
+    urls = {i: espn_stub.base_url + "/teams" for i in range(12)}
+    results = fetcher.map_json(urls)
+
+    assert all(not isinstance(r, Exception) for r in results.values())
+    assert 1 < espn_stub.max_in_flight <= 3
+    assert len(espn_stub.client_ports) <= 3
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.18
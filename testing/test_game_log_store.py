@@ -0,0 +1,84 @@
+from datetime import date
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.models import GAME_LOG_COVERED_COLUMNS, PlayerGameLog, PrizePicksProp
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import STAT_MAPPING, _get_stat_value
+from alphabetter.nba_backend.stat_collector.game_log_index import (
+    _STORE_COLUMNS, DERIVED_COLUMNS, INDEXED_COLUMNS, column_name, load_game_log_store,
+)
+
+
+def test_store_load_reads_only_indexed_columns():
+    assert set(_STORE_COLUMNS) <= {"player_id", "game_date", *GAME_LOG_COVERED_COLUMNS}
+
+
+def test_store_matches_orm_rows(pipeline_env):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    store = load_game_log_store(db)
+    assert len(store) == db.query(PlayerGameLog).count()
+
+    for player_id in {row.player_id for row in db.query(PlayerGameLog.player_id)}:
+        orm = db.query(PlayerGameLog).filter(PlayerGameLog.player_id == player_id) \
+            .order_by(PlayerGameLog.game_date.desc()).all()
+        logs = store.player(player_id)
+        assert logs.game_dates.astype(object).tolist() == [g.game_date for g in orm]
+        assert logs.matchups.tolist() == [g.matchup for g in orm]
+        assert logs.minutes.tolist() == [g.min for g in orm]
+        for col in INDEXED_COLUMNS:
+            assert logs.column(col).tolist() == [getattr(g, col) for g in orm]
+        # Views into the league-wide arrays, not copies.
+        assert logs.minutes.base is store.minutes
+
+    assert len(store.player(123456)) == 0
+    assert len(load_game_log_store(db, [])) == 0
+    assert store.nbytes() > 0
+
+
+def test_last_x_endpoint_reads_store(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    prop = db.query(PrizePicksProp).filter(PrizePicksProp.stat == "Pts+Rebs+Asts").first()
+    body = api_client.get(f"/api/last_x/{prop.id}/3").json()
+
+    orm = db.query(PlayerGameLog).filter(PlayerGameLog.player_id == prop.player_id) \
+        .order_by(PlayerGameLog.game_date.desc()).limit(3).all()
+    assert body["game_logs"] == [
+        {
+            "game_date": g.game_date.isoformat(),
+            "matchup": g.matchup,
+            "game_minutes": g.min,
+            "stat_value": _get_stat_value(g, STAT_MAPPING[prop.stat]),
+        }
+        for g in orm
+    ]
+    assert isinstance(date.fromisoformat(body["game_logs"][0]["game_date"]), date)
+
+
+def test_every_stat_is_one_precomputed_column(pipeline_env):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    store = load_game_log_store(db)
+    games = db.query(PlayerGameLog).order_by(PlayerGameLog.player_id, PlayerGameLog.game_date.desc()).all()
+    for stat in STAT_MAPPING.values():
+        name = column_name(stat)
+        assert name in INDEXED_COLUMNS or name in DERIVED_COLUMNS
+        assert store.columns[name].tolist() == [_get_stat_value(g, stat) for g in games]
+
+    fantasy = db.query(PrizePicksProp).filter(PrizePicksProp.stat == "Fantasy Score").all()
+    assert fantasy  # no longer skipped by the pipeline
+
+
+def test_calculate_stage_loads_the_store_once(pipeline_env, monkeypatch):
+    from alphabetter.nba_backend.stat_collector import calculate_and_store_lastx, matchup_adjust, role_tracker
+
+    loads = []
+
+    def counting_load(session, player_ids=None):
+        loads.append(player_ids)
+        return load_game_log_store(session, player_ids)
+
+    for module in (pipeline, calculate_and_store_lastx, matchup_adjust, role_tracker):
+        monkeypatch.setattr(module, "load_game_log_store", counting_load)
+    pipeline.fetch_and_calculate_and_store()  # every hit rate is a cache miss on the first run
+    assert len(loads) == 1
@@ -0,0 +1,74 @@
+from datetime import date
+
+from alphabetter.nba_backend.crud.bulk_ingest import ingest_player_game_logs, rows_to_columns
+from alphabetter.nba_backend.models import HitRateCache, PlayerGameLog, PrizePicksProp
+from alphabetter.nba_backend.stat_collector import hit_rate_cache
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import calculate_hit_rates
+
+
+def _log(day, pts):
+    return {"player_id": 1, "team_id": 1, "game_date": date(2025, 2, day), "matchup": "OKC vs. LAL",
+            "min": 30.0, "pts": float(pts), "oreb": 0.0, "dreb": 0.0, "reb": 5.0, "ast": 5.0,
+            "stl": 1.0, "blk": 1.0, "tov": 2.0, "fgm": 0.0, "fga": 0.0, "fg_pct": 0.0, "fg3m": 0.0,
+            "fg3a": 0.0, "fg3_pct": 0.0, "ftm": 0.0, "fta": 0.0, "ft_pct": 0.0}
+
+
+def _prop(session, target, over_under="over"):
+    prop = PrizePicksProp(player_name="Player One", player_id=1, stat="Points", target=target,
+                          over_under=over_under, odds_type="standard")
+    session.add(prop)
+    session.commit()
+    return prop
+
+
+def _count_calls(monkeypatch):
+    calls = []
+    real = hit_rate_cache.calculate_stats_bulk
+    monkeypatch.setattr(hit_rate_cache, "calculate_stats_bulk",
+                        lambda session, props, store=None: calls.append(len(props)) or real(session, props, store))
+    return calls
+
+
+def test_cache_computes_each_key_once(db_session, monkeypatch):
+    ingest_player_game_logs(db_session, rows_to_columns([_log(d, 10 + d) for d in range(1, 11)]))
+    db_session.commit()
+    reposted = [_prop(db_session, 15.5), _prop(db_session, 15.5), _prop(db_session, 15.5, "under")]
+    calls = _count_calls(monkeypatch)
+
+    first = hit_rate_cache.get_hit_rates(db_session, reposted)
+    assert calls == [2]  # the re-posted line is computed once
+    assert db_session.query(HitRateCache).count() == 2
+
+    second = hit_rate_cache.get_hit_rates(db_session, reposted)
+    assert calls == [2]  # served from the table
+    assert first == second
+    for prop, stats in zip(reposted, second):
+        assert stats["l10_hit_rate"] == calculate_hit_rates(db_session, prop)["l10_hit_rate"]
+
+
+def test_new_game_log_invalidates_player(db_session, monkeypatch):
+    ingest_player_game_logs(db_session, rows_to_columns([_log(d, 20) for d in range(1, 6)]))
+    db_session.commit()
+    prop = _prop(db_session, 19.5)
+    assert hit_rate_cache.get_hit_rates(db_session, [prop])[0]["l5_hit_rate"] == 1.0
+
+    ingest_player_game_logs(db_session, rows_to_columns([_log(6, 0)]))
+    db_session.commit()
+    assert db_session.query(HitRateCache).count() == 0
+
+    assert hit_rate_cache.get_hit_rates(db_session, [prop])[0]["l5_hit_rate"] == 0.8
+    cached = db_session.query(HitRateCache).one()
+    assert cached.last_game_date == date(2025, 2, 6)
+
+
+def test_stats_endpoint_reads_cache(api_client, session_factory):
+    db = session_factory()
+    ingest_player_game_logs(db, rows_to_columns([_log(d, 10 + d) for d in range(1, 11)]))
+    db.commit()
+    prop = _prop(db, 15.5)
+
+    stats = api_client.get("/api/player-stats-calculated").json()["stats"]
+    assert [s["prop_id"] for s in stats] == [prop.id]
+    assert stats[0]["l10_hit_rate"] == calculate_hit_rates(db, prop)["l10_hit_rate"]
+    assert db.query(HitRateCache).count() == 1
+    db.close()
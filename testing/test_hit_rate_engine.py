@@ -0,0 +1,83 @@
+import itertools
+import random
+
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import (
+    _calc_hit_rate, _is_hit, _get_stat_value, last_percent
+)
+from alphabetter.nba_backend.stat_collector.hit_rate_engine import (
+    compute_hit_rates, compute_hit_rates_batch
+)
+
+
+class MockGame:
+    def __init__(self, pts, reb, ast, min_played):
+        self.pts = pts; self.reb = reb; self.ast = ast
+        self.min = min_played
+
+
+def _reference(games, target, over_under, stat):
+    """The original per-prop computation: three window passes plus last_percent."""
+    hits = [
+        _is_hit(_get_stat_value(g, stat), target, over_under)
+        for g in games
+        if g.min and g.min > 0
+    ]
+    rate, total = last_percent(hits)
+    return {
+        "l5_hit_rate": _calc_hit_rate(games[:5], target, over_under, stat),
+        "l10_hit_rate": _calc_hit_rate(games[:10], target, over_under, stat),
+        "l20_hit_rate": _calc_hit_rate(games[:20], target, over_under, stat),
+        "last_percent_total": total,
+        "last_percent_rate": rate / 100,
+    }
+
+
+def _random_games(rng, n):
+    return [
+        MockGame(
+            pts=rng.randint(0, 40),
+            reb=rng.randint(0, 15),
+            ast=rng.randint(0, 12),
+            min_played=rng.choice([0, 0, 12.5, 24, 30, 36]),
+        )
+        for _ in range(n)
+    ]
+
+
+def test_last_percent_exhaustive():
+    # Every hit/miss sequence up to 12 games, all-hit runs and 1/1 windows included.
+    for n in range(0, 13):
+        for seq in itertools.product([False, True], repeat=n):
+            hits = list(seq)
+            expected_rate, expected_total = last_percent(hits)
+            result = compute_hit_rates([1.0 if h else 0.0 for h in hits], [30] * n, 1.0, "over")
+            assert result["last_percent_total"] == expected_total, hits
+            assert result["last_percent_rate"] == expected_rate / 100, hits
+
+
+def test_engine_matches_reference_randomized():
+    rng = random.Random(1234)
+    for _ in range(2000):
+        games = _random_games(rng, rng.randint(0, 45))
+        stat = rng.choice(["pts", "reb", ["pts", "reb", "ast"]])
+        target = rng.choice([0.5, 4.5, 10, 15.5, 20, 30.5, 44.5])
+        over_under = rng.choice(["over", "under"])
+
+        values = [_get_stat_value(g, stat) for g in games]
+        minutes = [g.min for g in games]
+        assert compute_hit_rates(values, minutes, target, over_under) == _reference(
+            games, target, over_under, stat
+        )
+
+
+def test_batch_matches_single_prop():
+    rng = random.Random(99)
+    games = _random_games(rng, 30)
+    props = [("pts", 20.5, "over"), ("reb", 7, "under"), (["pts", "reb", "ast"], 35.5, "over")]
+
+    matrix = [[_get_stat_value(g, stat) for g in games] for stat, _, _ in props]
+    batch = compute_hit_rates_batch(
+        matrix, [g.min for g in games], [t for _, t, _ in props], [ou for _, _, ou in props]
+    )
+    for row, (stat, target, over_under) in zip(batch, props):
+        assert row == _reference(games, target, over_under, stat)
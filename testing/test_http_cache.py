@@ -0,0 +1,71 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.common.http_cache import HttpCache, OfflineCacheMiss, until_next_game_day
+from alphabetter.nba_backend.models import PlayerStatsCalculated
+from conftest import StubServer
+
+ROUTES = {"/a": "espn/roster_24.json", "/b": "espn/roster_24.json", "/c": "espn/roster_25.json"}
+
+
+def test_fresh_entries_skip_the_network_and_stale_ones_revalidate(tmp_path):
+    cache = HttpCache(tmp_path)
+    with StubServer(ROUTES) as server, requests.Session() as session:
+        first = cache.get(session, server.base_url + "/a", ttl=3600)
+        assert cache.get(session, server.base_url + "/a", ttl=3600) == first
+        assert len(server.requests) == 1
+
+        assert cache.get(session, server.base_url + "/c", ttl=0) == cache.get(session, server.base_url + "/c", ttl=0)
+        assert len(server.requests) == 3
+        assert server.not_modified == 1  # second /c was a conditional request
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    cache = HttpCache(tmp_path)
+    with StubServer(ROUTES) as server, requests.Session() as session:
+        cache.get(session, server.base_url + "/a", ttl=3600)
+        cache.get(session, server.base_url + "/b", ttl=3600)
+    assert len(list((tmp_path / "bodies").iterdir())) == 1
+    assert len(list((tmp_path / "meta").iterdir())) == 2
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = HttpCache(tmp_path)
+    with StubServer(ROUTES) as server, requests.Session() as session:
+        cache.get(session, server.base_url + "/a", ttl=3600)
+        cache.get(session, server.base_url + "/c", ttl=3600)
+        stale = time.time() - 60
+        os.utime(cache._meta_path(server.base_url + "/a"), (stale, stale))
+
+        cache.max_bytes = cache.size() - 1  # room for one of the two bodies
+        assert cache.evict() == 1
+        offline = HttpCache(tmp_path, offline=True)
+        assert offline.get(session, server.base_url + "/c", ttl=0)
+        with pytest.raises(OfflineCacheMiss):
+            offline.get(session, server.base_url + "/a", ttl=0)
+        assert len(list((tmp_path / "bodies").iterdir())) == 1
+
+
+def test_gamelogs_expire_at_the_next_game_day():
+    evening = datetime(2025, 3, 1, 23, 0, tzinfo=timezone.utc).timestamp()
+    early = datetime(2025, 3, 2, 3, 0, tzinfo=timezone.utc).timestamp()
+    rollover = datetime(2025, 3, 2, 10, 0, tzinfo=timezone.utc).timestamp()
+    assert until_next_game_day(evening) == rollover
+    assert until_next_game_day(early) == rollover
+    assert until_next_game_day(rollover) == rollover + 24 * 3600
+
+
+def test_pipeline_replays_offline_from_cache(pipeline_env, espn_stub, monkeypatch):
+    pipeline.fetch_and_calculate_and_store()
+    online = {(s.prop_id, s.l10_hit_rate) for s in pipeline_env().query(PlayerStatsCalculated)}
+    requests_made = len(espn_stub.requests)
+
+    monkeypatch.setenv("HTTP_CACHE_OFFLINE", "1")
+    pipeline.fetch_and_calculate_and_store()
+    assert len(espn_stub.requests) == requests_made
+    assert {(s.prop_id, s.l10_hit_rate) for s in pipeline_env().query(PlayerStatsCalculated)} == online
@@ -0,0 +1,147 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.common.game_day import utc_now
+from alphabetter.nba_backend.crud.pipeline_lock import PIPELINE_LOCK_STALE_AFTER, PipelineLocked, pipeline_lock
+from alphabetter.nba_backend.models import PipelineLock, PlayerGameLog, PlayerStatsCalculated, PrizePicksProp, PropSnapshot
+from alphabetter.nba_backend.services.jobs import Job, JobCancelled, JobConflict, JobManager
+
+
+def _wait(api_client, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = api_client.get(f"/api/jobs/{job_id}").json()
+        if job["finished_at"] is not None:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_single_flight_and_cancellation():
+    manager = JobManager()
+    release = threading.Event()
+
+    def runner(job):
+        job.start_stage("work")
+        while not release.wait(0.01):
+            job.progress(1, 2)  # raises JobCancelled once cancelled
+        return "done"
+
+    first = manager.start(runner)
+    with pytest.raises(JobConflict) as conflict:
+        manager.start(runner)
+    assert conflict.value.active is first and manager.active() is first
+
+    first.cancel()
+    assert first.wait(5)
+    assert first.status == "cancelled" and first.stages["work"] == {"status": "cancelled", "done": 1, "total": 2,
+                                                                   "seconds": None}
+    assert manager.active() is None
+
+    second = manager.start(runner)
+    release.set()
+    assert second.wait(5) and second.status == "succeeded" and second.result == "done"
+    assert [job.id for job in manager.jobs()] == [second.id, first.id]
+
+
+def test_failed_job_records_the_error():
+    manager = JobManager()
+    job = manager.start(lambda job: 1 / 0)
+    assert job.wait(5)
+    assert job.status == "failed" and job.error == "ZeroDivisionError: division by zero"
+
+
+def test_cancelled_refresh_leaves_data_alone(pipeline_env):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    props = db.query(PrizePicksProp).count()
+
+    job = Job()
+    job.cancel()
+    with pytest.raises(JobCancelled):
+        pipeline.fetch_and_calculate_and_store(job=job)  # a full refresh, stopped before it wipes anything
+    assert db.query(PrizePicksProp).count() == props > 0
+
+
+
+def test_cancel_between_wipe_and_store_keeps_the_old_data(pipeline_env, monkeypatch):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    before = (db.query(PrizePicksProp).count(), db.query(PlayerGameLog).count())
+
+    job = Job()
+    store_logs_stage = pipeline.store_logs_stage
+
+    def store_logs_then_cancel(*args):
+        updated = store_logs_stage(*args)  # old rows wiped, new logs written, nothing committed yet
+        job.cancel()
+        return updated
+
+    monkeypatch.setattr(pipeline, "store_logs_stage", store_logs_then_cancel)
+    with pytest.raises(JobCancelled):
+        pipeline.fetch_and_calculate_and_store(job=job)
+    db.expire_all()
+    assert (db.query(PrizePicksProp).count(), db.query(PlayerGameLog).count()) == before
+    assert before[0] > 0 and before[1] > 0
+
+
+def test_database_lock_refuses_a_second_run(pipeline_env, api_client):
+    holder = pipeline_env()  # another process's run, as far as this one can tell
+    with pipeline_lock(holder):
+        with pytest.raises(PipelineLocked):
+            pipeline.fetch_and_calculate_and_store()
+        response = api_client.post("/api/jobs")
+        assert response.status_code == 409 and response.json()["detail"]["job_id"] is None
+        assert api_client.get("/api/jobs").json() == {"active": None, "jobs": []}
+
+    assert pipeline.fetch_and_calculate_and_store() > 0
+    holder.expire_all()
+    assert holder.get(PipelineLock, 1).holder is None
+
+
+def test_stale_database_lock_is_taken_over(pipeline_env):
+    db = pipeline_env()
+    with pipeline_lock(db):
+        pass
+    row = db.get(PipelineLock, 1)
+    row.holder, row.acquired_at = "crashed-run", utc_now() - PIPELINE_LOCK_STALE_AFTER - timedelta(minutes=1)
+    db.commit()
+    assert pipeline.fetch_and_calculate_and_store() > 0
+
+
+def test_job_endpoints_report_progress(pipeline_env, api_client):
+    job = api_client.post("/api/jobs").json()
+    assert job["status"] in ("queued", "running") and job["params"]["stages"] == ["ingest", "calculate", "snapshot"]
+
+    job = _wait(api_client, job["id"])
+    assert job["status"] == "succeeded"
+    assert list(job["stages"]) == ["fetch_props", "resolve_players", "fetch_logs", "store_logs", "store_props",
+                                   "calculate", "store_stats", "snapshot"]
+    fetch_logs = job["stages"]["fetch_logs"]
+    assert fetch_logs["status"] == "done" and fetch_logs["done"] == fetch_logs["total"] > 0
+    assert job["result"]["props_calculated"] == job["stages"]["calculate"]["total"] > 0
+
+    assert api_client.get("/api/jobs/missing").status_code == 404
+    assert api_client.post(f"/api/jobs/{job['id']}/cancel").status_code == 409
+    assert api_client.get("/api/jobs").json()["jobs"][0]["id"] == job["id"]
+
+
+def test_selected_stages_only(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    db.query(PlayerStatsCalculated).delete()
+    db.commit()
+    snapshots = db.query(PropSnapshot).count()
+
+    job = api_client.post("/api/jobs", params={"stages": ["calculate"]}).json()
+    job = _wait(api_client, job["id"])
+    assert job["status"] == "succeeded" and list(job["stages"]) == ["calculate", "store_stats"]
+    # Recalculated every stored prop without touching the board or the snapshot history.
+    assert db.query(PlayerStatsCalculated).count() == db.query(PrizePicksProp).count() > 0
+    assert db.query(PropSnapshot).count() == snapshots
+
+    assert api_client.post("/api/jobs", params={"stages": ["everything"]}).status_code == 422
@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.models import PlayerGameLog, PlayerStatsCalculated, PrizePicksProp, TeamInfo
+from alphabetter.nba_backend.stat_collector.game_log_index import PlayerLogArrays
+from alphabetter.nba_backend.stat_collector.matchup_adjust import (
+    PRIOR_GAMES,
+    DefenseTable,
+    adjusted_rates,
+    load_defense_table,
+    parse_matchup,
+)
+
+BOX = {"fga": 88.0, "oreb": 10.0, "tov": 13.0, "fta": 22.0, "reb": 44.0, "ast": 25.0, "fg3m": 13.0}
+TEAM_IDS = {"OKC": 1, "LAL": 2, "BOS": 3, "NYK": 4}
+
+
+def _team_games(db, game_id, day, home, away, home_pts, away_pts):
+    """Both team_info rows of one game."""
+    for team, opponent, pts, sep in ((home, away, home_pts, "vs."), (away, home, away_pts, "@")):
+        db.add(TeamInfo(team_id=TEAM_IDS[team], game_id=game_id, game_date=day,
+                        matchup=f"{team} {sep} {opponent}", pts=pts, **BOX))
+
+
+@pytest.mark.parametrize("matchup, expected", [
+    ("OKC vs. LAL", ("OKC", "LAL")),
+    ("OKC @ GS", ("OKC", "GSW")),
+    ("NY vs LAL", ("NYK", "LAL")),
+    ("", (None, None)),
+])
+def test_parse_matchup(matchup, expected):
+    assert parse_matchup(matchup) == expected
+
+
+def test_defense_table_from_team_info(db_session):
+    start = date(2025, 3, 1)
+    # LAL gives up 130 to everyone, BOS holds everyone to 100, OKC allows 115.
+    allowed = {"LAL": 130, "BOS": 100, "OKC": 115}
+    matchups = [("OKC", "LAL"), ("BOS", "OKC"), ("LAL", "BOS")] * 3
+    for game_id, (home, away) in enumerate(matchups, start=1):
+        _team_games(db_session, game_id, start + timedelta(days=game_id), home, away, allowed[away], allowed[home])
+    db_session.commit()
+
+    table = load_defense_table(db_session)
+    assert len(table) == 3
+    assert table.allowed["LAL"]["pts"] == 130
+    assert table.allowed["BOS"]["pts"] == 100
+    league = (130 + 100 + 115) / 3
+    n = 6  # games per team
+    assert table.factor("LAL", "pts") == pytest.approx((n * 130 / league + PRIOR_GAMES) / (n + PRIOR_GAMES))
+    assert table.factor("BOS", "pts") < 1 < table.factor("LAL", "pts")
+    assert table.factor("lal", "pts") == table.factor("LAL", "pts")
+    # Identical rebounds / assists everywhere: no adjustment; unknown teams are league average.
+    assert table.factor("LAL", "reb") == pytest.approx(1.0)
+    assert table.factor("DEN", "pts") == 1.0
+    # A combo moves by its points share only.
+    assert 1 < table.factor("LAL", "pts+reb+ast") < table.factor("LAL", "pts")
+
+
+def test_defense_table_from_game_logs_without_team_info(db_session):
+    start = date(2025, 3, 1)
+    # A 30-point star and a 10-point bench player: both score 30% more against LAL, 20% less
+    # against BOS and 10% less against NYK, so each team's factor is the same for both.
+    scoring = {"LAL": 1.3, "BOS": 0.8, "NYK": 0.9}
+    for day, opponent in enumerate(list(scoring) * 3):
+        for player_id, average in ((1, 30), (2, 10)):
+            db_session.add(PlayerGameLog(player_id=player_id, team_id=1, game_date=start + timedelta(days=day),
+                                         matchup=f"OKC vs. {opponent}", min=30, pts=average * scoring[opponent],
+                                         **BOX))
+    db_session.add(PlayerGameLog(player_id=1, team_id=1, game_date=start + timedelta(days=9),
+                                 matchup="OKC @ BOS", min=0, pts=0, **BOX))  # DNPs don't count
+    db_session.commit()
+
+    table = load_defense_table(db_session)
+    assert len(table) == 3 and table.games == {"LAL": 3, "BOS": 3, "NYK": 3}
+    league = sum(scoring.values()) / 3
+    assert table.factor("LAL", "pts") == pytest.approx((3 * 1.3 / league + PRIOR_GAMES) / (3 + PRIOR_GAMES))
+    assert table.factor("BOS", "pts") < table.factor("NYK", "pts") < 1 < table.factor("LAL", "pts")
+    assert table.factor("LAL", "reb") == pytest.approx(1.0)
+    assert 1 < table.factor("LAL", "pts+reb+ast") < table.factor("LAL", "pts")
+
+
+def test_adjusted_rates_rescale_each_game_to_tonights_opponent():
+    table = DefenseTable({}, {}, {})
+    table._factors = {"LAL": {"pts": 1.2}, "BOS": {"pts": 0.8}}
+    logs = PlayerLogArrays(
+        player_id=1,
+        game_dates=np.array(["2025-03-03", "2025-03-02", "2025-03-01"], dtype="datetime64[D]"),
+        minutes=np.array([30.0, 0.0, 30.0]),
+        columns={"pts": np.array([24.0, 0.0, 36.0])},
+        matchups=np.array(["OKC @ BOS", "OKC vs. DEN", "OKC vs. LAL"], dtype=object),
+    )
+    rates = adjusted_rates(logs, "pts", 28.5, "over", table, "LAL")
+    # 24 against BOS is worth 36 against LAL; 36 against LAL stays 36. The DNP is skipped.
+    assert rates == {"opp_factor": 1.2, "opp_adj_expected": pytest.approx(36.0), "opp_adj_l10_hit_rate": 1.0}
+    assert adjusted_rates(logs, "pts", 28.5, "over", table, "BOS")["opp_adj_l10_hit_rate"] == 0.0
+
+
+def test_pipeline_stores_opponent_adjustments(pipeline_env, api_client):
+    db = pipeline_env()
+    day = date(2025, 3, 1)
+    for game_id in range(1, 6):  # LAL allows 130 a night, NYK 100
+        _team_games(db, game_id, day + timedelta(days=game_id), "LAL", "NYK", 100, 130)
+    db.commit()
+
+    pipeline.fetch_and_calculate_and_store()
+    shai = db.query(PrizePicksProp).filter(PrizePicksProp.player_name == "Shai Gilgeous-Alexander",
+                                           PrizePicksProp.stat == "Points").first()
+    stats = db.query(PlayerStatsCalculated).filter(PlayerStatsCalculated.prop_id == shai.id).one()
+    assert shai.opponent == "LAL" and stats.opp_factor > 1
+    assert stats.opp_adj_l10_hit_rate is not None and stats.opp_adj_expected > 0
+
+    props = api_client.get("/api/props-with-stats", params={
+        "fields": "id,opp_factor,opp_adj_expected,opp_adj_l10_hit_rate",
+        "sort": "opp_adj_l10_hit_rate", "order": "desc",
+    }).json()["props"]
+    assert next(p for p in props if p["id"] == shai.id)["opp_factor"] == pytest.approx(stats.opp_factor)
+    rates = [p["opp_adj_l10_hit_rate"] for p in props if p["opp_adj_l10_hit_rate"] is not None]
+    assert rates == sorted(rates, reverse=True)
+
+
+def test_pipeline_adjusts_for_opponents_from_espn_game_logs(pipeline_env):
+    # No team_info at all: the ESPN game logs alone give LAL a defense factor.
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    assert db.query(TeamInfo).count() == 0
+    shai = db.query(PrizePicksProp).filter(PrizePicksProp.player_name == "Shai Gilgeous-Alexander",
+                                           PrizePicksProp.stat == "Points").first()
+    stats = db.query(PlayerStatsCalculated).filter(PlayerStatsCalculated.prop_id == shai.id).one()
+    assert shai.opponent == "LAL"
+    assert stats.opp_factor == pytest.approx(load_defense_table(db).factor("LAL", "pts"))
+    assert stats.opp_factor != pytest.approx(1.0)
+    assert stats.opp_adj_expected > 0 and stats.opp_adj_l10_hit_rate is not None
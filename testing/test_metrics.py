@@ -0,0 +1,103 @@
+import json
+import threading
+
+import pytest
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.common.concurrent_fetch import ConcurrentFetcher
+from alphabetter.nba_backend.common.log import get_logger
+from alphabetter.nba_backend.common.metrics import MetricsRegistry, metrics, run_summary, upstream_for
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams", "espn"),
+    ("https://api.prizepicks.com/projections?league_id=7", "prizepicks"),
+    ("https://stats.nba.com/stats/playergamelog", "nba_api"),
+    ("http://127.0.0.1:8123/teams", "127.0.0.1"),
+])
+def test_upstream_for(url, expected):
+    assert upstream_for(url) == expected
+
+
+def test_registry_counters_timers_and_prometheus_text():
+    registry = MetricsRegistry()
+    registry.inc("db_rows_written_total", 3, table="player_game_log", op="insert")
+    registry.inc("db_rows_written_total", 2, table="player_game_log", op="insert")
+    with pytest.raises(RuntimeError):
+        with registry.timer("pipeline_stage_seconds", stage="calculate"):
+            raise RuntimeError("stage failed")  # still timed
+    registry.observe("pipeline_stage_seconds", 0.5, stage="calculate")
+
+    body = registry.to_json()
+    assert body["counters"] == {'db_rows_written_total{op="insert",table="player_game_log"}': 5}
+    timer = body["timers"]['pipeline_stage_seconds{stage="calculate"}']
+    assert timer["count"] == 2 and timer["max"] == 0.5 and timer["total"] >= 0.5
+
+    text = registry.render_prometheus()
+    assert "# TYPE db_rows_written_total counter" in text
+    assert 'db_rows_written_total{op="insert",table="player_game_log"} 5' in text
+    assert 'pipeline_stage_seconds_count{stage="calculate"} 2' in text
+
+
+def test_run_summary_only_counts_the_run():
+    registry = MetricsRegistry()
+    registry.inc("cache_lookups_total", 10, cache="hit_rate", result="hit")
+    before = registry.snapshot()
+    registry.inc("cache_lookups_total", 3, cache="hit_rate", result="hit")
+    registry.inc("cache_lookups_total", 1, cache="hit_rate", result="miss")
+    registry.inc("http_requests_total", 4, upstream="espn", result="fetched")
+    registry.observe("http_request_seconds", 0.2, upstream="espn")
+    registry.observe("http_request_seconds", 0.4, upstream="espn")
+    registry.inc("db_rows_written_total", 7, table="prize_picks_props", op="insert")
+    registry.inc("db_rows_written_total", 2, table="prize_picks_props", op="delete")
+
+    summary = run_summary(registry.snapshot(), before)
+    assert summary["caches"] == {"hit_rate": {"hit": 3, "miss": 1, "hit_ratio": 0.75}}
+    assert summary["http"] == {"espn": {"fetched": 4, "network_requests": 2, "latency_avg": 0.3, "latency_max": 0.4}}
+    assert summary["db_rows_written"] == {"prize_picks_props": 9}
+
+
+
+def test_run_scope_keeps_other_threads_out_of_the_run():
+    registry = MetricsRegistry()
+    with registry.run_scope() as run:
+        registry.inc("db_rows_written_total", 2, table="prize_picks_props", op="insert")
+        # Fetcher workers run in a copy of the run's context; an API request thread does not.
+        with ConcurrentFetcher(max_workers=2) as fetcher:
+            fetcher.map(lambda cache: registry.inc("cache_lookups_total", cache=cache, result="miss"),
+                        {1: "http", 2: "http"})
+        api_request = threading.Thread(target=registry.inc, args=("cache_lookups_total",),
+                                       kwargs={"cache": "response", "result": "hit"})
+        api_request.start()
+        api_request.join()
+
+    summary = run_summary(run.snapshot())
+    assert summary["caches"] == {"http": {"miss": 2, "hit_ratio": 0.0}}
+    assert summary["db_rows_written"] == {"prize_picks_props": 2}
+    assert run_summary(registry.snapshot())["caches"]["response"] == {"hit": 1, "hit_ratio": 1.0}
+
+def test_debug_logging_is_off_by_default(capsys):
+    log = get_logger("alphabetter.nba_backend.test")
+    log.debug("per-prop chatter")
+    log.info("stage done")
+    assert capsys.readouterr().out == "stage done\n"
+
+
+def test_pipeline_run_summary_and_metrics_endpoint(pipeline_env, api_client, tmp_path):
+    summary_path = tmp_path / "run.json"
+    pipeline.fetch_and_calculate_and_store(summary_path=str(summary_path))
+
+    summary = json.loads(summary_path.read_text())
+    assert summary == json.loads(json.dumps(metrics.last_run))
+    assert list(summary["stages"]) == ["fetch_props", "resolve_players", "fetch_logs", "store_logs", "store_props",
+                                       "calculate", "store_stats", "snapshot"]
+    assert sum(upstream.get("fetched", 0) for upstream in summary["http"].values()) > 0
+    rows = summary["db_rows_written"]
+    assert rows["player_game_log"] > 0 and rows["player_stats_calculated"] == rows["prize_picks_props"] > 0
+    assert summary["caches"]["hit_rate"]["miss"] > 0
+    assert summary["props_calculated"] == rows["prize_picks_props"]
+
+    text = api_client.get("/metrics").text
+    assert 'pipeline_stage_seconds_count{stage="calculate"}' in text
+    assert 'pipeline_runs_total{mode="full"}' in text
+    assert api_client.get("/metrics", params={"format": "json"}).json()["last_run"] == summary
@@ -0,0 +1,58 @@
+import copy
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.common.name_index import NameIndex, normalize_name
+from alphabetter.nba_backend.models import PrizePicksProp
+
+
+def test_normalize_name_strips_accents_suffixes_and_punctuation():
+    assert normalize_name("Nikola Jokić") == "nikola jokic"
+    assert normalize_name("Jaren Jackson Jr.") == normalize_name("jaren jackson")
+    assert normalize_name("Robert Williams III") == "robert williams"
+    assert normalize_name("De'Aaron Fox") == "deaaron fox"
+    assert normalize_name("Shai Gilgeous-Alexander") == normalize_name("Shai Gilgeous Alexander")
+
+
+def test_resolve_exact_fuzzy_and_ambiguous():
+    index = NameIndex({"Shai Gilgeous-Alexander": 1, "Jalen Williams": 2, "Jaylin Williams": 3, "Alperen Şengün": 4})
+    assert index.resolve("alperen sengun").player_id == 4
+    match = index.resolve("Shai Gilgeous Alexandr")
+    assert (match.player_id, match.distance) == (1, 1)
+    assert index.resolve("Jalin Williams") is None          # one edit from both Williamses
+    assert index.resolve("Stephen Curry") is None
+    assert index.suggest("Jalin Williams") == ["Jalen Williams", "Jaylin Williams"]
+
+
+def test_resolve_keeps_same_surname_players_apart():
+    index = NameIndex({"Jalen Williams": 2, "Stephon Castle": 5})
+    assert index.resolve("Jaylin Williams") is None         # a different player, two first-name edits away
+    assert index.resolve("Jalin Williams").player_id == 2   # a one-edit typo still resolves
+    match = index.resolve("Stephon Castel")                 # two edits, all in the last name
+    assert (match.player_id, match.distance) == (5, 2)
+
+
+def test_pipeline_resolves_misspelled_board_names(pipeline_env, monkeypatch, capsys):
+    board = copy.deepcopy(pipeline.fetch_board_pages()[0])
+    for player in board["included"]:
+        if player["attributes"]["name"] == "Shai Gilgeous-Alexander":
+            player["attributes"]["name"] = "Shai Gilgeous Alexandr"
+    monkeypatch.setattr(pipeline, "fetch_board_pages", lambda: [board])
+
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    assert db.query(PrizePicksProp).filter(PrizePicksProp.player_id == 4278073).count() > 0
+    assert "Resolved 'Shai Gilgeous Alexandr' to ESPN 'Shai Gilgeous-Alexander' (edit distance 1)" in capsys.readouterr().out
+
+
+def test_player_endpoint_suggests_instead_of_dumping_props(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    assert api_client.get("/api/player/victor wembanyama").json() == {"player_id": 5104157}
+    assert api_client.get("/api/player/Victor Wembanyamma").json()["player_id"] == 5104157
+
+    body = api_client.get("/api/player/Stephon Castel").json()
+    assert body == {"player_id": 5106137, "matched_name": "Stephon Castle"}
+
+    missing = api_client.get("/api/player/Jalen Wiliamson Jr").json()
+    assert missing["error"] == "Player not found"
+    assert "props" not in missing
+    assert missing["suggestions"][0] == "Jalen Williams"
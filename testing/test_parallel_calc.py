@@ -0,0 +1,58 @@
+import numpy as np
+
+from alphabetter.nba_backend.models import PlayerStatsCalculated, PrizePicksProp
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import calculate_and_store_stats_bulk
+from alphabetter.nba_backend.stat_collector.game_log_index import load_game_log_store
+from alphabetter.nba_backend.stat_collector.parallel_calc import (
+    attach_store, calculate_and_store_stats_parallel, share_store, shard_by_player,
+)
+
+STORED = ("prop_id", "player_id", "player_name", "l5_hit_rate", "l10_hit_rate", "l20_hit_rate",
+          "last_percent_total", "last_percent_rate")
+
+
+def _stored(session):
+    rows = session.query(PlayerStatsCalculated).order_by(PlayerStatsCalculated.prop_id).all()
+    return [tuple(getattr(row, col) for col in STORED) for row in rows]
+
+
+def test_parallel_matches_serial(db_session, seed_game_logs):
+    seed_game_logs(n_players=8, n_games=25, props_per_player=6, random_seed=5)
+    props = db_session.query(PrizePicksProp).all()
+    calculate_and_store_stats_bulk(db_session, props)
+    serial = _stored(db_session)
+    db_session.query(PlayerStatsCalculated).delete()
+    db_session.commit()
+
+    calculate_and_store_stats_parallel(db_session, props, workers=2, flush_rows=7)
+    assert _stored(db_session) == serial
+    assert len(serial) == len(props)
+
+
+def test_shared_store_round_trip(db_session, seed_game_logs):
+    seed_game_logs(n_players=8, n_games=25, props_per_player=6, random_seed=5)
+    store = load_game_log_store(db_session)
+    shm, spec = share_store(store)
+    try:
+        attached_shm, shared = attach_store(spec)
+        for player_id in (1, 5, 999):
+            ours, theirs = store.player(player_id), shared.player(player_id)
+            assert np.array_equal(ours.minutes, theirs.minutes)
+            assert np.array_equal(ours.game_dates, theirs.game_dates)
+            for name, values in ours.columns.items():
+                assert np.array_equal(values, theirs.column(name))
+        del shared, theirs
+        attached_shm.close()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_shards_keep_players_together(db_session, seed_game_logs):
+    seed_game_logs(n_players=8, n_games=25, props_per_player=6, random_seed=5)
+    props = db_session.query(PrizePicksProp).all()
+    shards = shard_by_player(props, 3)
+    assert len(shards) == 3
+    players = [player_id for shard in shards for player_id, _ in shard]
+    assert len(players) == len(set(players))
+    assert sorted(spec.id for shard in shards for _, specs in shard for spec in specs) == sorted(p.id for p in props)
@@ -0,0 +1,65 @@
+import copy
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.models import PlayerGameLog, PlayerStats, PrizePicksProp, PlayerStatsCalculated
+from alphabetter.nba_backend.stat_collector.calculate_and_store_lastx import calculate_hit_rates
+
+
+def test_staged_pipeline_end_to_end(pipeline_env):
+    assert pipeline.fetch_and_calculate_and_store() == 13  # Dunks skipped
+
+    db = pipeline_env()
+    assert db.query(PlayerStats).count() == 4
+    assert db.query(PlayerGameLog).count() == 16
+    props = db.query(PrizePicksProp).all()
+    assert len(props) == 12  # "Unknown Rookie" is not on an ESPN roster
+
+    stats = {s.prop_id: s for s in db.query(PlayerStatsCalculated).all()}
+    assert set(stats) == {prop.id for prop in props}
+    for prop in props:
+        expected = calculate_hit_rates(db, prop)
+        assert stats[prop.id].l10_hit_rate == expected["l10_hit_rate"]
+        assert stats[prop.id].last_percent_total == expected["last_percent_total"]
+
+
+def test_incremental_refresh_only_touches_changes(pipeline_env, monkeypatch):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    shai_id = 4278073
+    latest_shai_game = (
+        db.query(PlayerGameLog).filter(PlayerGameLog.player_id == shai_id)
+        .order_by(PlayerGameLog.game_date.desc()).first()
+    )
+    db.delete(latest_shai_game)
+    db.commit()
+    before = {p.id: p for p in db.query(PrizePicksProp).all()}
+    db.close()
+
+    # Move a standard line, drop a line and add a new one.
+    board = copy.deepcopy(pipeline.fetch_board_pages()[0])
+    board["data"][4]["attributes"]["line_score"] = 22.5   # Jalen Williams Points moves
+    removed = board["data"].pop(11)                        # Stephon Castle Points leaves
+    board["data"].append({**removed, "id": "9999",
+                          "attributes": {**removed["attributes"], "stat_type": "Assists", "line_score": 3.5}})
+    monkeypatch.setattr(pipeline, "fetch_board_pages", lambda: [board])
+
+    recalculated = []
+    real_calculate = pipeline.get_hit_rates
+    monkeypatch.setattr(pipeline, "get_hit_rates",
+                        lambda session, props, store=None: recalculated.extend(props) or real_calculate(session, props, store))
+
+    pipeline.fetch_and_calculate_and_store(incremental=True)
+
+    db = pipeline_env()
+    assert db.query(PlayerGameLog).count() == 16  # only the missing game came back
+    after = {p.id: p for p in db.query(PrizePicksProp).all()}
+    assert len(after) == 12
+    assert not any(p.player_name == "Stephon Castle" and p.stat == "Points" for p in after.values())
+
+    touched = {(p.player_name, p.stat, p.target) for p in recalculated}
+    shai_props = {(p.player_name, p.stat, p.target) for p in before.values() if p.player_id == shai_id}
+    assert touched == shai_props | {("Jalen Williams", "Points", 22.5), ("Stephon Castle", "Assists", 3.5)}
+
+    # Untouched props keep their ids and every prop still has calculated stats.
+    assert set(after) - set(before) == {p.id for p in after.values() if p.stat == "Assists" and p.player_name == "Stephon Castle"}
+    assert {s.prop_id for s in db.query(PlayerStatsCalculated).all()} == set(after)
@@ -0,0 +1,97 @@
+import gzip
+import json
+
+from alphabetter.nba_backend.common.http_cache import HttpCache
+from alphabetter.nba_backend.get_props import prizepicks_stream as stream
+from alphabetter.nba_backend.get_props.get_props import create_props
+from conftest import FIXTURES_DIR, StubServer
+
+BOARD = json.loads((FIXTURES_DIR / "prizepicks" / "board.json").read_text())
+
+
+def _split_board(pages: int) -> list[dict]:
+    """Board split into JSON:API pages; every player is listed on the *last* page only."""
+    size = -(-len(BOARD["data"]) // pages)
+    chunks = [BOARD["data"][i:i + size] for i in range(0, len(BOARD["data"]), size)]
+    return [
+        {
+            "data": chunk,
+            "included": BOARD["included"] if n == len(chunks) else [],
+            "links": {"next": f"/projections?page={n + 1}" if n < len(chunks) else None},
+        }
+        for n, chunk in enumerate(chunks, start=1)
+    ]
+
+
+def test_iter_props_matches_whole_board_parse():
+    expected = create_props(BOARD)
+    assert list(stream.iter_props([BOARD])) == expected
+    # Projections arrive before their players: they are held until the player shows up.
+    assert sorted(map(repr, stream.iter_props(_split_board(3)))) == sorted(map(repr, expected))
+
+
+def test_fetch_board_pages_follows_pagination(tmp_path, monkeypatch):
+    pages = _split_board(3)
+    routes = {}
+    for n, page in enumerate(pages, start=1):
+        path = tmp_path / f"page_{n}.json"
+        path.write_text(json.dumps(page))
+        routes[f"/projections?league_id=7&per_page={stream.PRIZEPICKS_PER_PAGE}&page={n}"] = str(path)
+
+    with StubServer(routes) as server:
+        monkeypatch.setattr(stream, "PRIZEPICKS_PROJECTIONS_URL", server.base_url + "/projections?league_id=7")
+        fetched = list(stream.fetch_board_pages())
+        assert fetched == pages
+        assert len(server.requests) == 3
+
+        list(stream.fetch_board_pages())  # second run is served by the HTTP cache
+        assert len(server.requests) == 3
+
+
+
+def _expire(cache, url):
+    meta_path = cache._meta_path(url)
+    meta = json.loads(meta_path.read_text())
+    meta_path.write_text(json.dumps({**meta, "expires_at": 0}))
+
+
+def test_board_pages_are_never_mixed_across_downloads(tmp_path, monkeypatch):
+    old, new = _split_board(3), _split_board(3)
+    new[0]["data"] = new[0]["data"][1:] + new[1]["data"][:1]  # the board moved: lines shift across pages
+    new[1]["data"] = new[1]["data"][1:]
+    routes, files = {}, {}
+    for n, page in enumerate(old, start=1):
+        files[n] = tmp_path / f"page_{n}.json"
+        files[n].write_text(json.dumps(page))
+        routes[f"/projections?league_id=7&per_page={stream.PRIZEPICKS_PER_PAGE}&page={n}"] = str(files[n])
+    cache = HttpCache(tmp_path / "cache")
+
+    with StubServer(routes) as server:
+        monkeypatch.setattr(stream, "PRIZEPICKS_PROJECTIONS_URL", server.base_url + "/projections?league_id=7")
+        assert list(stream.fetch_board_pages(cache=cache)) == old
+
+        # Page 1 still fresh: a later page that expired on its own is still served with it.
+        _expire(cache, stream._page_url(2))
+        for n, page in enumerate(new, start=1):
+            files[n].write_text(json.dumps(page))
+        assert list(stream.fetch_board_pages(cache=cache)) == old
+        assert len(server.requests) == 3
+
+        # Page 1 stale: every page is asked for again, so the read is the new board throughout.
+        _expire(cache, stream._page_url(1))
+        assert list(stream.fetch_board_pages(cache=cache)) == new
+        assert len(server.requests) == 6 and server.not_modified == 1  # page 3 didn't change
+
+def test_archive_round_trip(tmp_path):
+    path = stream.archive_file(tmp_path)
+    props = list(stream.iter_props(stream.archive_pages(_split_board(2), path)))
+
+    with gzip.open(path, "rt") as f:
+        assert len(f.readlines()) == 2
+    assert list(stream.iter_props(stream.read_archived_pages(path))) == props
+
+
+def test_short_page_or_total_pages_ends_pagination():
+    assert not stream._has_next_page({"data": [{}]}, 1)
+    assert stream._has_next_page({"data": [{}], "meta": {"total_pages": 2}}, 1)
+    assert not stream._has_next_page({"data": [{}], "meta": {"total_pages": 2}}, 2)
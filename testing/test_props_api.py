@@ -0,0 +1,59 @@
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+
+
+def _all_pages(api_client, url, key, **params):
+    rows, cursor = [], None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        body = api_client.get(url, params=query).json()
+        rows.extend(body[key])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows
+
+
+def test_unpaginated_props_are_unchanged(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    body = api_client.get("/api/props").json()
+    assert len(body["props"]) == 12
+    assert body["next_cursor"] is None
+    assert set(body["props"][0]) == {"id", "player_name", "player_id", "stat", "target", "over_under", "odds_type"}
+
+
+def test_cursor_pagination_walks_every_row_once(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    everything = api_client.get("/api/props-with-stats", params={"sort": "l10_hit_rate", "order": "desc"}).json()["props"]
+    paged = _all_pages(api_client, "/api/props-with-stats", "props", sort="l10_hit_rate", order="desc", limit=3)
+    assert paged == everything
+    rates = [row["l10_hit_rate"] for row in paged]
+    assert rates == sorted(rates, reverse=True)
+
+
+def test_filters_and_projection(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    body = api_client.get("/api/player-stats-calculated", params={
+        "player": "williams", "min_l10": 0.5, "fields": "prop_id,l10_hit_rate",
+    }).json()
+    assert len(body["stats"]) == 3
+    for row in body["stats"]:
+        assert set(row) == {"prop_id", "l10_hit_rate"}
+        assert row["l10_hit_rate"] >= 0.5
+
+    goblins = api_client.get("/api/props", params={"odds_type": "goblin", "stat": "Points"}).json()["props"]
+    assert [(p["player_name"], p["target"]) for p in goblins] == [("Shai Gilgeous-Alexander", 27.5)]
+
+
+def test_combined_endpoint_matches_separate_endpoints(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    props = {p["id"]: p for p in api_client.get("/api/props").json()["props"]}
+    stats = {s["prop_id"]: s for s in api_client.get("/api/player-stats-calculated").json()["stats"]}
+    for row in api_client.get("/api/props-with-stats").json()["props"]:
+        assert {k: row[k] for k in props[row["id"]]} == props[row["id"]]
+        assert row["l10_hit_rate"] == stats[row["id"]]["l10_hit_rate"]
+        assert row["last_percent_total"] == stats[row["id"]]["last_percent_total"]
+
+
+def test_bad_params_are_rejected(pipeline_env, api_client):
+    assert api_client.get("/api/props", params={"fields": "id,nope"}).status_code == 400
+    assert api_client.get("/api/props", params={"cursor": "garbage"}).status_code == 400
+    assert api_client.get("/api/props", params={"sort": "nope"}).status_code == 422
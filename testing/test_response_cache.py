@@ -0,0 +1,74 @@
+from sqlalchemy import update
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.models import PrizePicksProp
+from alphabetter.nba_backend.common.response_cache import ResponseCache, etag_matches
+from alphabetter.nba_backend.crud.dataset_version import bump_dataset_version, get_dataset_version
+from alphabetter.nba_backend.main import response_cache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") is not None  # "a" is now most recent
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert len(cache) == 2
+
+
+def test_etag_matching():
+    etag = ResponseCache().put("k", b"body")[1]
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_dataset_version_bumps(db_session):
+    assert get_dataset_version(db_session) == 0
+    assert bump_dataset_version(db_session) == 1
+    assert bump_dataset_version(db_session) == 2
+    db_session.commit()
+    assert get_dataset_version(db_session) == 2
+
+
+def test_repeat_requests_hit_cache_and_revalidate(pipeline_env, api_client, monkeypatch):
+    pipeline.fetch_and_calculate_and_store()
+    first = api_client.get("/api/props-with-stats")
+    etag = first.headers["etag"]
+
+    # Second request is served without running the query again.
+    def _fail(*args, **kwargs):
+        raise AssertionError("query ran on a cached request")
+    monkeypatch.setattr("alphabetter.nba_backend.main.PropQueryParams.run", _fail)
+    assert api_client.get("/api/props-with-stats").json() == first.json()
+
+    not_modified = api_client.get("/api/props-with-stats", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.content == b""
+    assert response_cache.hits == 2
+
+
+def test_pipeline_run_invalidates_cached_responses(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    prop_id = api_client.get("/api/props").json()["props"][0]["id"]
+    before = api_client.get(f"/api/last_x/{prop_id}/5")
+    assert before.status_code == 200
+    misses = response_cache.misses
+
+    pipeline.fetch_and_calculate_and_store()
+    after = api_client.get(f"/api/last_x/{prop_id}/5", headers={"If-None-Match": before.headers["etag"]})
+    assert response_cache.misses == misses + 1  # new dataset version -> rebuilt from the database
+    # Same board and logs, so the rebuilt body is identical and the old ETag still validates.
+    assert after.status_code == 304
+
+    with pipeline_env() as db:
+        db.execute(update(PrizePicksProp).where(PrizePicksProp.id == prop_id).values(target=99.5))
+        bump_dataset_version(db)
+        db.commit()
+    changed = api_client.get(f"/api/last_x/{prop_id}/5", headers={"If-None-Match": before.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.json()["prop"]["target"] == 99.5
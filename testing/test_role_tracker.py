@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.models import PlayerGameLog, PlayerRoleState
+from alphabetter.nba_backend.stat_collector.hit_rate_engine import compute_role_rates_batch
+from alphabetter.nba_backend.stat_collector.role_tracker import RoleTracker, update_role_states, usage_per36
+
+START = date(2025, 1, 1)
+# 10 bench games at 18 minutes, a DNP, then a promotion to 34 minutes for 5 games.
+MINUTES = [18.0] * 10 + [0.0] + [34.0] * 5
+
+
+def _feed(tracker, minutes):
+    for day, played in enumerate(minutes):
+        tracker.update(START + timedelta(days=day), played, 24.0 if played else 0.0)
+    return tracker
+
+
+def test_minutes_jump_starts_a_new_role():
+    tracker = _feed(RoleTracker(), MINUTES[:11])
+    assert tracker.role_games == 10 and tracker.projected_minutes == pytest.approx(18)
+    assert tracker.last_game_date == START + timedelta(days=10)  # the DNP moves the date only
+
+    changes = [tracker.update(START + timedelta(days=11 + i), 34.0, 24.0) for i in range(5)]
+    # +16 minutes a night crosses the threshold on the second game; the role starts at the first.
+    assert changes == [False, True, False, False, False]
+    assert tracker.role_games == 5 and tracker.projected_minutes == pytest.approx(34)
+
+
+def test_steady_role_never_changes():
+    rng = np.random.default_rng(0)
+    tracker = _feed(RoleTracker(), (30 + rng.normal(0, 2.5, 60)).tolist())
+    assert tracker.role_games == 60 and tracker.projected_minutes == pytest.approx(30, abs=1)
+
+
+def test_state_round_trip_matches_full_replay():
+    full = _feed(RoleTracker(), MINUTES)
+    resumed = RoleTracker.from_state(_feed(RoleTracker(), MINUTES[:12]).to_state())
+    for day in range(12, len(MINUTES)):
+        resumed.update(START + timedelta(days=day), MINUTES[day], 24.0)
+    assert resumed.to_state() == full.to_state()
+
+
+def test_usage_per36():
+    assert usage_per36(np.array([15.0, 3.0]), np.array([5.0, 0.0]), np.array([2.0, 1.0]),
+                       np.array([36.0, 0.0])).tolist() == pytest.approx([19.2, 0.0])
+
+
+def test_role_rates_scale_to_projected_minutes():
+    values = np.array([[30.0, 10.0, 20.0, 5.0]])
+    minutes = np.array([36.0, 12.0, 36.0, 4.0])
+    rates = compute_role_rates_batch(values, minutes, [25.0], ["over"], role_games=2, projected_minutes=36.0)[0]
+    # 10 in 12 minutes is 30 over 36; the 4-minute game is too short to scale and left out.
+    assert rates["per_minute_l10_hit_rate"] == pytest.approx(2 / 3)
+    # Last % only looks at the two games of the current role.
+    assert rates["role_last_percent_total"] == "1/2" and rates["role_last_percent_rate"] == 0.5
+    assert rates["role_games"] == 2 and rates["projected_minutes"] == 36.0
+
+    empty = compute_role_rates_batch(np.zeros((1, 0)), np.zeros(0), [1.5], ["under"], 0, 0.0)[0]
+    assert empty["per_minute_l10_hit_rate"] == 0.0 and empty["role_last_percent_total"] == "0/0"
+
+
+def test_update_role_states_only_feeds_new_games(db_session):
+    def add_games(days):
+        for day in days:
+            played = MINUTES[day]
+            db_session.add(PlayerGameLog(player_id=7, game_date=START + timedelta(days=day), min=played,
+                                         fga=played / 2, fta=played / 6, tov=played / 18))
+        db_session.commit()
+
+    add_games(range(12))
+    update_role_states(db_session, {7})
+    add_games(range(12, len(MINUTES)))
+    tracker = update_role_states(db_session, [7])[7]
+    db_session.commit()
+
+    row = db_session.get(PlayerRoleState, 7)
+    assert row.last_game_date == START + timedelta(days=len(MINUTES) - 1)
+    assert row.role_games == 5 and row.projected_minutes == pytest.approx(34)
+    expected = RoleTracker()
+    for day, played in enumerate(MINUTES):
+        expected.update(START + timedelta(days=day), played, 18 + 0.44 * 6 + 2 if played else 0.0)
+    assert row.state == tracker.to_state() == expected.to_state()
+
+
+def test_pipeline_serves_role_windows(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    assert db.query(PlayerRoleState).count() > 0
+
+    props = api_client.get("/api/props-with-stats", params={
+        "fields": "id,role_games,projected_minutes,per_minute_l10_hit_rate,role_last_percent_total",
+        "sort": "per_minute_l10_hit_rate", "order": "desc",
+    }).json()["props"]
+    assert all(p["role_games"] > 0 and p["projected_minutes"] > 0 for p in props)
+    rates = [p["per_minute_l10_hit_rate"] for p in props]
+    assert rates == sorted(rates, reverse=True) and all(0 <= rate <= 1 for rate in rates)
@@ -0,0 +1,164 @@
+import asyncio
+import itertools
+import math
+import random
+
+import pytest
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend import main
+from alphabetter.nba_backend.models import PrizePicksProp
+from alphabetter.nba_backend.services.slip_optimizer import (
+    MIN_TEAMS,
+    Leg,
+    leg_probability,
+    load_candidate_legs,
+    optimize_slips,
+    slip_payout,
+)
+
+TEAMS = ("OKC", "LAL", "BOS", "NYK")
+
+
+def _legs(n_players=9, props_per_player=3, seed=7):
+    rng = random.Random(seed)
+    legs, prop_id = [], 0
+    for player_id in range(n_players):
+        team = TEAMS[player_id % len(TEAMS)]
+        opponent = TEAMS[(player_id + 1) % len(TEAMS)]
+        for _ in range(props_per_player):
+            prop_id += 1
+            odds_type = rng.choice(("standard", "standard", "goblin", "demon"))
+            legs.append(Leg(prop_id, player_id, f"Player {player_id}", "Points", 20.5, "over", odds_type, team,
+                            "-".join(sorted((team, opponent))), rng.uniform(0.3, 0.9),
+                            {"standard": 1.0, "goblin": 0.8, "demon": 1.5}[odds_type]))
+    return legs
+
+
+def _feasible(combo, max_per_team, max_per_game):
+    teams = [leg.team for leg in combo if leg.team]
+    games = [leg.game for leg in combo if leg.game]
+    return (
+        len({leg.player_id for leg in combo}) == len(combo)
+        and len(set(teams)) + len(combo) - len(teams) >= MIN_TEAMS  # unknown teams count as distinct
+        and (max_per_team is None or max((teams.count(t) for t in teams), default=0) <= max_per_team)
+        and (max_per_game is None or max((games.count(g) for g in games), default=0) <= max_per_game)
+    )
+
+
+def _brute_force(legs, min_legs, max_legs, top_k, objective, max_per_team=None, max_per_game=None):
+    scored = []
+    for n in range(min_legs, max_legs + 1):
+        for combo in itertools.combinations(legs, n):
+            if not _feasible(combo, max_per_team, max_per_game):
+                continue
+            probability = math.prod(leg.probability for leg in combo)
+            scored.append(probability * slip_payout(combo) if objective == "ev" else probability)
+    return sorted(scored, reverse=True)[:top_k]
+
+
+@pytest.mark.parametrize("objective", ["probability", "ev"])
+@pytest.mark.parametrize("caps", [(None, None), (2, None), (None, 2)])
+def test_wide_beam_matches_brute_force(objective, caps):
+    legs = _legs()
+    slips = optimize_slips(legs, 2, 4, top_k=15, objective=objective, max_per_team=caps[0],
+                           max_per_game=caps[1], beam_width=len(legs) ** 2)
+    got = [slip.probability * slip.payout if objective == "ev" else slip.probability for slip in slips]
+    assert got == pytest.approx(_brute_force(legs, 2, 4, 15, objective, *caps))
+    for slip in slips:
+        assert _feasible(slip.legs, *caps)
+
+
+def test_narrow_beam_still_returns_feasible_slips():
+    legs = _legs(n_players=60, props_per_player=5)
+    slips = optimize_slips(legs, 3, 6, top_k=10, max_per_team=2, beam_width=20)
+    assert len(slips) == 10
+    assert [slip.probability for slip in slips] == sorted((slip.probability for slip in slips), reverse=True)
+    for slip in slips:
+        assert 3 <= len(slip.legs) <= 6
+        assert _feasible(slip.legs, 2, None)
+
+
+def test_narrow_beam_skips_single_team_slips_while_expanding():
+    # The five best legs are all OKC: a 3-wide beam of 3-leg slips used to fill with OKC-only slips.
+    legs = [Leg(leg.prop_id, leg.player_id, leg.player_name, leg.stat, leg.target, leg.over_under, "standard",
+                leg.team, leg.game, 0.9 if leg.team == "OKC" else 0.5, 1.0)
+            for leg in _legs(n_players=20, props_per_player=1)]
+    slips = optimize_slips(legs, 3, 3, top_k=3, beam_width=3)
+    assert len(slips) == 3
+    for slip in slips:
+        assert _feasible(slip.legs, None, None)
+        assert [leg.team for leg in slip.legs].count("OKC") == 2
+
+
+def test_unknown_team_legs_count_as_distinct_teams():
+    known, *unknown = _legs(n_players=3, props_per_player=1)
+    unknown = [Leg(leg.prop_id, leg.player_id, leg.player_name, leg.stat, leg.target, leg.over_under,
+                   leg.odds_type, None, None, leg.probability, leg.payout_factor) for leg in unknown]
+    legs = [known, *unknown]
+    slips = optimize_slips(legs, 2, 3, top_k=10, objective="probability", beam_width=100)
+    assert sorted(len(slip.legs) for slip in slips) == [2, 2, 2, 3]  # every combination of the three players
+    assert [slip.probability for slip in slips] == pytest.approx(_brute_force(legs, 2, 3, 10, "probability"))
+
+
+def test_payout_applies_goblin_and_demon_factors():
+    standard, goblin, demon = (next(leg for leg in _legs() if leg.odds_type == kind)
+                               for kind in ("standard", "goblin", "demon"))
+    assert slip_payout([standard, standard]) == 3.0
+    assert slip_payout([standard, goblin, demon]) == pytest.approx(5.0 * 0.8 * 1.5)
+
+
+def test_leg_probability_blends_available_rates():
+    assert leg_probability({"l5_hit_rate": None, "l10_hit_rate": None}) is None
+    assert leg_probability({"l10_hit_rate": 0.6, "l20_hit_rate": 0.4}) == pytest.approx(0.5)
+    assert leg_probability({"l5_hit_rate": 1.0, "l10_hit_rate": 1.0, "l20_hit_rate": 1.0, "last_percent_rate": 1.0}) < 1
+
+
+def test_slips_endpoint_uses_stored_rates_and_teams(pipeline_env, api_client):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    shai = db.query(PrizePicksProp).filter(PrizePicksProp.player_name == "Shai Gilgeous-Alexander").first()
+    assert (shai.team, shai.opponent) == ("OKC", "LAL")
+
+    legs = load_candidate_legs(db)
+    assert legs and all(leg.team for leg in legs)
+
+    body = api_client.get("/api/slips", params={"min_legs": 2, "max_legs": 3, "top": 5}).json()
+    assert body["candidates"] == len(legs)
+    assert body["slips"]
+    for slip in body["slips"]:
+        names = [leg["player_name"] for leg in slip["legs"]]
+        assert len(names) == len(set(names))
+        assert len({leg["team"] for leg in slip["legs"]}) >= MIN_TEAMS
+
+    assert api_client.get("/api/slips", params={"min_legs": 4, "max_legs": 2}).status_code == 400
+
+
+
+def test_slips_beam_search_runs_off_the_event_loop(pipeline_env, api_client, monkeypatch):
+    pipeline.fetch_and_calculate_and_store()
+    on_loop = []
+
+    def optimize(*args):
+        try:
+            on_loop.append(asyncio.get_running_loop() is not None)
+        except RuntimeError:
+            on_loop.append(False)
+        return optimize_slips(*args)
+
+    monkeypatch.setattr(main, "optimize_slips", optimize)
+    assert api_client.get("/api/slips", params={"beam_width": 5000}).json()["slips"]
+    assert on_loop == [False]
+
+def test_migration_adds_team_columns_to_existing_props_table(db_session):
+    from sqlalchemy import inspect, text
+    from alphabetter.nba_backend.migrations import run_migrations
+
+    engine = db_session.get_bind()
+    with engine.begin() as conn:  # table as created before team / opponent existed
+        conn.execute(text("ALTER TABLE prize_picks_props DROP COLUMN team"))
+        conn.execute(text("ALTER TABLE prize_picks_props DROP COLUMN opponent"))
+
+    run_migrations(engine)
+    run_migrations(engine)
+    assert {"team", "opponent"} <= {c["name"] for c in inspect(engine).get_columns("prize_picks_props")}
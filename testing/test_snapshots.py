@@ -0,0 +1,76 @@
+import copy
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from alphabetter.nba_backend import fetch_and_calculate_all as pipeline
+from alphabetter.nba_backend.common.game_day import game_day
+from alphabetter.nba_backend.crud.snapshots import compact_snapshots, line_history
+from alphabetter.nba_backend.models import PrizePicksProp, PropSnapshot
+
+SHAI_ID = 4278073
+
+
+def _snapshot(db, board_ts, target, odds_type="standard", stat="Points"):
+    db.add(PropSnapshot(board_ts=board_ts, player_id=SHAI_ID, player_name="Shai Gilgeous-Alexander",
+                        stat=stat, odds_type=odds_type, over_under="over", target=target, l10_hit_rate=0.5))
+
+
+def test_every_run_appends_a_snapshot(pipeline_env, api_client, monkeypatch):
+    pipeline.fetch_and_calculate_and_store()
+    db = pipeline_env()
+    first = db.query(PropSnapshot).count()
+    assert first == db.query(PrizePicksProp).count()
+
+    # The line moves before the next refresh; the full refresh wipes props but not history.
+    board = copy.deepcopy(pipeline.fetch_board_pages()[0])
+    for bet in board["data"]:
+        if bet["attributes"]["stat_type"] == "Points" and bet["attributes"].get("odds_type", "standard") == "standard":
+            bet["attributes"]["line_score"] += 1
+    monkeypatch.setattr(pipeline, "fetch_board_pages", lambda: [board])
+    pipeline.fetch_and_calculate_and_store()
+    db.expire_all()
+    assert db.query(PropSnapshot).count() == 2 * first
+    assert len({ts for (ts,) in db.query(PropSnapshot.board_ts).distinct()}) == 2
+
+    history = api_client.get(f"/api/line-history/{SHAI_ID}", params={"stat": "Points", "odds_type": "standard"}).json()["history"]
+    assert [row["target"] for row in history] == sorted(row["target"] for row in history)
+    assert history[1]["target"] == history[0]["target"] + 1
+
+    latest = api_client.get("/api/snapshots/latest").json()["props"]
+    assert len(latest) == first
+    assert {row["board_ts"] for row in latest} == {history[-1]["board_ts"]}
+
+
+def test_compaction_keeps_each_lines_closing_number(db_session):
+    now = datetime(2025, 3, 20, 15)
+    old_day = datetime(2025, 3, 1, 14)  # game day 2025-03-01
+    _snapshot(db_session, old_day, 27.5)
+    _snapshot(db_session, old_day + timedelta(hours=3), 28.5)          # standard line moved
+    _snapshot(db_session, old_day + timedelta(hours=14), 29.5)         # 04:00 UTC next day: same game day
+    _snapshot(db_session, old_day, 22.5, odds_type="goblin")           # pulled before the last capture
+    _snapshot(db_session, old_day + timedelta(days=1), 30.5)           # next game day
+    _snapshot(db_session, now - timedelta(hours=2), 31.5)              # inside the intraday window
+    _snapshot(db_session, now - timedelta(hours=1), 32.5)
+    db_session.commit()
+
+    result = compact_snapshots(db_session, now=now)
+    assert result == {"days": 2, "folded": 2, "expired": 0}
+
+    rows = db_session.query(PropSnapshot).order_by(PropSnapshot.board_ts, PropSnapshot.target).all()
+    daily = [(game_day(r.board_ts).isoformat(), r.odds_type, r.target) for r in rows if r.granularity == "daily"]
+    assert daily == [("2025-03-01", "goblin", 22.5), ("2025-03-01", "standard", 29.5), ("2025-03-02", "standard", 30.5)]
+    assert [r.target for r in rows if r.granularity == "intraday"] == [31.5, 32.5]
+
+    assert compact_snapshots(db_session, now=now) == {"days": 0, "folded": 0, "expired": 0}
+    assert compact_snapshots(db_session, now=now, retention_days=10)["expired"] == 3
+    assert [row["target"] for row in line_history(db_session, SHAI_ID, "Points")] == [31.5, 32.5]
+
+
+def test_line_history_is_an_index_range_scan(db_session):
+    plan = " ".join(row[-1] for row in db_session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT board_ts, target FROM prop_snapshots "
+        "WHERE player_id = 7 AND stat = 'Points' ORDER BY board_ts"
+    )))
+    assert "ix_prop_snapshots_line_history" in plan
+    assert "TEMP B-TREE" not in plan